@@ -6,9 +6,17 @@ import time
 import os
 import pyttsx3
 import requests
-from six.moves import queue as six_queue
+from concurrent.futures import ThreadPoolExecutor
 from google.cloud import speech
-import pyaudio
+from tc_audio import (open_source, chunk_size, frame_requests, LOW_LATENCY_FRAME_MS, UplinkEncoder,
+                      AudioTimeline, AudioFanout, SharedAudioBus, BusSource)
+from tc_dsp import (VoiceActivityGate, DspChain, HighPassFilter, SpectralSubtraction,
+                    AutomaticGainControl, EchoGate, PushToTalkGate, MicArray)
+from tc_stt import (CommandBus, CommandGrammar, InterimFastPath, SessionRotator, HedgeArbiter,
+                    HedgedRecognizer)
+from tc_local_stt import LocalSpeechClient
+from tc_archive import AudioArchive, ArchiveRecorder
+from tc_realtime import ThreadTuner, tune_current_thread, configure_gc
 
 # ✅ TriCaster REST API 기본 설정
 TRICASTER_IP = "172.30.20.6"
@@ -33,6 +41,75 @@ PHONETIC_MAP = {
     "pick 2 cut": "p2 cut", "p to cut": "p2 cut"
 }
 
+# ✅ 명령 문법 (정규화/해석 + 인식기 적응 문구는 위 두 표에서 만든다)
+command_grammar = CommandGrammar(TRICASTER_INPUT_MAP, PHONETIC_MAP)
+
+# 📚 인식기 적응: 시작할 때 입력 이름/명령 동사/받아들이는 발화 패턴으로 문구 목록을 만들어 가중치와 함께 전달
+# (발음 보정표에 오인식을 손으로 추가하는 대신 인식기가 처음부터 명령어 쪽으로 기울게 함)
+SPEECH_ADAPTATION = True
+SPEECH_BOOSTS = {"verb": 15.0, "quick_cut": 12.0, "input": 10.0, "ready": 5.0}   # Google 권장 범위 0~20
+speech_contexts = []
+
+# 🖥️ 인식 엔진: "google"(클라우드 스트리밍) / "local"(명령 문법으로 제한한 Vosk 디코더, CPU 전용)
+# local은 네트워크 없이 동작해서 WAN이 끊겨도 명령을 받고, 왕복 지연 없이 지연이 일정하다
+# 설치: pip install vosk (선택 의존성, local 엔진을 쓸 때만 필요)
+# 모델: https://alphacephei.com/vosk/models 의 영어 small 모델 (약 40 MB)
+STT_ENGINE = "google"
+LOCAL_STT_MODEL = "models/vosk-model-small-en-us-0.15"
+LOCAL_PARTIAL_STABILITY = 0.0   # Vosk 중간 결과에는 안정도가 없음 → 빠른 실행에 쓰려면 INTERIM_STABILITY 이상으로
+
+# 🏁 엔진 헤징 (선택): 같은 오디오를 여러 엔진에 동시에 보내고, 발화마다 유효한 명령으로 해석되는 첫 결과를 쓴다
+# 클라우드의 긴 지연 꼬리는 로컬 엔진이, 로컬 엔진이 약한 드문 단어는 클라우드가 메운다
+HEDGE_ENGINES = {}        # 엔진 → 최소 신뢰도, 예: {"google": 0.0, "local": 0.7} (비어 있으면 STT_ENGINE 하나만 사용)
+HEDGE_WINDOW_S = 0.7      # 엔진별 결과 끝 캡처 시각이 이 안이면 같은 발화로 본다
+HEDGE_RETRY_S = 5.0       # 끊긴 엔진을 다시 여는 간격 (그동안 나머지 엔진은 계속 동작)
+
+def active_engines():
+    """🧩 지금 쓰는 인식 엔진 목록"""
+    return list(HEDGE_ENGINES) or [STT_ENGINE]
+
+speech_clients = {}
+speech_clients_lock = threading.Lock()
+
+def get_speech_client(engine, app=None):
+    """♻️ 엔진별 인식 클라이언트를 한 번만 만들어 세션 재시작/교대에도 재사용 (Vosk 모델을 다시 읽지 않음)"""
+    with speech_clients_lock:
+        if engine not in speech_clients:
+            speech_clients[engine] = create_speech_client(engine, app)
+        return speech_clients[engine]
+
+def create_speech_client(engine, app=None):
+    """🏭 엔진 이름에 맞는 인식 클라이언트 (둘 다 streaming_recognize(config, requests) 모양)"""
+    if engine != "local":
+        return speech.SpeechClient()
+    phrases = command_grammar.decoder_phrases()
+    client = LocalSpeechClient(LOCAL_STT_MODEL, phrases, partial_stability=LOCAL_PARTIAL_STABILITY)
+    msg = f"[LOCAL] 로컬 인식 엔진 사용: {LOCAL_STT_MODEL} (명령 문구 {len(phrases)}개로 제한)"
+    print(msg)
+    if app:
+        app.log(msg)
+    return client
+
+# ⚡ 실시간 튜닝 (선택): 캡처/인식/명령 쓰레드 우선순위 상향, CPU 고정, gc 빈도 조절
+# 권한이 없으면 가능한 단계(nice 등)까지만 적용되고 프로그램은 그대로 동작한다
+REALTIME_TUNING = False
+REALTIME_CPUS = {"audio": None, "stt": None, "dispatch": None}   # 예: {"audio": [2], "stt": [3], "dispatch": [3]}
+
+def log_thread_tuning(results, app=None):
+    """⚡ 쓰레드 튜닝 적용 결과 기록"""
+    msg = f"[RT] {results['role']} 쓰레드({results['thread']}): {results.get('priority')}"
+    if "cpus" in results:
+        msg += f", CPU {results['cpus']}"
+    print(msg)
+    if app:
+        app.log(msg)
+
+def thread_tuner(role, app=None):
+    """🧵 역할별 쓰레드 튜닝 훅 (REALTIME_TUNING이 꺼져 있으면 None)"""
+    if not REALTIME_TUNING:
+        return None
+    return ThreadTuner(role, REALTIME_CPUS.get(role), on_tuned=lambda results: log_thread_tuning(results, app))
+
 # ✅ 시스템 상태 변수 초기화
 initialized = False
 stt_ready = False
@@ -46,13 +123,18 @@ current_preview = "input2"
 first_input_received = True
 
 def speak_message(text):
-    """🗣️ 음성 안내 메시지 출력"""
+    """🗣️ 음성 안내 메시지 출력 (재생 구간은 에코 게이트에 기록해서 인식기로 들어가지 않게 함)"""
+    # 드라이버가 started-utterance 콜백을 안 줘도 게이트가 열리도록 재생 전에 먼저 기록 (콜백은 시작 시각 보정만)
+    echo_gate.playback_started()
     try:
         engine = pyttsx3.init()
+        engine.connect("started-utterance", lambda name: echo_gate.playback_audible())
         engine.say(text)
         engine.runAndWait()
     except RuntimeError:
         pass
+    finally:
+        echo_gate.playback_finished()
 
 def stop_program():
     """🛑 시스템 종료 처리"""
@@ -65,18 +147,34 @@ def stop_program():
         os._exit(0)
     threading.Thread(target=delayed_exit, daemon=True).start()
 
-def send_shortcut(name, value=None, app=None):
-    """📡 TriCaster에 단축키 명령 전송 (GET 방식)"""
+def log_command_latency(name, audio_ts, app=None):
+    """⏱️ 발화(오디오 캡처 시각) → 스위처 명령 전송까지 걸린 시간 기록"""
+    if audio_ts is None:
+        return
+    msg = f"[LATENCY] {name}: 발화 → 전환 {(time.monotonic() - audio_ts) * 1000:.0f} ms"
+    print(msg)
+    if app:
+        app.log(msg)
+
+# 🔗 TriCaster 연결 재사용: 명령마다 새 TCP 연결을 맺지 않고 keep-alive 연결로 보낸다 (bench_jitter.py --dispatch로 비교)
+tricaster_session = requests.Session()
+
+def send_shortcut(name, value=None, app=None, audio_ts=None):
+    """📡 TriCaster에 단축키 명령 전송 (GET 방식)
+
+    audio_ts: 명령을 말한 오디오의 캡처 시각 (time.monotonic 기준, 지연 측정용)
+    """
     try:
         if value is not None:
-            response = requests.get(TRICASTER_URL, params={"name": name, "value": value}, timeout=1.5)
+            response = tricaster_session.get(TRICASTER_URL, params={"name": name, "value": value}, timeout=1.5)
             log_msg = f"[TRICASTER] {name} = {value} 명령 전송됨"
         else:
-            response = requests.get(TRICASTER_URL, params={"name": name}, timeout=1.5)
+            response = tricaster_session.get(TRICASTER_URL, params={"name": name}, timeout=1.5)
             log_msg = f"[TRICASTER] {name} 명령 전송됨"
         print(log_msg)
         if app:
             app.log(log_msg)
+        log_command_latency(name, audio_ts, app)
     except Exception as e:
         err = f"[TRICASTER ERROR] 명령 '{name}' 전송 실패: {e}"
         print(err)
@@ -121,24 +219,37 @@ def reset_stt_stream(app=None):
         app.set_status("🟢 STT 활성화", "green")
         app.log("[STT] 세션 재시작 완료. 명령어 인식을 다시 시작합니다.")
 
-def execute_command_if_ready(command, app=None):
-    """🎧 STT 결과 정규화 및 유효성 검사 후 실행"""
+def normalize_command(command):
+    """🔤 STT 결과를 명령어 형태로 정규화 (발음 보정 포함)"""
+    return command_grammar.normalize(command)
+
+def reduce_command(normalized_command):
+    """🎯 복합 명령 정리: "p1 cut"은 그대로, 그 밖의 여러 단어는 마지막 명령만 남긴다"""
+    return command_grammar.reduce(normalized_command)
+
+def is_valid_command(command):
+    return command_grammar.is_valid(command)
+
+def build_speech_contexts(app=None):
+    """📚 명령 문법에서 인식기 적응 문구(SpeechContext) 생성"""
+    hints = command_grammar.phrase_hints(SPEECH_BOOSTS)
+    contexts = [speech.SpeechContext(phrases=phrases, boost=boost) for phrases, boost in hints]
+    groups = ", ".join(f"{len(phrases)}개 x{boost:g}" for phrases, boost in hints)
+    msg = f"[ADAPT] 인식 적응 문구 {sum(len(phrases) for phrases, _ in hints)}개 ({groups})"
+    print(msg)
+    if app:
+        app.log(msg)
+    return contexts
+
+def execute_command_if_ready(command, app=None, audio_ts=None):
+    """🎧 STT 결과 정규화 및 유효성 검사 후 실행 (audio_ts: 해당 발화의 캡처 시각)"""
     global initialized, stt_ready, last_command, last_command_time
     now = time.time()
     if not command or command.strip() == "":
         return
 
     # 🔤 명령어 정규화
-    words = command.lower().split()
-    original_phrase = ' '.join(words)
-    normalized_command = PHONETIC_MAP.get(original_phrase, original_phrase)
-
-    if normalized_command == original_phrase:
-        normalized = [PHONETIC_MAP.get(w, w) for w in words]
-        normalized_command = ' '.join(normalized).strip()
-
-    if normalized_command.startswith("test"):
-        normalized_command = "test"
+    normalized_command = normalize_command(command)
 
     # ✅ 'test' 명령어 → STT 준비 완료 처리
     if normalized_command == "test":
@@ -163,11 +274,9 @@ def execute_command_if_ready(command, app=None):
         app.log(f"[DEBUG] 정규화 명령어: {normalized_command}")
 
     # 🎯 복합 명령어 처리: ex) "p1 cut"
-    tokens = normalized_command.split()
-    if len(tokens) == 2 and tokens[1] == "cut" and tokens[0] in TRICASTER_INPUT_MAP:
-        pass  # 그대로 유지
-    elif len(tokens) >= 2:
-        normalized_command = tokens[-1]
+    reduced_command = reduce_command(normalized_command)
+    if reduced_command != normalized_command:
+        normalized_command = reduced_command
         if app:
             app.log(f"[DEBUG] 복합 명령어 → 마지막 명령만 유지: '{normalized_command}'")
 
@@ -185,17 +294,18 @@ def execute_command_if_ready(command, app=None):
     last_command = normalized_command
     last_command_time = now
 
-    valid_cmds = list(TRICASTER_INPUT_MAP.keys()) + ["cut", "mix"]
-    if not (normalized_command in valid_cmds or normalized_command.endswith("cut")):
+    if not is_valid_command(normalized_command):
+        archive_command(f"? {normalized_command}", audio_ts, app)
         if app:
             app.log(f"[ERROR] 명령 '{normalized_command}' 인식 실패 → STT 리셋")
         reset_stt_stream(app)
         return
 
     # ✅ 실제 명령 실행
-    process_command(normalized_command, app)
+    archive_command(normalized_command, audio_ts, app)
+    process_command(normalized_command, app, audio_ts)
 
-def process_command(command, app=None):
+def process_command(command, app=None, audio_ts=None):
     """🚦 명령어 실행 로직: 소스 설정, 컷/믹스 전환 등"""
     global current_program, current_preview, first_input_received
     msg = f"[EXEC] 실행 명령어: {command}"
@@ -207,7 +317,7 @@ def process_command(command, app=None):
     if command in TRICASTER_INPUT_MAP:
         selected_input = TRICASTER_INPUT_MAP[command]
         current_preview = selected_input
-        send_shortcut("main_b_row_named_input", selected_input, app)
+        send_shortcut("main_b_row_named_input", selected_input, app, audio_ts)
 
         # 초기 상태 → Program도 동기화
         if not first_input_received:
@@ -228,7 +338,7 @@ def process_command(command, app=None):
             selected_input = TRICASTER_INPUT_MAP[cam_id]
 
             # ✅ PGM 직접 설정 (Preview 미사용)
-            send_shortcut("main_a_row_named_input", selected_input, app)
+            send_shortcut("main_a_row_named_input", selected_input, app, audio_ts)
             current_program = selected_input
 
             if app:
@@ -238,7 +348,7 @@ def process_command(command, app=None):
 
     # 🔁 일반 컷 명령 (Preview → Program)
     elif command == "cut":
-        send_shortcut("main_take", app=app)
+        send_shortcut("main_take", app=app, audio_ts=audio_ts)
         current_program = current_preview
 
         if app:
@@ -249,7 +359,7 @@ def process_command(command, app=None):
 
     # 🎞️ 믹스 명령
     elif command == "mix":
-        send_shortcut("main_auto", app=app)
+        send_shortcut("main_auto", app=app, audio_ts=audio_ts)
         current_program = current_preview
 
         if app:
@@ -274,6 +384,15 @@ class DashboardApp(ctk.CTk):
         self.preview_label = ctk.CTkLabel(self, text="PVW: input2", font=("Arial", 16))
         self.preview_label.pack(pady=5)
 
+        # 📶 입력 레벨 미터 (RMS 막대 + 피크/클리핑 표시)
+        self.level_bar = ctk.CTkProgressBar(self, width=400, progress_color="green")
+        self.level_bar.set(0)
+        self.level_bar.pack(pady=(5, 0))
+        self.level_label = ctk.CTkLabel(self, text="입력 레벨: -- dBFS", font=("Arial", 12))
+        self.level_label.pack()
+        self._level_source = None
+        self._clip_hold = 0
+
         self.log_box = tk.Text(self, height=15, bg="black", fg="white")
         self.log_box.pack(fill="both", expand=True, padx=10, pady=10)
 
@@ -292,100 +411,674 @@ class DashboardApp(ctk.CTk):
         self.log_box.insert(tk.END, f"{message}\n")
         self.log_box.see(tk.END)
 
+    def bind_push_to_talk(self, key, on_press, on_release):
+        """🎙️ 푸시투토크 키/페달 연결 (페달은 보통 키보드 키로 인식됨)"""
+        self.bind(f"<KeyPress-{key}>", lambda event: on_press())
+        self.bind(f"<KeyRelease-{key}>", lambda event: on_release())
+
+    def start_level_meter(self, level_source):
+        """📶 레벨 미터 시작: level_source()는 현재 캡처 소스의 InputLevel(없으면 None)을 돌려준다
+
+        캡처 프레임 길이와 상관없이 METER_INTERVAL_MS마다 한 번만 다시 그린다 (초당 약 30회).
+        """
+        self._level_source = level_source
+        self.after(METER_INTERVAL_MS, self._update_level_meter)
+
+    def _update_level_meter(self):
+        level = self._level_source() if self._level_source else None
+        if level is None:
+            self.level_bar.set(0)
+            self.level_label.configure(text="입력 레벨: 마이크 없음", text_color="gray")
+        else:
+            rms_db, peak_db, clipped = level.take()
+            if clipped:
+                self._clip_hold = METER_CLIP_HOLD_FRAMES
+            elif self._clip_hold:
+                self._clip_hold -= 1
+            fill = min(1.0, max(0.0, (rms_db - METER_FLOOR_DBFS) / -METER_FLOOR_DBFS))
+            if self._clip_hold:
+                color = "red"
+            elif rms_db < METER_DEAD_DBFS:
+                color = "gray"
+            else:
+                color = "green"
+            self.level_bar.configure(progress_color=color)
+            self.level_bar.set(fill)
+            text = f"입력 레벨: {rms_db:5.1f} dBFS / 피크 {peak_db:5.1f} dBFS"
+            if self._clip_hold:
+                text += "  ⚠️ 클리핑"
+            self.level_label.configure(text=text, text_color=color)
+        self.after(METER_INTERVAL_MS, self._update_level_meter)
+
+# 📶 입력 레벨 미터 설정
+METER_INTERVAL_MS = 33        # 화면 갱신 간격 (약 30 fps)
+METER_FLOOR_DBFS = -60.0      # 막대가 비는 레벨
+METER_DEAD_DBFS = -70.0       # 이보다 조용하면 마이크가 죽은 것으로 표시 (회색)
+METER_CLIP_HOLD_FRAMES = 30   # 클리핑 표시 유지 프레임 수 (약 1초)
+
 # 🎤 Google STT 스트리밍 설정
 RATE = 16000
 CHUNK = int(RATE / 10)
 
-class MicrophoneStream:
-    def __init__(self, rate, chunk):
-        self._rate = rate
-        self._chunk = chunk
-        self._buff = six_queue.Queue()
-        self.closed = True
-
-    def __enter__(self):
-        self._audio_interface = pyaudio.PyAudio()
-        self._audio_stream = self._audio_interface.open(
-            format=pyaudio.paInt16,
-            channels=1,
-            rate=self._rate,
-            input=True,
-            frames_per_buffer=self._chunk,
-            stream_callback=self._fill_buffer,
-        )
-        self.closed = False
-        return self
-
-    def __exit__(self, type, value, traceback):
-        self._audio_stream.stop_stream()
-        self._audio_stream.close()
-        self.closed = True
-        self._buff.put(None)
-        self._audio_interface.terminate()
-
-    def _fill_buffer(self, in_data, frame_count, time_info, status_flags):
-        self._buff.put(in_data)
-        return None, pyaudio.paContinue
-
-    def generator(self):
-        while not self.closed:
-            chunk = self._buff.get()
-            if chunk is None:
+# 🎧 오디오 소스: "mic" / "mic:2"(입력 장치 번호) / "file:녹음.wav" / "tone:440" / "noise:0.1"
+# 리눅스 저지연 캡처: "alsa" / "alsa:hw:1,0"(ALSA 직접, pyalsaaudio) / "pipewire" / "pipewire:노드"(pw-record)
+# 여러 개를 지정하면 소스마다 인식 스트림을 따로 열고, 결과는 하나의 명령 버스로 합친다
+AUDIO_SOURCES = ["mic"]
+CROSS_MIC_DEDUP_S = 1.0   # 다른 마이크에서 이 시간 안에 들어온 같은 명령은 한 번만 실행
+PERSISTENT_CAPTURE = True # 마이크를 계속 열어두고 STT 세션만 붙였다 뗌 (재시작 시 오디오 유실 방지)
+# 🔌 마이크가 빠지면 같은 장치를 다시 찾고, 없으면 아래 백업 장치(이름 또는 번호)를 순서대로 연다
+CAPTURE_BACKUP_DEVICES = []
+AUDIO_REPLAY_SPEED = 1.0  # 파일/합성 소스 재생 배속 (None = 받아가는 만큼 최대 속도)
+
+# 🎚️ 마이크 캡처 샘플레이트: None = RATE로 직접 열기(OS 리샘플링) / "native" = 장치 기본값 / 48000 등
+# RATE와 다르면 캡처 콜백에서 폴리페이즈 필터로 RATE까지 변환한다 (48 kHz 전용 USB/Dante 장치용)
+CAPTURE_RATE = None
+
+# 🎯 다채널 어레이 마이크: 캡슐 위치(미터, 어레이 중심 기준)와 감독석 위치로 지연-합 빔포밍한 모노를 인식기에 보냄
+# None이면 기존처럼 모노 1채널 캡처. 장치 채널이 모자라면 자동으로 모노로 연다
+# 예 (책상 위 4채널 원형 어레이, 감독석이 어레이 정면 0.6 m):
+#   MIC_ARRAY = {"positions": [(0.032, 0), (0, 0.032), (-0.032, 0), (0, -0.032)],
+#                "target": (0.6, 0.0, 0.3), "channels": [1, 2, 3, 4], "device_channels": 6}
+MIC_ARRAY = None
+BEAM_BUDGET = 0.1         # 빔포머 처리 시간 한도 (청크 길이 대비, 넘으면 정수 지연 → 단일 캡슐로 낮춤)
+
+def mic_capture_options():
+    """🎤 마이크 소스 공통 옵션 (캡처 샘플레이트, 어레이 빔포밍)"""
+    options = {"device_rate": CAPTURE_RATE}
+    if MIC_ARRAY:
+        options.update(mic_array=MicArray(**MIC_ARRAY), beam_budget=BEAM_BUDGET)
+    return options
+
+# 📡 공유 메모리 오디오 버스: 마이크 오디오를 한 번만 써넣고 인식기/녹음기/레벨 미터가 각자 커서로 읽음
+# 다른 프로세스(키워드 검출기 등)는 open_source("bus:tc_audio_bus_0", ...)으로 같은 오디오를 읽는다
+AUDIO_BUS_ENABLED = False
+AUDIO_BUS_NAME = "tc_audio_bus"
+AUDIO_BUS_SECONDS = 10
+
+# 🗄️ 롤링 오디오 아카이브: 최근 ARCHIVE_HOURS 시간의 마이크 오디오를 디스크에 보관 (오디오 버스 필요)
+# 실행된 명령마다 [ARCHIVE] 로그에 시각이 남으며, archive_tool.py export로 해당 구간을 바로 꺼낼 수 있다
+# 녹음 + 디스크 사용(마이크당 약 460 MB)이라 켤 때만 동작: AUDIO_BUS_ENABLED와 함께 True로
+ARCHIVE_ENABLED = False
+ARCHIVE_DIR = "audio_archive"   # 상대 경로면 APP_DATA_DIR 아래 (실행한 폴더가 아님)
+APP_DATA_DIR = os.path.join(os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_DATA_HOME")
+                            or os.path.expanduser("~/.local/share"), "TC_AudioCommand")
+ARCHIVE_HOURS = 4
+
+# 아카이브는 상시 열어둔 마이크의 오디오 버스를 읽는다 → 버스 없이 켜면 아무것도 녹음되지 않으므로 시작 전에 알림
+if ARCHIVE_ENABLED and not (AUDIO_BUS_ENABLED and PERSISTENT_CAPTURE):
+    raise ValueError("ARCHIVE_ENABLED에는 AUDIO_BUS_ENABLED = True, PERSISTENT_CAPTURE = True가 필요합니다")
+
+# ⚡ 저지연 모드: 10/20/40 ms 캡처 프레임, 요청은 REQUEST_MS 단위로 재구성해 실시간 속도로 전송
+LOW_LATENCY_MODE = False
+FRAME_MS = 20
+REQUEST_MS = 40 if LOW_LATENCY_MODE else 100
+
+if LOW_LATENCY_MODE:
+    if FRAME_MS not in LOW_LATENCY_FRAME_MS:
+        raise ValueError(f"FRAME_MS는 {LOW_LATENCY_FRAME_MS} 중 하나여야 합니다: {FRAME_MS}")
+    CHUNK = chunk_size(RATE, FRAME_MS)
+
+# 🗜️ 업링크 코덱: "LINEAR16"(무압축, 256 kbit/s) / "FLAC"(무손실) / "OGG_OPUS"(손실, 최소 대역폭)
+UPLINK_CODEC = "LINEAR16"
+
+uplink_error = None       # 인코더가 한 번 실패하면 이후 세션은 무압축으로
+
+def uplink_codec(engine):
+    """🗜️ 실제로 쓸 업링크 코덱 (로컬 엔진은 압축 없이 PCM을 그대로 받는다)"""
+    if engine != "google" or uplink_error is not None:
+        return "LINEAR16"
+    return UPLINK_CODEC
+
+def note_uplink_error(encoder, app=None):
+    """⚠️ 업링크 인코더 실패 기록 → 원본 PCM으로 전환 (처음 한 번만 로그)"""
+    global uplink_error
+    if encoder.error is None or uplink_error is not None:
+        return
+    uplink_error = encoder.error
+    msg = f"[UPLINK] {UPLINK_CODEC} 인코더 오류 → LINEAR16(무압축)으로 전환: {encoder.error!r}"
+    print(msg)
+    if app:
+        app.log(msg)
+
+def log_uplink_summary(encoder, app=None):
+    """📊 압축 업링크 전송량 및 인코더 CPU 사용량 보고"""
+    ratio = encoder.output_bytes / max(encoder.input_bytes, 1)
+    msg = (f"[UPLINK] {encoder.codec}: 원본 {encoder.input_bytes / 1024:.0f} KB → "
+           f"전송 {encoder.output_bytes / 1024:.0f} KB ({ratio:.0%}), 인코더 CPU {encoder.cpu_seconds:.2f}초")
+    print(msg)
+    if app:
+        app.log(msg)
+
+# ⏳ 지연 오디오 폐기: 캡처된 지 MAX_AUDIO_AGE_S 초가 지난 오디오는 인식기에 보내지 않음
+MAX_AUDIO_AGE_S = 1.0
+stale_audio_drops = 0
+
+def warn_stale_audio(seconds, app=None):
+    """⚠️ 지연 오디오 폐기 경고 (늦게 실행되는 명령 방지)"""
+    global stale_audio_drops
+    stale_audio_drops += 1
+    msg = f"[WARN] 지연 오디오 {seconds:.2f}초 폐기됨 (누적 {stale_audio_drops}회)"
+    print(msg)
+    if app:
+        app.log(msg)
+
+# 🎛️ DSP 전처리 (VAD 앞단): 고역 통과 → 스펙트럼 잡음 제거 → 자동 이득 조절
+DSP_ENABLED = False
+DSP_HIGHPASS_HZ = 100         # HVAC 럼블 제거 기준 주파수
+DSP_NOISE_SUPPRESSION = True  # PA 블리드 등 정상 잡음 제거
+DSP_AGC_TARGET_DBFS = -20     # 자동 이득 목표 레벨
+
+def build_dsp_chain():
+    """⛓️ 설정에 따라 전처리 체인 구성"""
+    stages = [HighPassFilter(RATE, cutoff_hz=DSP_HIGHPASS_HZ)]
+    if DSP_NOISE_SUPPRESSION:
+        stages.append(SpectralSubtraction(RATE))
+    stages.append(AutomaticGainControl(RATE, target_dbfs=DSP_AGC_TARGET_DBFS))
+    return DspChain(RATE, stages)
+
+def log_dsp_summary(dsp, app=None):
+    """📊 전처리 단계별 처리 시간 보고 (프레임 길이 대비 여유 확인용)"""
+    msg = f"[DSP] {dsp.timing_report()}"
+    print(msg)
+    if app:
+        app.log(msg)
+
+# 🗣️ 음성 구간 검출(VAD) 설정: 무음 구간은 Google로 보내지 않음
+VAD_ENABLED = True
+VAD_PRE_ROLL_MS = 300     # 게이트가 열릴 때 앞에 붙이는 오디오 길이
+VAD_HANGOVER_MS = 500     # 음성이 끝난 뒤에도 계속 보내는 길이
+
+# 🎙️ 푸시투토크 모드: PTT_KEY(또는 같은 키를 보내는 풋 페달)를 누르고 있는 동안만 인식기로 전송
+# 누르기 직전 PTT_PRE_ROLL_MS 만큼의 오디오를 앞에 붙이고, 떼면 요청 스트림을 닫아 최종 결과를 바로 받는다
+PTT_MODE = False
+PTT_KEY = "F9"
+PTT_PRE_ROLL_MS = 300
+PTT_DEBOUNCE_MS = 80      # 키 자동 반복으로 생기는 짧은 뗌은 무시
+ptt_gate = PushToTalkGate(RATE, pre_roll_ms=PTT_PRE_ROLL_MS, debounce_ms=PTT_DEBOUNCE_MS)
+
+def ptt_pressed(app=None):
+    """🔴 푸시투토크 누름"""
+    if not ptt_gate.active and app:
+        app.set_status("🔴 송출 중 (푸시투토크)", "red")
+    ptt_gate.press()
+
+def ptt_released(app=None):
+    """⚪ 푸시투토크 뗌"""
+    ptt_gate.release()
+    if app and stt_ready:
+        app.set_status("🟢 STT 대기 (푸시투토크)", "green")
+
+def log_vad_summary(vad, app=None):
+    """📊 VAD로 억제된 무음 길이 보고"""
+    msg = f"[VAD] 무음 억제 {vad.suppressed_seconds:.1f}초 / 전송 {vad.forwarded_seconds:.1f}초"
+    print(msg)
+    if app:
+        app.log(msg)
+
+def log_device_event(event, info, app=None):
+    """🔌 캡처 장치 끊김/복구 알림 (인식 세션은 그대로 유지됨)"""
+    if event == "lost":
+        msg = f"[DEVICE] 마이크 '{info['device']}' 끊김 감지 (누적 {info['losses']}회) → 백그라운드 재연결 중"
+        if app:
+            app.set_status("🟠 마이크 재연결 중...", "orange")
+    else:
+        kind = "백업 장치" if info["backup"] else "같은 장치"
+        msg = f"[DEVICE] {kind} '{info['device']}'로 복구됨 (복구 시간 {info['recovery']:.2f}초)"
+        if app and stt_ready:
+            app.set_status("🟢 STT 활성화", "green")
+    print(msg)
+    if app:
+        app.log(msg)
+
+def log_capture_summary(stream, app=None):
+    """📊 캡처 경로 계측: PortAudio 오버플로/언더플로, 버퍼 깊이, ADC → 콜백 지연"""
+    stats = stream.capture_stats()
+    backend = f"{stats['backend']} " if "backend" in stats else ""
+    msg = (f"[CAPTURE] {backend}입력 오버플로 {stats['input_overflows']}회 / 언더플로 {stats['input_underflows']}회, "
+           f"링버퍼 유실 {stats['dropped_seconds']:.2f}초, 버퍼 {stats['buffered_seconds'] * 1000:.0f} ms "
+           f"(최대 {stats['peak_buffered_seconds'] * 1000:.0f} ms)")
+    if stats["max_adc_latency"] is not None:
+        msg += f", ADC→콜백 최대 {stats['max_adc_latency'] * 1000:.1f} ms"
+    if stats.get("device_losses"):
+        msg += (f", 장치 끊김 {stats['device_losses']}회 (복구 최대 {stats['max_recovery'] or 0:.2f}초)")
+    if "beam_mode" in stats:
+        msg += f", 빔포밍 {stats['beam_mode']}"
+        if "beam_avg" in stats:
+            msg += (f" {stats['beam_channels']}채널 평균 {stats['beam_avg'] * 1000:.2f} ms / "
+                    f"최대 {stats['beam_max'] * 1000:.2f} ms (부하 {stats['beam_load']:.1%}, "
+                    f"단계 하향 {stats['beam_degradations']}회)")
+    if "resample_avg" in stats:
+        msg += (f", 리샘플 {stats['capture_rate']}→{RATE} Hz 평균 {stats['resample_avg'] * 1000:.2f} ms / "
+                f"최대 {stats['resample_max'] * 1000:.2f} ms (부하 {stats['resample_load']:.1%})")
+    print(msg)
+    if app:
+        app.log(msg)
+
+def result_audio_time(result, timeline, stream):
+    """⏱️ 인식 결과 끝 위치(result_end_time)의 캡처 시각, 없으면 마지막으로 보낸 오디오 시각"""
+    end_time = getattr(result, "result_end_time", None)
+    audio_ts = timeline.captured_at(end_time.total_seconds()) if end_time else None
+    return audio_ts if audio_ts is not None else stream.last_captured_at
+
+# ⚡ 중간 결과 빠른 실행 (선택): 안정된 중간 결과가 명령으로 해석되면 최종 결과(끝점 검출)를 기다리지 않고 실행
+# 최종 결과가 오면 맞춰 보고, 다르면 다시 실행하지 않고 [DIVERGE]로 기록한다
+INTERIM_FAST_PATH = False
+INTERIM_STABILITY = 0.8   # 이 안정도 이상인 중간 결과만 사용 (Google stability 0~1)
+
+def fast_path_enabled():
+    """⚡ 중간 결과 빠른 실행 사용 여부 (헤징 중에는 엔진 경주가 같은 역할을 하므로 끈다)"""
+    return INTERIM_FAST_PATH and len(active_engines()) == 1
+
+def command_key(transcript):
+    """🔑 인식 결과 → 실행될 명령 (중간/최종 결과 비교용)"""
+    return command_grammar.key(transcript)
+
+def fast_path_command(transcript):
+    """⚡ 중간 결과로 바로 실행해도 되는 명령, 아니면 None
+
+    입력 선택("p1")은 뒤에 "cut"이 붙어 다른 명령("p1 cut")이 될 수 있으므로 최종 결과를 기다린다.
+    """
+    command = command_key(transcript)
+    if command == "test" or command in TRICASTER_INPUT_MAP or not is_valid_command(command):
+        return None
+    return command
+
+def log_fast_path_summary(fast_path, app=None):
+    """📊 중간 결과 빠른 실행 현황"""
+    lead = fast_path.lead_seconds
+    msg = (f"[FAST] 먼저 실행 {fast_path.fired}건, 최종 결과 일치 {fast_path.confirmed}건, "
+           f"불일치 {fast_path.diverged}건")
+    if lead:
+        msg += f", 최종 결과보다 평균 {sum(lead) / len(lead) * 1000:.0f} ms 먼저 실행"
+    print(msg)
+    if app:
+        app.log(msg)
+
+# 🔇 자체 음성 에코 차단: TTS 재생 시각에 캡처된 오디오는 무음으로 바꾸고, 그 시각의 인식 결과는 버림
+ECHO_GATE_ENABLED = True
+ECHO_TAIL_MS = 400        # 재생이 끝난 뒤에도 막는 시간 (출력 버퍼 지연 + 잔향)
+echo_gate = EchoGate(RATE, tail_ms=ECHO_TAIL_MS)
+echo_transcripts_dropped = 0
+
+def handle_transcript(transcript, audio_ts, app=None):
+    """🚌 명령 버스 처리기: 자체 안내 음성을 인식한 결과는 실행하지 않는다 (STT 리셋 방지)"""
+    global echo_transcripts_dropped
+    if ECHO_GATE_ENABLED and echo_gate.is_echo(audio_ts):
+        echo_transcripts_dropped += 1
+        msg = (f"[ECHO] 안내 음성 재생 중 인식 결과 무시: '{transcript}' "
+               f"(리셋 회피 누적 {echo_transcripts_dropped}회)")
+        print(msg)
+        if app:
+            app.log(msg)
+        return
+    execute_command_if_ready(transcript, app, audio_ts)
+
+def log_echo_summary(app=None):
+    """📊 자체 음성 차단 현황"""
+    msg = (f"[ECHO] 안내 음성 {echo_gate.playbacks}회, 차단 오디오 {echo_gate.gated_seconds:.1f}초, "
+           f"무시한 인식 결과 {echo_transcripts_dropped}건")
+    print(msg)
+    if app:
+        app.log(msg)
+
+def current_input_level():
+    """📶 레벨 미터에 표시할 입력: 첫 번째 오디오 소스의 캡처 레벨"""
+    for sources in (list(capture_devices.values()), list(active_sources)):
+        for source in sources:
+            return source.level
+    return None
+
+command_bus = None
+active_sources = []   # 현재 열려 있는 오디오 소스 (세션 종료 시 닫기 위함)
+capture_devices = {}  # 소스 설정 → 계속 열려 있는 캡처 장치
+audio_buses = {}      # 소스 설정 → 그 장치가 써넣는 공유 메모리 오디오 버스
+archive_recorders = {}  # 소스 설정 → 오디오 버스를 따라가며 디스크에 기록하는 아카이브
+
+def archive_root():
+    """📁 아카이브 최상위 폴더 (절대 경로가 아니면 APP_DATA_DIR 기준)"""
+    return os.path.join(APP_DATA_DIR, os.path.expanduser(ARCHIVE_DIR))
+
+def start_archive(spec, bus, app=None):
+    """🗄️ 버스를 읽는 아카이브 기록 쓰레드 시작 (캡처 경로에는 쓰기 비용이 없음)"""
+    directory = os.path.join(archive_root(), f"mic{AUDIO_SOURCES.index(spec)}")
+    archive = AudioArchive(directory, RATE, retain_hours=ARCHIVE_HOURS)
+    archive_recorders[spec] = ArchiveRecorder(archive, BusSource(bus)).start()
+    msg = f"[ARCHIVE] {directory}에 최근 {ARCHIVE_HOURS}시간 오디오 보관 시작"
+    print(msg)
+    if app:
+        app.log(msg)
+
+def archive_command(label, audio_ts, app=None):
+    """📌 명령을 아카이브에 표시하고, 해당 오디오를 꺼내는 방법을 로그로 남긴다"""
+    if audio_ts is None:
+        return
+    for recorder in archive_recorders.values():
+        archive = recorder.archive
+        wall = archive.mark(label, audio_ts)
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(wall)) + f".{int(wall * 1000) % 1000:03d}"
+        msg = f'[ARCHIVE] \'{label}\' 오디오: python archive_tool.py export "{archive.directory}" "{stamp}"'
+        print(msg)
+        if app:
+            app.log(msg)
+
+def create_audio_bus(spec, app=None):
+    """📡 마이크 하나에 대한 공유 메모리 버스 생성 (이전 실행이 남긴 같은 이름의 버스는 지우고 새로 만듦)"""
+    name = f"{AUDIO_BUS_NAME}_{AUDIO_SOURCES.index(spec)}"
+    try:
+        bus = SharedAudioBus(RATE, CHUNK, seconds=AUDIO_BUS_SECONDS, name=name)
+    except FileExistsError:
+        SharedAudioBus.attach(name, owner=True).release()
+        bus = SharedAudioBus(RATE, CHUNK, seconds=AUDIO_BUS_SECONDS, name=name)
+    audio_buses[spec] = bus
+    msg = f"[BUS] 오디오 버스 '{bus.name}' 생성 ({spec}, {AUDIO_BUS_SECONDS}초)"
+    print(msg)
+    if app:
+        app.log(msg)
+    return bus
+
+def open_recognition_source(spec, app=None):
+    """🎧 인식 세션용 오디오 소스: 마이크는 열어둔 장치에 세션만 붙인다"""
+    on_stale = lambda seconds: warn_stale_audio(seconds, app)
+    is_mic = spec.partition(":")[0] == "mic"
+    if PERSISTENT_CAPTURE and is_mic:
+        device = capture_devices.get(spec)
+        if device is None:
+            bus = create_audio_bus(spec, app) if AUDIO_BUS_ENABLED else None
+            if bus and ARCHIVE_ENABLED:
+                start_archive(spec, bus, app)
+            device = open_source(spec, RATE, CHUNK, persistent=True, bus=bus,
+                                 backup_devices=CAPTURE_BACKUP_DEVICES, thread_hook=thread_tuner("audio", app),
+                                 on_device_event=lambda event, info: log_device_event(event, info, app),
+                                 **mic_capture_options()).start()
+            capture_devices[spec] = device
+        return device.attach(max_age=MAX_AUDIO_AGE_S, on_stale=on_stale)
+    is_capture = spec.partition(":")[0] in ("mic", "alsa", "pipewire")
+    mic_options = mic_capture_options() if is_capture else {}
+    return open_source(spec, RATE, CHUNK, speed=AUDIO_REPLAY_SPEED, max_age=MAX_AUDIO_AGE_S,
+                       on_stale=on_stale, thread_hook=thread_tuner("audio", app), **mic_options)
+
+# 🔄 끊김 없는 세션 교대: Google 스트리밍 인식은 스트림 하나가 약 5분(305초)으로 제한된다
+# 한도 전에 다음 스트림을 미리 열어 두 스트림에 같은 오디오를 보내고, 발화 경계에서 넘긴다 (교대 중 명령 유실 없음)
+# 겹치는 동안은 두 스트림 분량이 과금된다 (5분마다 ROTATION_OVERLAP_S 이하)
+SESSION_ROTATION = True
+STREAM_LIMIT_S = 290          # 이 시간 안에 다음 스트림으로 넘긴다 (발화 경계가 없으면 이 시점에 넘김)
+ROTATION_OVERLAP_S = 15       # 한도 전 이 시간부터 다음 스트림을 열어 겹쳐 보낸다
+ROTATION_PRE_ROLL_S = 1.0     # 다음 스트림은 이만큼 앞선 오디오부터 받는다 (진행 중인 발화의 앞부분 포함)
+ROTATION_DEDUP_S = 0.5        # 경계 직후 이 시간 안에 끝난 새 스트림 결과는 이전 스트림과 같은 발화로 보고 버린다
+
+ROTATION_REASONS = {"utterance": "발화 경계", "limit": "시간 한도", "error": "이전 스트림 끊김"}
+
+def log_rotation(info, mic_id, app=None):
+    """🔄 스트림 교대 기록"""
+    msg = (f"[ROTATE] mic{mic_id} 스트림 #{info['from']} → #{info['to']} ({ROTATION_REASONS[info['reason']]}), "
+           f"겹침 {info['overlap']:.1f}초, 오디오 공백 {info['gap'] * 1000:.0f} ms")
+    print(msg)
+    if app:
+        app.log(msg)
+
+def log_rotation_summary(rotator, mic_id, app=None):
+    """📊 세션 교대 현황"""
+    if not rotator.rotations:
+        return
+    reasons = [info["reason"] for info in rotator.rotations]
+    msg = (f"[ROTATE] mic{mic_id} 교대 {len(reasons)}회 (발화 경계 {reasons.count('utterance')}회), "
+           f"중복 결과 제거 {rotator.arbiter.duplicates}건, "
+           f"최대 오디오 공백 {max(info['gap'] for info in rotator.rotations) * 1000:.0f} ms")
+    print(msg)
+    if app:
+        app.log(msg)
+
+def streaming_config_for(engine):
+    """⚙️ 엔진별 스트리밍 인식 설정 (적응 문구는 Google만, 로컬 엔진은 문법 자체가 제한)"""
+    config = speech.RecognitionConfig(
+        encoding=speech.RecognitionConfig.AudioEncoding[uplink_codec(engine)],
+        sample_rate_hertz=RATE,
+        language_code="en-US",
+        speech_contexts=speech_contexts if engine == "google" else []
+    )
+    return speech.StreamingRecognitionConfig(
+        config=config,
+        interim_results=fast_path_enabled()
+    )
+
+def run_stream(client, engine, chunks, audio, realtime, mic_id, app=None, on_final=None, can_fast_path=None):
+    """📡 streaming_recognize 스트림 하나: 전처리된 오디오 → 요청 → 최종 결과마다 on_final(transcript, audio_ts, confidence)
+
+    audio: 청크를 꺼내는 쪽 (last_captured_at으로 캡처 시각을 읽는다)
+    중간 결과로 먼저 실행된 발화는 transcript=None으로 알린다 (실행하지 않고 발화 경계로만 쓰임).
+    can_fast_path(audio_ts)가 거짓이면 중간 결과로 먼저 실행하지 않는다 (교대 중 다른 스트림 몫).
+    """
+    fast_path = None
+    if fast_path_enabled():
+        fast_path = InterimFastPath(fast_path_command, key=command_key, stability=INTERIM_STABILITY)
+    label = f"mic{mic_id}" if len(active_engines()) == 1 else f"mic{mic_id} {engine}"
+    # 🕰️ 전송 위치 ↔ 캡처 시각 기록 (VAD로 억제된 구간 보정)
+    timeline = AudioTimeline(RATE)
+    audio_generator = timeline.track(chunks, lambda: audio.last_captured_at)
+    audio_generator = frame_requests(audio_generator, RATE, target_ms=REQUEST_MS, pace=realtime)
+    encoder = None
+    if uplink_codec(engine) != "LINEAR16":
+        encoder = UplinkEncoder(RATE, uplink_codec(engine))
+        # 코덱을 열 수 없으면 인코더는 PCM을 그대로 넘긴다 → 아래 요청 설정도 LINEAR16으로
+        note_uplink_error(encoder, app)
+        audio_generator = encoder.encode(audio_generator)
+    requests_gen = (speech.StreamingRecognizeRequest(audio_content=bytes(content)) for content in audio_generator)
+
+    try:
+        responses = client.streaming_recognize(streaming_config_for(engine), requests_gen)
+        for response in responses:
+            if should_stop or stt_stop_event.is_set():
+                break
+            if fast_path and response.results and not response.results[0].is_final:
+                audio_ts = result_audio_time(response.results[0], timeline, audio)
+                if can_fast_path and not can_fast_path(audio_ts):
+                    continue
+                command = fast_path.interim([(r.alternatives[0].transcript, r.stability)
+                                             for r in response.results if r.alternatives])
+                if command:
+                    msg = f"[FAST] {label} 중간 결과로 먼저 실행: {command}"
+                    print(msg)
+                    if app:
+                        app.log(msg)
+                    command_bus.post(mic_id, command, audio_ts)
+                continue
+            for result in response.results:
+                if result.is_final:
+                    transcript = result.alternatives[0].transcript.strip()
+                    confidence = result.alternatives[0].confidence
+                    print(f"🎧 [STT {label}] 인식 결과: {transcript}")
+                    if app:
+                        app.log(f"🎧 [{label}] 인식: {transcript}")
+                    audio_ts = result_audio_time(result, timeline, audio)
+                    if fast_path:
+                        status, fired, final_command, lead = fast_path.final(transcript)
+                        if status == "confirmed":
+                            msg = f"[FAST] 최종 결과 일치: {fired} ({lead * 1000:.0f} ms 먼저 실행됨)"
+                        elif status == "diverged":
+                            msg = f"[DIVERGE] 먼저 실행: {fired} / 최종 결과: {final_command} → 다시 실행하지 않음"
+                            archive_command(f"! {fired} -> {final_command}", audio_ts, app)
+                        if status != "execute":
+                            print(msg)
+                            if app:
+                                app.log(msg)
+                            on_final(None, audio_ts, confidence)
+                            continue
+                    on_final(transcript, audio_ts, confidence)
+    finally:
+        if encoder:
+            note_uplink_error(encoder, app)
+            log_uplink_summary(encoder, app)
+        if fast_path:
+            log_fast_path_summary(fast_path, app)
+
+def run_rotating_streams(client, engine, chunks, audio, realtime, mic_id, app=None, on_final=None):
+    """🔄 세션 교대 모드: 같은 오디오를 스트림들에 나눠 보내면서 한도 전에 다음 스트림으로 넘긴다"""
+    fanout = AudioFanout(chunks, RATE, lambda: audio.last_captured_at,
+                         history_s=ROTATION_PRE_ROLL_S).start()
+    rotator = None
+
+    def run_session(sid, reader):
+        if REALTIME_TUNING:
+            log_thread_tuning(tune_current_thread("stt", REALTIME_CPUS.get("stt")), app)
+        offer = lambda transcript, audio_ts, confidence: rotator.offer(
+            sid, audio_ts, transcript and (transcript, audio_ts, confidence))
+        run_stream(client, engine, reader.generator(), reader, realtime, mic_id, app,
+                   on_final=offer, can_fast_path=lambda audio_ts: rotator.accepts(sid, audio_ts))
+
+    rotator = SessionRotator(fanout, run_session, post=lambda item: on_final(*item),
+                             limit_s=STREAM_LIMIT_S, overlap_s=ROTATION_OVERLAP_S,
+                             pre_roll_s=ROTATION_PRE_ROLL_S, tolerance=ROTATION_DEDUP_S,
+                             on_rotate=lambda info: log_rotation(info, mic_id, app))
+    try:
+        rotator.run(lambda: should_stop or stt_stop_event.is_set())
+    finally:
+        log_rotation_summary(rotator, mic_id, app)
+    if fanout.error:
+        raise fanout.error
+
+def run_engine(engine, client, chunks, audio, realtime, mic_id, app=None, on_final=None):
+    """🧩 인식 엔진 하나로 인식 (Google은 스트림 길이 제한이 있어 세션 교대, 로컬 엔진은 스트림 하나)"""
+    if SESSION_ROTATION and engine == "google":
+        run_rotating_streams(client, engine, chunks, audio, realtime, mic_id, app, on_final=on_final)
+    else:
+        run_stream(client, engine, chunks, audio, realtime, mic_id, app, on_final=on_final)
+
+def hedge_acceptable(transcript):
+    """✅ 헤징에서 채택할 수 있는 결과: 유효한 명령이나 준비 확인("test")으로 해석되는 것"""
+    command = command_key(transcript)
+    return command == "test" or is_valid_command(command)
+
+def log_hedge_summary(arbiter, hedge, mic_id, app=None):
+    """📊 엔진별 채택 비율과 지연 (헤징 결과 vs 엔진 단독)"""
+    def percentiles(values):
+        if not values:
+            return "-"
+        ordered = sorted(values)
+        p50 = ordered[len(ordered) // 2]
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return f"p50 {p50 * 1000:.0f} / p95 {p95 * 1000:.0f} ms"
+
+    rates = arbiter.win_rates()
+    for engine, stats in arbiter.stats.items():
+        msg = (f"[HEDGE] mic{mic_id} {engine}: 채택 {stats['wins']}건 ({rates[engine]:.0%}), "
+               f"기준 미달 {stats['rejected']}건, 늦음 {stats['late']}건, 지연 {percentiles(stats['latencies'])}, "
+               f"재연결 {hedge.restarts[engine]}회")
+        print(msg)
+        if app:
+            app.log(msg)
+    msg = f"[HEDGE] mic{mic_id} 헤징 결과 지연 {percentiles(arbiter.latencies)}"
+    print(msg)
+    if app:
+        app.log(msg)
+
+def run_hedged(clients, chunks, stream, mic_id, app=None):
+    """🏁 헤징 모드: 같은 오디오를 모든 엔진에 보내고, 발화마다 먼저 채택된 결과만 명령 버스로 보낸다"""
+    fanout = AudioFanout(chunks, RATE, lambda: stream.last_captured_at).start()
+    arbiter = HedgeArbiter(HEDGE_ENGINES, hedge_acceptable, window=HEDGE_WINDOW_S)
+
+    def run_engine_session(engine, reader):
+        if REALTIME_TUNING:
+            log_thread_tuning(tune_current_thread("stt", REALTIME_CPUS.get("stt")), app)
+
+        def on_final(transcript, audio_ts, confidence):
+            if transcript and arbiter.offer(engine, transcript, confidence, audio_ts):
+                msg = f"[HEDGE] mic{mic_id} {engine} 결과 채택: {transcript} (신뢰도 {confidence or 0.0:.2f})"
+                print(msg)
+                if app:
+                    app.log(msg)
+                command_bus.post(mic_id, transcript, audio_ts)
+
+        run_engine(engine, clients[engine], reader.generator(), reader, stream.realtime, mic_id, app,
+                   on_final=on_final)
+
+    def on_error(engine, error):
+        msg = f"[HEDGE] mic{mic_id} {engine} 엔진 끊김: {error} → {HEDGE_RETRY_S:g}초 뒤 다시 연결 (다른 엔진은 계속)"
+        print(msg)
+        if app:
+            app.log(msg)
+
+    hedge = HedgedRecognizer(fanout, clients, run_engine_session, retry_s=HEDGE_RETRY_S, on_error=on_error)
+    try:
+        hedge.run(lambda: should_stop or stt_stop_event.is_set())
+    finally:
+        log_hedge_summary(arbiter, hedge, mic_id, app)
+    if fanout.error:
+        raise fanout.error
+
+def run_recognition(clients, spec, mic_id, app=None):
+    """🎧 오디오 소스 하나에 대한 STT 세션: 인식 결과는 명령 버스로 전달 (clients: 엔진 이름 → 인식 클라이언트)"""
+    with open_recognition_source(spec, app) as stream:
+        if PTT_MODE:
+            # 🎙️ 키를 누를 때까지 스트림을 열지 않는다 (그동안 장치는 계속 버퍼링)
+            if not ptt_gate.wait_for_press(lambda: should_stop or stt_stop_event.is_set()):
                 return
-            data = [chunk]
-            while True:
-                try:
-                    chunk = self._buff.get(block=False)
-                    if chunk is None:
-                        return
-                    data.append(chunk)
-                except six_queue.Empty:
-                    break
-            yield b"".join(data)
+        active_sources.append(stream)
+        audio_generator = stream.generator()
+        if ECHO_GATE_ENABLED:
+            audio_generator = echo_gate.filter(audio_generator, lambda: stream.last_captured_at)
+        dsp = None
+        if DSP_ENABLED:
+            dsp = build_dsp_chain()
+            audio_generator = dsp.filter(audio_generator)
+        if PTT_MODE:
+            audio_generator = ptt_gate.filter(audio_generator, lambda: stream.last_captured_at)
+        vad = None
+        if VAD_ENABLED and not PTT_MODE:
+            vad = VoiceActivityGate(RATE, pre_roll_ms=VAD_PRE_ROLL_MS, hangover_ms=VAD_HANGOVER_MS)
+            audio_generator = vad.filter(audio_generator)
+
+        try:
+            if len(clients) > 1:
+                run_hedged(clients, audio_generator, stream, mic_id, app)
+            else:
+                engine, client = next(iter(clients.items()))
+                post = lambda transcript, audio_ts, confidence: (
+                    transcript and command_bus.post(mic_id, transcript, audio_ts))
+                run_engine(engine, client, audio_generator, stream, stream.realtime, mic_id, app, on_final=post)
+        finally:
+            active_sources.remove(stream)
+            log_capture_summary(stream, app)
+            if ECHO_GATE_ENABLED:
+                log_echo_summary(app)
+            if dsp:
+                log_dsp_summary(dsp, app)
+            if vad:
+                log_vad_summary(vad, app)
+
+def run_recognition_loop(clients, spec, mic_id, app=None):
+    """🔁 마이크별 인식 루프: 예외가 나면 해당 마이크의 세션만 다시 연다"""
+    if REALTIME_TUNING:
+        log_thread_tuning(tune_current_thread("stt", REALTIME_CPUS.get("stt")), app)
+    while not (should_stop or stt_stop_event.is_set()):
+        try:
+            run_recognition(clients, spec, mic_id, app)
+        except Exception as e:
+            print(f"❗[ERROR] STT 예외 발생 (mic{mic_id}): {e}")
+            if app:
+                app.log(f"[ERROR] STT 예외 발생 (mic{mic_id}): {e} → 세션 재시작")
+            time.sleep(1)
 
 def start_stt_thread(app=None):
-    """🧠 Google STT 스트리밍 쓰레드 시작"""
+    """🧠 Google STT 스트리밍 쓰레드 시작 (오디오 소스마다 워커 하나)"""
     global stt_thread
     def run():
-        global should_stop
-        client = speech.SpeechClient()
-        config = speech.RecognitionConfig(
-            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-            sample_rate_hertz=RATE,
-            language_code="en-US"
-        )
-        streaming_config = speech.StreamingRecognitionConfig(
-            config=config,
-            interim_results=False
-        )
-
-        with MicrophoneStream(RATE, CHUNK) as stream:
-            audio_generator = stream.generator()
-            requests_gen = (speech.StreamingRecognizeRequest(audio_content=content) for content in audio_generator)
-
-            try:
-                responses = client.streaming_recognize(streaming_config, requests_gen)
-                for response in responses:
-                    if should_stop:
-                        break
-                    for result in response.results:
-                        if result.is_final:
-                            transcript = result.alternatives[0].transcript.strip()
-                            print(f"🎧 [STT] 인식 결과: {transcript}")
-                            if app:
-                                app.log(f"🎧 인식: {transcript}")
-                            execute_command_if_ready(transcript, app)
-            except Exception as e:
-                print(f"❗[ERROR] STT 예외 발생: {e}")
-                if app:
-                    app.log(f"[ERROR] STT 예외 발생: {e}")
-                reset_stt_stream(app)
+        clients = {engine: get_speech_client(engine, app) for engine in active_engines()}
+        with ThreadPoolExecutor(max_workers=len(AUDIO_SOURCES), thread_name_prefix="stt") as pool:
+            futures = [pool.submit(run_recognition_loop, clients, spec, mic_id, app)
+                       for mic_id, spec in enumerate(AUDIO_SOURCES)]
+            while not (should_stop or stt_stop_event.wait(0.2)):
+                if all(f.done() for f in futures):
+                    break
+            # 🛑 소스를 닫으면 요청 스트림이 끝나고 워커들이 빠져나온다
+            for source in list(active_sources):
+                source.close()
 
     stt_thread = threading.Thread(target=run, daemon=True)
     stt_thread.start()
 
 # 🚀 프로그램 시작
 def main():
+    global command_bus, speech_contexts
     os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = "C:/Users/JYP/Documents/GitHub/TC_AudioCommand/GRPC/my-key01.json"
 
     app = DashboardApp()
@@ -397,7 +1090,22 @@ def main():
         speak_message("AI 스위쳐 대호야를 시작합니다. 테스트라고 말하세요")
         countdown_log(app, seconds=3)
 
+    command_bus = CommandBus(lambda transcript, captured_at: handle_transcript(transcript, captured_at, app),
+                             key=normalize_command, dedup_window=CROSS_MIC_DEDUP_S,
+                             thread_hook=thread_tuner("dispatch", app)).start()
+    if SPEECH_ADAPTATION and "google" in active_engines():
+        speech_contexts = build_speech_contexts(app)
+
+    if REALTIME_TUNING:
+        gc_state = configure_gc()
+        msg = f"[RT] gc 임계값 {gc_state['threshold']}, 고정 객체 {gc_state['frozen']}개"
+        print(msg)
+        app.log(msg)
+
     app.after(1000, after_gui_ready)
+    app.start_level_meter(current_input_level)
+    if PTT_MODE:
+        app.bind_push_to_talk(PTT_KEY, lambda: ptt_pressed(app), lambda: ptt_released(app))
     start_stt_thread(app)
     app.mainloop()
 
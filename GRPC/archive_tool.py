@@ -0,0 +1,75 @@
+"""
+🗄️ archive_tool.py
+롤링 오디오 아카이브 조회 / 구간 추출
+
+사용법:
+  python archive_tool.py marks audio_archive                          # 실행된 명령 목록 (시각, 명령)
+  python archive_tool.py export audio_archive "2025-08-05 14:03:21.450" -o cut.wav
+  python archive_tool.py export audio_archive 1754370201.45 --before 5 --after 1
+ - 시각은 로그의 [ARCHIVE] 줄에 나온 값 (벽시계, 날짜 생략 시 오늘)
+ - 앱의 아카이브 폴더는 %LOCALAPPDATA%/TC_AudioCommand/audio_archive/mic0 (리눅스: ~/.local/share/TC_AudioCommand/...),
+   [ARCHIVE] 줄에 전체 경로가 그대로 나온다
+"""
+
+import argparse
+import datetime
+import time
+
+from tc_archive import AudioArchive
+
+
+def parse_time(text):
+    """🕰️ epoch 초 / "YYYY-MM-DD HH:MM:SS.fff" / "HH:MM:SS.fff" → epoch 초"""
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S"):
+        try:
+            return datetime.datetime.strptime(text, fmt).timestamp()
+        except ValueError:
+            pass
+    for fmt in ("%H:%M:%S.%f", "%H:%M:%S"):
+        try:
+            clock = datetime.datetime.strptime(text, fmt).time()
+            return datetime.datetime.combine(datetime.date.today(), clock).timestamp()
+        except ValueError:
+            pass
+    raise ValueError(f"시각 형식을 알 수 없습니다: {text}")
+
+
+def format_time(wall):
+    return datetime.datetime.fromtimestamp(wall).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="롤링 오디오 아카이브 조회 / 구간 추출")
+    sub = parser.add_subparsers(dest="command", required=True)
+    marks = sub.add_parser("marks", help="실행된 명령 목록")
+    marks.add_argument("directory")
+    export = sub.add_parser("export", help="시각 주변 오디오를 WAV로 저장")
+    export.add_argument("directory")
+    export.add_argument("time")
+    export.add_argument("--before", type=float, default=3.0, help="시각 이전 길이(초)")
+    export.add_argument("--after", type=float, default=1.0, help="시각 이후 길이(초)")
+    export.add_argument("-o", "--output", default=None)
+    args = parser.parse_args()
+
+    archive = AudioArchive.open(args.directory)
+    if args.command == "marks":
+        for wall, label in archive.marks():
+            print(f"{format_time(wall)}  {label}")
+        segments = archive.segments()
+        if segments:
+            print(f"보관 구간: {format_time(segments[0].time_range()[0])} ~ {format_time(segments[-1].time_range()[1])}")
+        return
+
+    at = parse_time(args.time)
+    output = args.output or time.strftime("slice_%Y%m%d_%H%M%S.wav", time.localtime(at))
+    start = time.perf_counter()
+    seconds = archive.export_wav(output, at - args.before, at + args.after)
+    print(f"{output}: {seconds:.2f}초 ({(time.perf_counter() - start) * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+🐧 bench_capture_backends.py
+같은 장비에서 캡처 백엔드(PyAudio / ALSA 직접 / PipeWire) 지연과 전달 지터 비교
+
+사용법:
+  python bench_capture_backends.py --backends mic alsa:hw:1,0 pipewire --seconds 20
+  python bench_capture_backends.py --loopback --playback-device hw:0,0   # 스피커 → 마이크 클릭 왕복 지연
+ - 전달 지터: 백엔드가 오디오 블록을 링버퍼에 넣는 간격이 명목 주기에서 벗어난 정도 (표준편차, 최대 간격)
+ - --loopback: aplay로 무음을 계속 내보내다가 일정 간격으로 클릭을 섞고,
+   클릭이 인식기 쪽(generator)에 도착할 때까지의 시간을 잰다 (재생 경로는 모든 백엔드에 공통)
+ - 백엔드마다 같은 rate/프레임 길이로 차례로 열어서 측정 (동시에 열지 않음)
+"""
+
+import argparse
+import subprocess
+import threading
+import time
+
+import numpy as np
+
+from bench_common import format_header, format_row, summarize
+from tc_audio import ALSA_PERIOD_MS, PIPEWIRE_LATENCY_MS, chunk_size, open_source
+
+CLICK_INTERVAL_S = 0.5
+CLICK_MS = 10
+CLICK_THRESHOLD = 0.1     # 클릭 검출 레벨 (풀스케일 대비)
+PLAYBACK_BLOCK_MS = 5
+
+
+class ClickPlayer:
+    """🔊 aplay에 실시간 속도로 무음을 보내다가 CLICK_INTERVAL_S마다 클릭을 섞는다 (보낸 시각 기록)"""
+
+    def __init__(self, rate, device=None, buffer_ms=20):
+        cmd = ["aplay", "-q", "-t", "raw", "-f", "S16_LE", "-r", str(rate), "-c", "1",
+               f"--buffer-time={buffer_ms * 1000}"]
+        if device:
+            cmd += ["-D", device]
+        self._process = subprocess.Popen(cmd + ["-"], stdin=subprocess.PIPE)
+        self._rate = rate
+        self._stop = threading.Event()
+        self.sent = []
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        block = chunk_size(self._rate, PLAYBACK_BLOCK_MS)
+        click_len = chunk_size(self._rate, CLICK_MS)
+        silence = bytes(block * 2)
+        t = np.arange(click_len) / self._rate
+        click = (0.5 * 32767 * np.sin(2 * np.pi * 1000 * t)).astype(np.int16).tobytes()
+        start = time.monotonic()
+        written = 0
+        next_click = start + CLICK_INTERVAL_S
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if now >= next_click:
+                self.sent.append(now)
+                data = click
+                next_click += CLICK_INTERVAL_S
+            else:
+                data = silence
+            self._process.stdin.write(data)
+            self._process.stdin.flush()
+            written += len(data) // 2
+            delay = start + written / self._rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        self._process.stdin.close()
+        self._process.terminate()
+
+
+def measure(spec, rate, frame_ms, seconds, player=None, options=None):
+    """🎤 백엔드 하나: (클릭 왕복 지연 목록, 전달 간격 목록, 캡처 통계)"""
+    source = open_source(spec, rate, chunk_size(rate, frame_ms), **(options or {}))
+    deliveries = []
+    deliver = source._deliver
+
+    def timed_deliver(in_data, frame_count, captured_at):
+        deliveries.append(time.monotonic())
+        deliver(in_data, frame_count, captured_at)
+
+    source._deliver = timed_deliver
+    latencies = []
+    threshold = CLICK_THRESHOLD * 32767
+    with source:
+        # 장치가 멈춰서 청크가 안 와도 측정 시간이 지나면 끝나게 소스를 닫는다
+        timer = threading.Timer(seconds, source.close)
+        timer.start()
+        matched = 0 if player is None else len(player.sent)
+        for chunk in source.generator():
+            now = time.monotonic()
+            if player is not None and matched < len(player.sent):
+                if np.abs(np.frombuffer(chunk, dtype=np.int16)).max(initial=0) >= threshold:
+                    latencies.append(now - player.sent[matched])
+                    matched = len(player.sent)      # 한 클릭은 한 번만 센다
+        timer.cancel()
+        stats = source.capture_stats()
+    return latencies, np.diff(deliveries), stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="캡처 백엔드별 지연/지터 비교")
+    parser.add_argument("--backends", nargs="+", default=["mic", "alsa", "pipewire"])
+    parser.add_argument("--rate", type=int, default=16000)
+    parser.add_argument("--frame-ms", type=int, default=10, help="PyAudio 콜백 프레임 길이")
+    parser.add_argument("--period-ms", type=int, default=ALSA_PERIOD_MS, help="ALSA 주기 길이")
+    parser.add_argument("--pipewire-latency-ms", type=int, default=PIPEWIRE_LATENCY_MS)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--loopback", action="store_true")
+    parser.add_argument("--playback-device", default=None, help="aplay -D 장치 (기본: ALSA 기본 출력)")
+    args = parser.parse_args()
+
+    rows = []
+    for spec in args.backends:
+        kind = spec.partition(":")[0]
+        options, period = {}, args.frame_ms
+        if kind == "alsa":
+            options, period = {"period_ms": args.period_ms}, args.period_ms
+        elif kind == "pipewire":
+            options, period = {"latency_ms": args.pipewire_latency_ms}, args.pipewire_latency_ms
+        player = ClickPlayer(args.rate, args.playback_device) if args.loopback else None
+        print(f"[BENCH] {spec}: {args.seconds:.0f}초 측정 (주기 {period} ms)")
+        try:
+            latencies, intervals, stats = measure(spec, args.rate, args.frame_ms, args.seconds, player, options)
+        except Exception as e:
+            print(f"  ⚠️ {spec} 사용 불가: {e}")
+            continue
+        finally:
+            if player is not None:
+                player.close()
+        jitter = float(np.std(intervals - period / 1000) * 1000) if len(intervals) else float("nan")
+        gap = float(intervals.max() * 1000) if len(intervals) else float("nan")
+        adc = stats["max_adc_latency"]
+        rows.append((spec, summarize(latencies), jitter, gap, stats["input_overflows"],
+                     "-" if not adc else f"{adc * 1000:.1f}"))
+
+    print()
+    print(format_header("backend") + f" | {'jitter ms':>9} | {'max gap':>7} | {'overflow':>8} | {'adc ms':>6}")
+    for spec, stats, jitter, gap, overflows, adc in rows:
+        print(format_row(spec, stats) + f" | {jitter:>9.2f} | {gap:>7.1f} | {overflows:>8} | {adc:>6}")
+    if not args.loopback:
+        print("(n/p50/p95/max 열은 --loopback일 때 클릭 왕복 지연)")
+
+
+if __name__ == "__main__":
+    main()
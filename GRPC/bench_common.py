@@ -0,0 +1,123 @@
+"""
+📊 bench_common.py
+벤치마크 스크립트 공통 도구 (WAV 로드, 발화 끝 검출, 지연 통계)
+"""
+
+import ast
+import bisect
+import time
+import wave
+
+import numpy as np
+
+from tc_audio import SAMPLE_WIDTH, chunk_size
+from tc_dsp import VoiceActivityGate
+
+
+def read_wav(path):
+    """📂 16bit mono WAV → (int16 배열, 샘플레이트)"""
+    with wave.open(path, "rb") as wf:
+        if wf.getsampwidth() != SAMPLE_WIDTH or wf.getnchannels() != 1:
+            raise ValueError(f"16bit mono WAV만 지원합니다: {path}")
+        rate = wf.getframerate()
+        pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    return pcm, rate
+
+
+def load_script_constants(path, names):
+    """📜 메인 스크립트의 상수(dict/list 리터럴)를 실행하지 않고 읽어온다 (GUI/TTS 의존성 없이 같은 설정 사용)"""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    values = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            if node.targets[0].id in names:
+                values[node.targets[0].id] = ast.literal_eval(node.value)
+    missing = [name for name in names if name not in values]
+    if missing:
+        raise ValueError(f"{path}에서 찾을 수 없는 상수: {', '.join(missing)}")
+    return values
+
+
+def speech_segments(pcm, rate, min_gap_ms=300):
+    """🗣️ 발화 구간 (시작, 끝)(초) 목록: min_gap_ms 이상 무음이 이어지면 발화가 끝난 것으로 본다"""
+    gate = VoiceActivityGate(rate)
+    block = chunk_size(rate, 100)
+    flags = np.concatenate([gate.is_speech(pcm[pos:pos + block]) for pos in range(0, len(pcm), block)])
+    frame_s = 0.01
+    min_gap = int(min_gap_ms / 10)
+
+    speech_idx = np.flatnonzero(flags)
+    if speech_idx.size == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(speech_idx) > min_gap)
+    starts = np.concatenate([[speech_idx[0]], speech_idx[breaks + 1]])
+    ends = np.concatenate([speech_idx[breaks], [speech_idx[-1]]]) + 1
+    return [(float(start) * frame_s, float(end) * frame_s) for start, end in zip(starts, ends)]
+
+
+def speech_end_offsets(pcm, rate, min_gap_ms=300):
+    """🔚 발화 끝 지점(초) 목록: min_gap_ms 이상 무음이 이어지면 발화가 끝난 것으로 본다"""
+    return [end for _, end in speech_segments(pcm, rate, min_gap_ms)]
+
+
+class SendLog:
+    """📝 전송한 오디오 누적 길이(초) ↔ 전송 시각 기록"""
+
+    def __init__(self, rate):
+        self._rate = rate
+        self._bytes = 0
+        self.offsets = []
+        self.times = []
+
+    def wrap(self, frames):
+        for frame in frames:
+            self._bytes += len(frame)
+            self.offsets.append(self._bytes / SAMPLE_WIDTH / self._rate)
+            self.times.append(time.monotonic())
+            yield frame
+
+    @property
+    def sent_bytes(self):
+        return self._bytes
+
+    def sent_at(self, offset):
+        """⏱️ 오디오 오프셋(초)이 포함된 요청을 보낸 시각"""
+        i = bisect.bisect_left(self.offsets, offset)
+        if i >= len(self.times):
+            return None
+        return self.times[i]
+
+
+def match_latencies(finals, speech_ends, send_log, tolerance=0.3):
+    """🎯 최종 결과(도착 시각, result_end 오프셋)를 발화 끝에 매칭해 지연(초) 목록 계산"""
+    latencies = []
+    for arrived, result_end in finals:
+        candidates = [e for e in speech_ends if e <= result_end + tolerance]
+        if not candidates:
+            continue
+        sent = send_log.sent_at(candidates[-1])
+        if sent is not None:
+            latencies.append(arrived - sent)
+    return latencies
+
+
+def summarize(values):
+    """📈 지연 통계 (ms)"""
+    if not values:
+        return {"n": 0, "p50": float("nan"), "p95": float("nan"), "max": float("nan")}
+    ms = np.asarray(values) * 1000.0
+    return {
+        "n": len(values),
+        "p50": float(np.percentile(ms, 50)),
+        "p95": float(np.percentile(ms, 95)),
+        "max": float(ms.max()),
+    }
+
+
+def format_row(label, stats):
+    return f"{label:>12} | {stats['n']:>4} | {stats['p50']:>8.1f} | {stats['p95']:>8.1f} | {stats['max']:>8.1f}"
+
+
+def format_header(label):
+    return f"{label:>12} | {'n':>4} | {'p50 ms':>8} | {'p95 ms':>8} | {'max ms':>8}"
@@ -0,0 +1,66 @@
+"""
+⏱️ bench_frame_latency.py
+캡처 프레임 크기별 '발화 끝 → 최종 인식 결과' 지연 측정
+
+사용법: python bench_frame_latency.py director_calls.wav --frames 10 20 40 100
+ - 16bit mono WAV, 5분 이내 (streaming_recognize 세션 한도)
+ - GOOGLE_APPLICATION_CREDENTIALS 환경 변수가 설정되어 있어야 함
+"""
+
+import argparse
+import time
+
+from google.cloud import speech
+
+from bench_common import (SendLog, format_header, format_row, match_latencies,
+                          read_wav, speech_end_offsets, summarize)
+from tc_audio import FileSource, chunk_size, frame_requests
+
+
+def run_once(client, path, rate, frame_ms, request_ms):
+    """🎧 한 가지 프레임 크기로 파일 전체를 실시간 스트리밍하고 최종 결과 도착 시각 수집"""
+    config = speech.RecognitionConfig(
+        encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+        sample_rate_hertz=rate,
+        language_code="en-US"
+    )
+    streaming_config = speech.StreamingRecognitionConfig(config=config, interim_results=False)
+
+    send_log = SendLog(rate)
+    finals = []
+    with FileSource(path, rate, chunk_size(rate, frame_ms)) as source:
+        frames = frame_requests(source.generator(), rate, target_ms=request_ms)
+        requests_gen = (speech.StreamingRecognizeRequest(audio_content=bytes(f)) for f in send_log.wrap(frames))
+        for response in client.streaming_recognize(streaming_config, requests_gen):
+            for result in response.results:
+                if result.is_final:
+                    finals.append((time.monotonic(), result.result_end_time.total_seconds()))
+                    print(f"  🎧 [{frame_ms} ms] {result.alternatives[0].transcript.strip()}")
+    return finals, send_log
+
+
+def main():
+    parser = argparse.ArgumentParser(description="프레임 크기별 발화 끝 → 최종 결과 지연 측정")
+    parser.add_argument("wav")
+    parser.add_argument("--frames", type=int, nargs="+", default=[10, 20, 40, 100])
+    parser.add_argument("--request-ms", type=int, default=None, help="요청 길이 (기본: 프레임 길이와 동일)")
+    args = parser.parse_args()
+
+    pcm, rate = read_wav(args.wav)
+    speech_ends = speech_end_offsets(pcm, rate)
+    print(f"[BENCH] {args.wav}: {len(pcm) / rate:.1f}초, 발화 {len(speech_ends)}개")
+
+    client = speech.SpeechClient()
+    rows = []
+    for frame_ms in args.frames:
+        finals, send_log = run_once(client, args.wav, rate, frame_ms, args.request_ms or frame_ms)
+        rows.append((f"{frame_ms} ms", summarize(match_latencies(finals, speech_ends, send_log))))
+
+    print()
+    print(format_header("frame"))
+    for label, stats in rows:
+        print(format_row(label, stats))
+
+
+if __name__ == "__main__":
+    main()
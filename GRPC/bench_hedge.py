@@ -0,0 +1,110 @@
+"""
+🏁 bench_hedge.py
+엔진 헤징: 같은 녹음을 여러 인식 엔진에 동시에 보내고, 헤징 결과의 지연 꼬리를 엔진 단독 경로와 비교
+
+사용법: python bench_hedge.py director_calls.wav --engines google:0.0 local:0.7 --model models/vosk-model-small-en-us-0.15
+ - 16bit mono WAV (5분 이내), 실시간 속도로 소스 → VAD → 분배기 → 엔진별 스트림 (앱과 같은 경로)
+ - 엔진:최소 신뢰도. 유효한 명령으로 해석되고 신뢰도가 그 이상인 결과 중 발화마다 가장 먼저 온 것을 채택
+ - 엔진 행의 지연 = 그 엔진 단독으로 streaming_recognize를 쓸 때의 지연 (모든 최종 결과),
+   hedged 행 = 채택된 결과의 지연. 지연은 결과 끝 캡처 → 결과 도착
+ - google은 GOOGLE_APPLICATION_CREDENTIALS 필요, 문법은 메인 스크립트(--script)에서 읽는다
+"""
+
+import argparse
+import time
+
+from google.cloud import speech
+
+from bench_common import format_header, format_row, load_script_constants, summarize
+from tc_audio import AudioFanout, AudioTimeline, FileSource, chunk_size, frame_requests
+from tc_dsp import VoiceActivityGate
+from tc_local_stt import LocalSpeechClient
+from tc_stt import CommandGrammar, HedgeArbiter, HedgedRecognizer
+
+SCRIPT = "TC_Tuning_0805-03.py"
+
+
+def parse_engines(specs):
+    """🧩 "google:0.0" → {"google": 0.0}"""
+    engines = {}
+    for spec in specs:
+        name, _, threshold = spec.partition(":")
+        engines[name] = float(threshold or 0.0)
+    return engines
+
+
+def engine_runner(clients, rate, frame_ms, arbiter, grammar):
+    """🎧 엔진 하나: 독자의 오디오를 스트리밍하고 최종 결과를 중재기에 넘긴다"""
+    def run(engine, reader):
+        config = speech.RecognitionConfig(
+            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+            sample_rate_hertz=rate,
+            language_code="en-US"
+        )
+        streaming_config = speech.StreamingRecognitionConfig(config=config, interim_results=False)
+        timeline = AudioTimeline(rate)
+        frames = frame_requests(timeline.track(reader.generator(), lambda: reader.last_captured_at),
+                                rate, target_ms=frame_ms)
+        requests_gen = (speech.StreamingRecognizeRequest(audio_content=bytes(f)) for f in frames)
+        for response in clients[engine].streaming_recognize(streaming_config, requests_gen):
+            for result in response.results:
+                if not result.is_final or not result.alternatives:
+                    continue
+                alternative = result.alternatives[0]
+                transcript = alternative.transcript.strip()
+                audio_ts = timeline.captured_at(result.result_end_time.total_seconds())
+                won = arbiter.offer(engine, transcript, alternative.confidence, audio_ts)
+                print(f"  {'🏁' if won else '  '} [{engine}] {transcript} → {grammar.key(transcript)}")
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description="엔진 헤징 지연/채택 비율 측정")
+    parser.add_argument("wav")
+    parser.add_argument("--engines", nargs="+", default=["google:0.0", "local:0.7"], help="엔진:최소 신뢰도")
+    parser.add_argument("--model", default="models/vosk-model-small-en-us-0.15", help="Vosk 모델 디렉터리")
+    parser.add_argument("--script", default=SCRIPT, help="문법을 읽어올 메인 스크립트")
+    parser.add_argument("--rate", type=int, default=16000)
+    parser.add_argument("--frame-ms", type=int, default=100)
+    parser.add_argument("--window", type=float, default=0.7, help="같은 발화로 보는 결과 끝 시각 차이 (초)")
+    args = parser.parse_args()
+
+    constants = load_script_constants(args.script, ("TRICASTER_INPUT_MAP", "PHONETIC_MAP"))
+    grammar = CommandGrammar(constants["TRICASTER_INPUT_MAP"], constants["PHONETIC_MAP"])
+    engines = parse_engines(args.engines)
+    clients = {}
+    for engine in engines:
+        if engine == "local":
+            clients[engine] = LocalSpeechClient(args.model, grammar.decoder_phrases())
+        else:
+            clients[engine] = speech.SpeechClient()
+
+    def acceptable(transcript):
+        command = grammar.key(transcript)
+        return command == grammar.ready_word or grammar.is_valid(command)
+
+    arbiter = HedgeArbiter(engines, acceptable, window=args.window)
+    print(f"[BENCH] {args.wav}: 엔진 {', '.join(f'{name}(≥{t:g})' for name, t in engines.items())}")
+    with FileSource(args.wav, args.rate, chunk_size(args.rate, args.frame_ms)) as source:
+        chunks = VoiceActivityGate(args.rate).filter(source.generator())
+        fanout = AudioFanout(chunks, args.rate, lambda: source.last_captured_at).start()
+        hedge = HedgedRecognizer(fanout, engines, engine_runner(clients, args.rate, args.frame_ms, arbiter, grammar),
+                                 on_error=lambda engine, e: print(f"  ⚠️ {engine} 끊김: {e}"))
+        start = time.monotonic()
+        hedge.run(lambda: False)
+    print(f"[BENCH] 재생 {time.monotonic() - start:.1f}초")
+
+    rates = arbiter.win_rates()
+    print()
+    print(format_header("engine") + f" | {'wins':>4} | {'win %':>6} | {'reject':>6} | {'late':>4} | {'behind p50':>10}")
+    for engine, stats in arbiter.stats.items():
+        behind = summarize(stats["behind"])["p50"]
+        print(format_row(engine, summarize(stats["latencies"]))
+              + f" | {stats['wins']:>4} | {rates[engine]:>6.1%} | {stats['rejected']:>6} | {stats['late']:>4}"
+              + f" | {behind:>10.1f}")
+    print(format_row("hedged", summarize(arbiter.latencies)))
+    print("(behind: 이미 다른 엔진 결과가 채택된 뒤 늦게 온 시간, ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+⚡ bench_jitter.py
+실시간 튜닝(우선순위/CPU 고정/gc) 전후의 '캡처 → 요청 전송' 지연과 지터 비교
+
+사용법: python bench_jitter.py --seconds 30 --hogs 4 --cpus 2 3
+ - 10 ms 톤 캡처 → 링버퍼 → frame_requests 경로를 그대로 돌리면서
+   CPU를 잡아먹는 쓰레드(--hogs)와 객체를 계속 만드는 쓰레드(gc 부하)를 함께 띄운다
+ - 튜닝 off / on을 각각 별도 프로세스로 실행한다 (우선순위와 gc 설정은 되돌릴 수 없으므로)
+ - 권한이 없으면 on 쪽도 가능한 단계(nice 등)까지만 적용되며, 적용 결과를 함께 출력한다
+ - --dispatch: 같은 부하에서 명령 전송(GET)을 --dispatch-ms 간격으로 보내며 요청마다 새 연결(requests.get)과
+   keep-alive 세션(requests.Session, 앱의 tricaster_session) 지연을 비교한다
+   --url을 주지 않으면 프로세스 안의 로컬 HTTP/1.1 서버로 보낸다 (실제 스위처: --url http://172.30.20.6/v1/shortcut)
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+
+from bench_common import format_header, format_row, summarize
+from tc_audio import ToneSource, chunk_size, frame_requests
+from tc_realtime import ThreadTuner, configure_gc, tune_current_thread
+
+
+def cpu_hog(stop):
+    """🔥 GIL과 CPU를 계속 쓰는 파이썬 루프"""
+    x = 0
+    while not stop.is_set():
+        for i in range(10000):
+            x += i * i
+
+
+def allocation_churn(stop):
+    """🧹 순환 참조 객체를 계속 만들어 gc 수집을 자주 일으킨다"""
+    keep = []
+    while not stop.is_set():
+        for _ in range(2000):
+            node = {"next": None}
+            node["next"] = node
+            keep.append(node)
+        if len(keep) > 200000:
+            keep = []
+
+
+class ShortcutHandler(BaseHTTPRequestHandler):
+    """📡 TriCaster 단축키 API 흉내 (keep-alive 연결 유지)"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def dispatch_loop(url, interval_s, stop, results):
+    """📨 새 연결 / keep-alive 세션을 번갈아 가며 명령 전송 지연을 잰다"""
+    session = requests.Session()
+    senders = {"get": lambda: requests.get(url, params={"name": "main_take"}, timeout=1.5),
+               "session": lambda: session.get(url, params={"name": "main_take"}, timeout=1.5)}
+    while not stop.wait(interval_s):
+        for label, send in senders.items():
+            start = time.monotonic()
+            try:
+                send()
+            except requests.RequestException:
+                continue
+            results[label].append(time.monotonic() - start)
+
+
+def run_child(args):
+    """🧪 한 가지 설정으로 측정하고 결과를 JSON으로 출력"""
+    tuned, gc_state = [], None
+    thread_hook = None
+    if args.tune:
+        # 부하 쓰레드보다 먼저 튜닝해도 새 쓰레드는 실시간 정책을 물려받지 않는다 (SCHED_RESET_ON_FORK)
+        tuned.append(tune_current_thread("stt", args.cpus[1:] or None))
+        thread_hook = ThreadTuner("audio", args.cpus[:1] or None, on_tuned=tuned.append)
+        gc_state = configure_gc()["threshold"]
+
+    stop = threading.Event()
+    workers = [threading.Thread(target=cpu_hog, args=(stop,), daemon=True) for _ in range(args.hogs)]
+    workers.append(threading.Thread(target=allocation_churn, args=(stop,), daemon=True))
+    dispatch = {"get": [], "session": []}
+    server = None
+    if args.dispatch:
+        url = args.url
+        if url is None:
+            server = ThreadingHTTPServer(("127.0.0.1", 0), ShortcutHandler)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            url = f"http://127.0.0.1:{server.server_port}/v1/shortcut"
+        workers.append(threading.Thread(target=dispatch_loop, args=(url, args.dispatch_ms / 1000, stop, dispatch),
+                                        daemon=True))
+    for worker in workers:
+        worker.start()
+
+    latencies, sent = [], []
+    source = ToneSource(args.rate, chunk_size(args.rate, args.chunk_ms), noise=0.05,
+                        duration=args.seconds, thread_hook=thread_hook)
+    with source:
+        for _ in frame_requests(source.generator(), args.rate, target_ms=args.request_ms):
+            now = time.monotonic()
+            if source.last_captured_at is not None:
+                latencies.append(now - source.last_captured_at)
+            sent.append(now)
+    stop.set()
+    if server:
+        server.shutdown()
+
+    intervals = np.diff(sent) - args.request_ms / 1000 if len(sent) > 1 else np.zeros(0)
+    print(json.dumps({"latencies": latencies, "jitter": float(np.std(intervals)) if intervals.size else None,
+                      "tuned": tuned, "gc": gc_state, "dispatch": dispatch}))
+
+
+def run_parent(args):
+    rows = []
+    for label, tune in (("off", False), ("on", True)):
+        cmd = [sys.executable, __file__, "--child", "--seconds", str(args.seconds), "--hogs", str(args.hogs),
+               "--rate", str(args.rate), "--chunk-ms", str(args.chunk_ms), "--request-ms", str(args.request_ms)]
+        if tune:
+            cmd.append("--tune")
+        if args.cpus:
+            cmd += ["--cpus"] + [str(cpu) for cpu in args.cpus]
+        if args.dispatch:
+            cmd += ["--dispatch", "--dispatch-ms", str(args.dispatch_ms)] + (["--url", args.url] if args.url else [])
+        print(f"[BENCH] 튜닝 {label}: {args.seconds:.0f}초, 부하 쓰레드 {args.hogs}개")
+        result = json.loads(subprocess.run(cmd, capture_output=True, text=True, check=True).stdout.splitlines()[-1])
+        for tuned in result["tuned"]:
+            print(f"  ⚡ {tuned['role']}: {tuned.get('priority')}" + (f", CPU {tuned['cpus']}" if "cpus" in tuned else ""))
+        if result["gc"]:
+            print(f"  🧹 gc 임계값 {tuple(result['gc'])}")
+        rows.append((label, summarize(result["latencies"]), result["jitter"], result["dispatch"]))
+
+    print()
+    print(format_header("tuning") + f" | {'jitter ms':>9}")
+    for label, stats, jitter, _ in rows:
+        jitter_ms = float("nan") if jitter is None else jitter * 1000
+        print(format_row(label, stats) + f" | {jitter_ms:>9.2f}")
+    if args.dispatch:
+        print()
+        print(format_header("dispatch"))
+        for label, _, _, dispatch in rows:
+            for kind, latencies in dispatch.items():
+                print(format_row(f"{label}/{kind}", summarize(latencies)))
+        print("(get: 요청마다 새 연결, session: keep-alive 연결 재사용)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="실시간 튜닝 전후 캡처 → 전송 지연/지터 비교")
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--hogs", type=int, default=4, help="CPU 부하 쓰레드 수")
+    parser.add_argument("--rate", type=int, default=16000)
+    parser.add_argument("--chunk-ms", type=int, default=10)
+    parser.add_argument("--request-ms", type=int, default=10)
+    parser.add_argument("--cpus", type=int, nargs="*", default=[],
+                        help="고정할 CPU (첫 번째: 캡처 쓰레드, 나머지: 전송 쓰레드)")
+    parser.add_argument("--dispatch", action="store_true", help="명령 전송 지연도 함께 측정")
+    parser.add_argument("--dispatch-ms", type=float, default=200.0, help="명령 전송 간격")
+    parser.add_argument("--url", default=None, help="명령을 보낼 주소 (기본: 로컬 흉내 서버)")
+    parser.add_argument("--tune", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+    else:
+        run_parent(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+🖥️ bench_local_stt.py
+클라우드(Google) vs 로컬(문법 제한 Vosk) 인식 엔진: 발화 끝 → 최종 결과 지연, 명령 인식률, CPU 사용량 비교
+
+사용법: python bench_local_stt.py director_calls.wav --expected director_calls.txt --model models/vosk-model-small-en-us-0.15
+ - 16bit mono WAV (5분 이내), 실시간 속도로 두 엔진에 차례로 흘려보낸다
+ - google은 GOOGLE_APPLICATION_CREDENTIALS 필요 (--engines local만 주면 네트워크 없이 동작)
+ - 문법은 메인 스크립트(--script)의 TRICASTER_INPUT_MAP / PHONETIC_MAP을 그대로 읽는다
+ - CPU: 인식 중 프로세스 CPU 시간 / 오디오 길이 (로컬 엔진은 이 비율만큼 코어 하나를 쓴다)
+ - 지연 분포 폭(p95 - p50)이 작을수록 지연이 일정하다
+"""
+
+import argparse
+import time
+
+from google.cloud import speech
+
+from bench_common import (SendLog, format_header, format_row, load_script_constants, match_latencies,
+                          read_wav, speech_end_offsets, summarize)
+from bench_phrase_hints import score
+from tc_audio import FileSource, chunk_size, frame_requests
+from tc_local_stt import LocalSpeechClient
+from tc_stt import CommandGrammar
+
+SCRIPT = "TC_Tuning_0805-03.py"
+
+
+def run_engine(client, path, rate, frame_ms):
+    """🎧 파일을 실시간으로 스트리밍 → (최종 결과 [(도착 시각, result_end, 문장)], 전송 기록, CPU 초)"""
+    config = speech.RecognitionConfig(
+        encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+        sample_rate_hertz=rate,
+        language_code="en-US"
+    )
+    streaming_config = speech.StreamingRecognitionConfig(config=config, interim_results=False)
+    send_log = SendLog(rate)
+    finals = []
+    cpu_start = time.process_time()
+    with FileSource(path, rate, chunk_size(rate, frame_ms)) as source:
+        frames = frame_requests(source.generator(), rate, target_ms=frame_ms)
+        requests_gen = (speech.StreamingRecognizeRequest(audio_content=bytes(f)) for f in send_log.wrap(frames))
+        for response in client.streaming_recognize(streaming_config, requests_gen):
+            for result in response.results:
+                if result.is_final and result.alternatives:
+                    finals.append((time.monotonic(), result.result_end_time.total_seconds(),
+                                   result.alternatives[0].transcript.strip()))
+    return finals, send_log, time.process_time() - cpu_start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="클라우드 vs 로컬 인식 엔진 지연/인식률 비교")
+    parser.add_argument("wav")
+    parser.add_argument("--engines", nargs="+", default=["google", "local"], choices=["google", "local"])
+    parser.add_argument("--model", default="models/vosk-model-small-en-us-0.15", help="Vosk 모델 디렉터리")
+    parser.add_argument("--expected", default=None, help="기대 명령 목록 파일 (한 줄에 하나)")
+    parser.add_argument("--script", default=SCRIPT, help="문법을 읽어올 메인 스크립트")
+    parser.add_argument("--frame-ms", type=int, default=100)
+    args = parser.parse_args()
+
+    pcm, rate = read_wav(args.wav)
+    speech_ends = speech_end_offsets(pcm, rate)
+    constants = load_script_constants(args.script, ("TRICASTER_INPUT_MAP", "PHONETIC_MAP"))
+    grammar = CommandGrammar(constants["TRICASTER_INPUT_MAP"], constants["PHONETIC_MAP"])
+    expected = []
+    if args.expected:
+        with open(args.expected, encoding="utf-8") as f:
+            expected = [grammar.key(line) for line in f if line.strip()]
+    print(f"[BENCH] {args.wav}: {len(pcm) / rate:.1f}초, 발화 {len(speech_ends)}개")
+
+    rows = []
+    for engine in args.engines:
+        if engine == "local":
+            client = LocalSpeechClient(args.model, grammar.decoder_phrases())
+        else:
+            client = speech.SpeechClient()
+        print(f"[BENCH] {engine} 엔진")
+        finals, send_log, cpu = run_engine(client, args.wav, rate, args.frame_ms)
+        for _, _, transcript in finals:
+            print(f"  🎧 {transcript} → {grammar.key(transcript)}")
+        latencies = match_latencies([(arrived, end) for arrived, end, _ in finals], speech_ends, send_log)
+        commands, resets, matched = score(grammar, [transcript for _, _, transcript in finals], expected)
+        rows.append((engine, summarize(latencies), resets, matched, cpu / (len(pcm) / rate)))
+
+    print()
+    print(format_header("engine") + f" | {'spread':>6} | {'resets':>6} | {'miss rate':>9} | {'cpu':>5}")
+    for engine, stats, resets, matched, cpu in rows:
+        miss = f"{1 - matched / len(expected):.1%}" if expected else "-"
+        print(format_row(engine, stats) + f" | {stats['p95'] - stats['p50']:>6.1f} | {resets:>6} | {miss:>9} | {cpu:>5.1%}")
+
+
+if __name__ == "__main__":
+    main()
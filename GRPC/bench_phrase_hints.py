@@ -0,0 +1,109 @@
+"""
+📚 bench_phrase_hints.py
+인식기 적응 문구(phrase hints + boost) 유무에 따른 명령 오인식률과 STT 리셋 횟수 비교
+
+사용법: python bench_phrase_hints.py director_calls.wav --expected director_calls.txt --scales 0 0.5 1
+ - 16bit mono WAV (5분 이내), GOOGLE_APPLICATION_CREDENTIALS 필요
+ - --expected: 녹음에서 감독이 실제로 말한 명령을 순서대로 한 줄에 하나씩 ("p1 cut", "cut", "2" ...)
+ - 문법/가중치는 메인 스크립트(--script)의 TRICASTER_INPUT_MAP / PHONETIC_MAP / SPEECH_BOOSTS를 그대로 읽는다
+ - --scales: 가중치 배율 (0 = 적응 없음, 지금 동작과 같음)
+ - 리셋: 최종 결과가 유효한 명령으로 해석되지 않아 reset_stt_stream이 불렸을 횟수
+ - 오인식률: 기대 명령 중 같은 순서로 맞게 인식되지 않은 비율 (difflib 정렬)
+"""
+
+import argparse
+import difflib
+
+from google.cloud import speech
+
+from bench_common import load_script_constants
+from tc_audio import FileSource, chunk_size, frame_requests
+from tc_stt import CommandGrammar
+
+SCRIPT = "TC_Tuning_0805-03.py"
+
+
+def recognize(client, path, rate, contexts, frame_ms, speed):
+    """🎧 파일을 스트리밍하고 최종 결과 문장 목록을 돌려준다"""
+    config = speech.RecognitionConfig(
+        encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+        sample_rate_hertz=rate,
+        language_code="en-US",
+        speech_contexts=contexts
+    )
+    streaming_config = speech.StreamingRecognitionConfig(config=config, interim_results=False)
+    finals = []
+    with FileSource(path, rate, chunk_size(rate, frame_ms), speed=speed) as source:
+        frames = frame_requests(source.generator(), rate, target_ms=frame_ms, pace=source.realtime)
+        requests_gen = (speech.StreamingRecognizeRequest(audio_content=bytes(f)) for f in frames)
+        for response in client.streaming_recognize(streaming_config, requests_gen):
+            for result in response.results:
+                if result.is_final and result.alternatives:
+                    finals.append(result.alternatives[0].transcript.strip())
+    return finals
+
+
+def score(grammar, finals, expected):
+    """📏 (실행될 명령 목록, 리셋 횟수, 기대 명령과 맞은 개수)"""
+    commands, resets = [], 0
+    for transcript in finals:
+        if not transcript:
+            continue
+        command = grammar.key(transcript)
+        if command == grammar.ready_word:
+            continue
+        if grammar.is_valid(command):
+            commands.append(command)
+        else:
+            resets += 1
+    matched = 0
+    if expected:
+        matcher = difflib.SequenceMatcher(a=expected, b=commands, autojunk=False)
+        matched = sum(block.size for block in matcher.get_matching_blocks())
+    return commands, resets, matched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="인식기 적응 문구 유무별 오인식률/리셋 횟수 비교")
+    parser.add_argument("wav")
+    parser.add_argument("--expected", default=None, help="기대 명령 목록 파일 (한 줄에 하나)")
+    parser.add_argument("--script", default=SCRIPT, help="문법/가중치를 읽어올 메인 스크립트")
+    parser.add_argument("--scales", type=float, nargs="+", default=[0.0, 1.0])
+    parser.add_argument("--rate", type=int, default=16000)
+    parser.add_argument("--frame-ms", type=int, default=100)
+    parser.add_argument("--speed", type=float, default=1.0, help="재생 배속 (1.0 = 실시간)")
+    args = parser.parse_args()
+
+    constants = load_script_constants(args.script, ("TRICASTER_INPUT_MAP", "PHONETIC_MAP", "SPEECH_BOOSTS"))
+    grammar = CommandGrammar(constants["TRICASTER_INPUT_MAP"], constants["PHONETIC_MAP"])
+    expected = []
+    if args.expected:
+        with open(args.expected, encoding="utf-8") as f:
+            expected = [grammar.key(line) for line in f if line.strip()]
+
+    client = speech.SpeechClient()
+    rows = []
+    for scale in args.scales:
+        boosts = {name: boost * scale for name, boost in constants["SPEECH_BOOSTS"].items()}
+        hints = grammar.phrase_hints(boosts)
+        contexts = [speech.SpeechContext(phrases=phrases, boost=boost) for phrases, boost in hints]
+        label = "없음" if not hints else f"x{scale:g}"
+        print(f"[BENCH] 적응 문구 {label}: {sum(len(p) for p, _ in hints)}개")
+        finals = recognize(client, args.wav, args.rate, contexts, args.frame_ms, args.speed)
+        commands, resets, matched = score(grammar, finals, expected)
+        for transcript in finals:
+            print(f"  🎧 {transcript} → {grammar.key(transcript)}")
+        rows.append((label, len(finals), len(commands), resets, matched))
+
+    print()
+    print(f"{'hints':>8} | {'finals':>6} | {'commands':>8} | {'resets':>6} | {'matched':>7} | {'miss rate':>9}")
+    baseline_resets = rows[0][3]
+    for label, n_finals, n_commands, resets, matched in rows:
+        miss = f"{1 - matched / len(expected):.1%}" if expected else "-"
+        print(f"{label:>8} | {n_finals:>6} | {n_commands:>8} | {resets:>6} | {matched:>7} | {miss:>9}")
+    for label, _, _, resets, _ in rows[1:]:
+        print(f"[BENCH] {label}: 리셋 {baseline_resets - resets:+d}회 회피 (기준: {rows[0][0]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+⏩ bench_replay.py
+녹음된 쇼 오디오를 실제 캡처 파이프라인(소스 → VAD → 요청 프레이밍)에 최대 속도로 흘려보내는 재생 하네스
+
+사용법: python bench_replay.py show_audio.wav [--speed 1.0]
+ - 네트워크 없이 동작 (Google로 보내지 않음)
+ - --speed 생략 시 최대 속도, 1.0이면 실시간
+"""
+
+import argparse
+import time
+
+from tc_audio import FileSource, chunk_size, frame_requests
+from tc_dsp import VoiceActivityGate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="녹음 오디오 파이프라인 재생")
+    parser.add_argument("path", help="16bit mono WAV 또는 raw PCM")
+    parser.add_argument("--rate", type=int, default=16000)
+    parser.add_argument("--frame-ms", type=int, default=100)
+    parser.add_argument("--request-ms", type=int, default=100)
+    parser.add_argument("--speed", type=float, default=None)
+    parser.add_argument("--no-vad", action="store_true")
+    args = parser.parse_args()
+
+    start = time.monotonic()
+    cpu_start = time.process_time()
+    sent_bytes = 0
+    n_requests = 0
+    vad = None if args.no_vad else VoiceActivityGate(args.rate)
+
+    with FileSource(args.path, args.rate, chunk_size(args.rate, args.frame_ms), speed=args.speed) as source:
+        chunks = source.generator()
+        if vad:
+            chunks = vad.filter(chunks)
+        for frame in frame_requests(chunks, args.rate, target_ms=args.request_ms, pace=source.realtime):
+            sent_bytes += len(frame)
+            n_requests += 1
+
+    wall = time.monotonic() - start
+    cpu = time.process_time() - cpu_start
+    print(f"[REPLAY] 요청 {n_requests}개, 전송 오디오 {sent_bytes / 2 / args.rate:.1f}초")
+    if vad:
+        audio = vad.suppressed_seconds + vad.forwarded_seconds
+        print(f"[REPLAY] 입력 오디오 {audio:.1f}초, VAD 억제 {vad.suppressed_seconds:.1f}초")
+        print(f"[REPLAY] 처리 시간 {wall:.2f}초 (CPU {cpu:.2f}초) → 실시간 대비 {audio / max(wall, 1e-9):.0f}배속")
+    else:
+        print(f"[REPLAY] 처리 시간 {wall:.2f}초 (CPU {cpu:.2f}초)")
+
+
+if __name__ == "__main__":
+    main()
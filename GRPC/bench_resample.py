@@ -0,0 +1,143 @@
+"""
+🔁 bench_resample.py
+장치 고유 샘플레이트 캡처 + 폴리페이즈 변환 vs 16 kHz 직접 캡처(OS 리샘플링) 비교
+
+사용법:
+  python bench_resample.py                          # 오프라인: 변환 품질 + 청크당 CPU
+  python bench_resample.py --live --device 2        # 마이크: 두 경로의 ADC→콜백 지연, 콜백 지터, 오버플로
+ - 오프라인 품질: 통과 대역(300~6000 Hz) 톤 SNR과 리플, 7 kHz 감쇠, 나이퀴스트 너머 톤의 앨리어싱 억제량
+ - --live는 같은 장치를 두 방식으로 차례로 열어서 각각 --seconds 동안 측정
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from bench_common import format_header, format_row, summarize
+from tc_audio import MicrophoneStream, chunk_size
+from tc_dsp import PolyphaseResampler
+
+DEVICE_RATES = (48000, 44100, 32000)
+PASSBAND_TONES = (300, 1000, 3000, 5000, 6000)   # 리플/SNR 측정 대역
+EDGE_TONE = 7000                                 # 전이 대역 시작 부근 감쇠 확인용
+
+
+def tone(freq, rate, seconds, amplitude=0.5):
+    t = np.arange(int(rate * seconds)) / rate
+    return (amplitude * 32767 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def resample_in_chunks(resampler, x, chunk):
+    return np.concatenate([resampler.process(x[pos:pos + chunk]) for pos in range(0, len(x), chunk)])
+
+
+def tone_response(in_rate, out_rate, freq, chunk, seconds=1.0):
+    """🎵 톤 하나를 변환했을 때 (출력 레벨 dB, 이상적인 톤 대비 SNR dB)"""
+    resampler = PolyphaseResampler(in_rate, out_rate)
+    y = resample_in_chunks(resampler, tone(freq, in_rate, seconds), chunk)
+    skip = int(0.05 * out_rate)
+    t = (np.arange(len(y)) / out_rate) - resampler.delay_seconds
+    ideal = 0.5 * 32767 * np.sin(2 * np.pi * freq * t)
+    y, ideal = y[skip:-skip], ideal[skip:-skip]
+    level_db = 20 * np.log10(np.sqrt(np.mean(y ** 2)) / np.sqrt(np.mean(ideal ** 2)) + 1e-12)
+    snr_db = 10 * np.log10(np.mean(ideal ** 2) / (np.mean((y - ideal) ** 2) + 1e-12))
+    return level_db, snr_db
+
+
+def alias_rejection(in_rate, out_rate, chunk, seconds=1.0):
+    """🚫 출력 나이퀴스트 위 톤(출력에 앨리어스로 접혀 들어오는 대역)의 잔여 레벨 dB"""
+    worst = -np.inf
+    for freq in (out_rate * 0.55, out_rate * 0.75, min(in_rate * 0.45, out_rate * 1.2)):
+        resampler = PolyphaseResampler(in_rate, out_rate)
+        y = resample_in_chunks(resampler, tone(freq, in_rate, seconds), chunk)[int(0.05 * out_rate):]
+        level = 20 * np.log10(np.sqrt(np.mean(y ** 2)) / (0.5 * 32767 / np.sqrt(2)) + 1e-12)
+        worst = max(worst, level)
+    return worst
+
+
+def cpu_per_chunk(in_rate, out_rate, chunk, repeats=200):
+    """⏱️ 청크 하나(장치 샘플레이트 기준)를 변환하는 데 걸리는 시간 목록 (초)"""
+    resampler = PolyphaseResampler(in_rate, out_rate)
+    x = np.random.default_rng(0).normal(0, 3000, chunk).astype(np.int16)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        np.rint(resampler.process(x)).astype(np.int16).tobytes()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run_offline(rate, frame_ms):
+    print(f"{'device Hz':>10} | {'delay ms':>8} | {'ripple dB':>9} | {'min SNR dB':>10} | "
+          f"{'7k dB':>6} | {'alias dB':>8} | {'cpu avg ms':>10} | {'cpu max ms':>10} | {'load':>6}")
+    for in_rate in DEVICE_RATES:
+        chunk = chunk_size(in_rate, frame_ms)
+        responses = [tone_response(in_rate, rate, f, chunk) for f in PASSBAND_TONES]
+        levels = [r[0] for r in responses]
+        ripple = max(levels) - min(levels)
+        snr = min(r[1] for r in responses)
+        edge = tone_response(in_rate, rate, EDGE_TONE, chunk)[0]
+        alias = alias_rejection(in_rate, rate, chunk)
+        times = np.asarray(cpu_per_chunk(in_rate, rate, chunk))
+        delay = PolyphaseResampler(in_rate, rate).delay_seconds
+        print(f"{in_rate:>10} | {delay * 1000:>8.2f} | {ripple:>9.3f} | {snr:>10.1f} | {edge:>6.2f} | {alias:>8.1f} | "
+              f"{times.mean() * 1000:>10.3f} | {times.max() * 1000:>10.3f} | {times.mean() / (frame_ms / 1000):>6.2%}")
+
+
+def measure_live(rate, chunk, device, device_rate, seconds):
+    """🎤 실제 장치로 캡처: (ADC→콜백 지연 목록, 콜백 간격 목록, 캡처 통계)"""
+    latencies, intervals = [], []
+    stream = MicrophoneStream(rate, chunk, device_index=device, device_rate=device_rate)
+    fill = stream._fill_buffer
+    last = [None]
+
+    def timed_fill(in_data, frame_count, time_info, status_flags):
+        now = time.monotonic()
+        if last[0] is not None:
+            intervals.append(now - last[0])
+        last[0] = now
+        result = fill(in_data, frame_count, time_info, status_flags)
+        if stream.adc_latency is not None:
+            latencies.append(stream.adc_latency)
+        return result
+
+    stream._fill_buffer = timed_fill
+    with stream:
+        end = time.monotonic() + seconds
+        for _ in stream.generator():
+            if time.monotonic() >= end:
+                break
+        stats = stream.capture_stats()
+    return latencies, intervals, stats
+
+
+def run_live(rate, frame_ms, device, seconds):
+    chunk = chunk_size(rate, frame_ms)
+    nominal = frame_ms / 1000
+    print(format_header("path") + f" | {'jitter ms':>9} | {'overflow':>8} | {'resample':>8}")
+    for label, device_rate in (("direct", None), ("native", "native")):
+        latencies, intervals, stats = measure_live(rate, chunk, device, device_rate, seconds)
+        jitter = float(np.std(np.asarray(intervals) - nominal) * 1000) if intervals else float("nan")
+        load = f"{stats['resample_load']:.2%}" if "resample_load" in stats else "-"
+        print(format_row(f"{label} {stats['capture_rate']}", summarize(latencies))
+              + f" | {jitter:>9.2f} | {stats['input_overflows']:>8} | {load:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="장치 샘플레이트 캡처 + 폴리페이즈 변환 비교")
+    parser.add_argument("--rate", type=int, default=16000)
+    parser.add_argument("--frame-ms", type=int, default=100)
+    parser.add_argument("--live", action="store_true")
+    parser.add_argument("--device", type=int, default=None)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    args = parser.parse_args()
+
+    run_offline(args.rate, args.frame_ms)
+    if args.live:
+        print()
+        run_live(args.rate, args.frame_ms, args.device, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+🔁 bench_restart_gap.py
+STT 세션 재시작 시 오디오 공백 측정: 세션마다 PyAudio를 새로 여는 방식 vs 장치를 계속 열어두는 방식
+
+사용법: python bench_restart_gap.py [--device 2] [--restarts 10]
+ - 마이크가 연결된 PC에서 실행 (네트워크 불필요)
+ - 재시작 시간: 이전 세션 종료 ~ 새 세션 첫 청크 수신
+ - 유실 오디오: 이전 세션 마지막 청크와 새 세션 첫 청크 사이 캡처되지 않은(또는 버려진) 오디오
+"""
+
+import argparse
+import time
+
+from bench_common import summarize
+from tc_audio import MicrophoneStream, PersistentMicrophone, chunk_size
+
+
+def read_chunks(stream, n):
+    """📥 청크 n개를 읽고 (첫 청크 수신 시각, 첫 청크 캡처 시각, 마지막 청크 캡처 시각) 반환"""
+    first_at = first_captured = None
+    for i, _ in enumerate(stream.generator()):
+        if i == 0:
+            first_at = time.monotonic()
+            first_captured = stream.last_captured_at
+        if i + 1 >= n:
+            break
+    return first_at, first_captured, stream.last_captured_at
+
+
+def measure(open_session, restarts, chunks_per_session, chunk_seconds):
+    gaps, losses = [], []
+    last_captured = None
+    closed_at = None
+    for _ in range(restarts + 1):
+        with open_session() as stream:
+            first_at, first_captured, end_captured = read_chunks(stream, chunks_per_session)
+        if closed_at is not None:
+            gaps.append(first_at - closed_at)
+            # 첫 청크의 시작 시각 - 이전 마지막 청크의 끝 시각 = 캡처되지 않은 구간
+            losses.append(max(0.0, (first_captured - chunk_seconds) - last_captured))
+        closed_at = time.monotonic()
+        last_captured = end_captured
+    return gaps, losses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="STT 세션 재시작 공백 측정")
+    parser.add_argument("--device", type=int, default=None)
+    parser.add_argument("--rate", type=int, default=16000)
+    parser.add_argument("--frame-ms", type=int, default=100)
+    parser.add_argument("--restarts", type=int, default=10)
+    parser.add_argument("--chunks", type=int, default=5, help="세션마다 읽을 청크 수")
+    args = parser.parse_args()
+
+    chunk = chunk_size(args.rate, args.frame_ms)
+    chunk_seconds = chunk / args.rate
+
+    fresh = lambda: MicrophoneStream(args.rate, chunk, device_index=args.device)
+    gaps_before, loss_before = measure(fresh, args.restarts, args.chunks, chunk_seconds)
+
+    device = PersistentMicrophone(args.rate, chunk, device_index=args.device).start()
+    try:
+        gaps_after, loss_after = measure(lambda: device.attach(max_age=1.0), args.restarts,
+                                         args.chunks, chunk_seconds)
+    finally:
+        device.stop()
+
+    print(f"{'mode':>12} | {'gap p50 ms':>10} | {'gap max ms':>10} | {'lost p50 ms':>11} | {'lost max ms':>11}")
+    for label, gaps, losses in (("reopen", gaps_before, loss_before), ("persistent", gaps_after, loss_after)):
+        g, l = summarize(gaps), summarize(losses)
+        print(f"{label:>12} | {g['p50']:>10.1f} | {g['max']:>10.1f} | {l['p50']:>11.1f} | {l['max']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
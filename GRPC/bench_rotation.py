@@ -0,0 +1,164 @@
+"""
+🔄 bench_rotation.py
+STT 스트림 교대 재생 하네스: 한도에서 끊고 다시 여는 방식 vs 미리 연 다음 스트림에 겹쳐 보내는 교대 방식
+
+사용법: python bench_rotation.py show_audio.wav --limit 30 --overlap 6 --speed 10
+ - 녹음 오디오를 실제 경로(소스 → VAD → 분배기)로 흘려보내고, 인식 스트림은 흉내 낸다 (네트워크 불필요)
+   흉내 낸 스트림은 발화 하나를 처음부터 끝까지 받았을 때만 그 발화의 최종 결과를 낸다.
+ - 시간(한도/겹침/재연결)은 모두 오디오 시간(초) 기준이라 --speed와 상관없이 같은 결과가 나온다.
+ - restart: 한도에서 스트림을 닫고 --reconnect-ms 뒤에 새 스트림을 연다 (기존 방식)
+   rotate: 한도 전에 다음 스트림을 열어 겹쳐 보내고 발화 경계에서 넘긴다 (SessionRotator)
+ - 발화별로 실행된 횟수를 세어 유실(0회)/중복(2회 이상)과 스트림 사이 오디오 공백을 비교한다
+"""
+
+import argparse
+import threading
+from collections import Counter
+
+from bench_common import read_wav, speech_segments
+from tc_audio import SAMPLE_WIDTH, AudioFanout, FileSource, chunk_size
+from tc_dsp import VoiceActivityGate
+from tc_stt import RecognitionSession, SessionRotator
+
+POLL_S = 0.005
+
+
+class AudioClock:
+    """🕰️ 소스에서 꺼낸 오디오 누적 길이(초)를 시계로 쓴다"""
+
+    def __init__(self, rate):
+        self._rate = rate
+        self.seconds = 0.0
+
+    def track(self, chunks):
+        for chunk in chunks:
+            self.seconds += len(chunk) / SAMPLE_WIDTH / self._rate
+            yield chunk
+
+    def __call__(self):
+        return self.seconds
+
+
+def simulated_session(segments, chunk_seconds, endpoint_s, on_final):
+    """🤖 흉내 낸 인식 스트림: 발화를 시작부터 받았고 끝 + endpoint_s까지 오디오가 오면 최종 결과를 낸다
+
+    요청 스트림이 닫히면 받은 데까지 끝난 발화도 최종 결과로 낸다 (Google이 닫을 때 마무리하는 것과 같음).
+    """
+    def run(sid, reader):
+        first, pending = None, list(enumerate(segments))
+        last = None
+        for _ in reader.generator():
+            last = reader.last_captured_at
+            if first is None:
+                first = last - chunk_seconds
+            while pending and pending[0][1][1] + endpoint_s <= last:
+                index, (start, end) = pending.pop(0)
+                if start >= first:
+                    on_final(sid, end, index)
+        for index, (start, end) in pending:
+            if last is not None and first <= start and end <= last:
+                on_final(sid, end, index)
+    return run
+
+
+def run_restart(fanout, clock, target, limit_s, reconnect_s):
+    """🔁 기존 방식: 한도에서 닫고, 재연결 시간 뒤에 새 스트림을 연다"""
+    sessions, sid = [], 0
+    while True:
+        session = RecognitionSession(sid, fanout.subscribe(), target, clock=clock)
+        sessions.append(session)
+        while session.alive and clock() < session.started_at + limit_s:
+            threading.Event().wait(POLL_S)
+        if not session.alive:
+            break
+        session.close()
+        closed_at = clock()
+        while not fanout.finished and clock() < closed_at + reconnect_s:
+            threading.Event().wait(POLL_S)
+        if fanout.finished:
+            break
+        sid += 1
+    gaps = [max(0.0, b.reader.start_seconds - a.reader.end_seconds) for a, b in zip(sessions, sessions[1:])]
+    return len(gaps), gaps, 0
+
+
+def run_rotate(fanout, clock, target_factory, args):
+    """🔄 교대 방식: SessionRotator"""
+    rotator = None
+    posted = []
+
+    def offer(sid, end, index):
+        rotator.offer(sid, end, index)
+
+    rotator = SessionRotator(fanout, target_factory(offer), post=posted.append,
+                             limit_s=args.limit, overlap_s=args.overlap, pre_roll_s=args.pre_roll,
+                             tolerance=args.tolerance, clock=clock, poll_s=POLL_S)
+    rotator.run(lambda: False)
+    gaps = [info["gap"] for info in rotator.rotations]
+    handovers = sum(info["reason"] == "utterance" for info in rotator.rotations)
+    return len(gaps), gaps, handovers, posted, rotator.arbiter.duplicates
+
+
+def replay(args, segments, mode):
+    """⏩ 한 가지 방식으로 파일 전체를 재생 → (교대 횟수, 공백 목록, 발화 경계 교대 수, 발화별 실행 횟수, 걸러낸 중복)"""
+    chunk = chunk_size(args.rate, args.frame_ms)
+    clock = AudioClock(args.rate)
+    executed = Counter()
+    lock = threading.Lock()
+
+    def post(index):
+        with lock:
+            executed[index] += 1
+
+    def target_factory(on_final):
+        return simulated_session(segments, chunk / args.rate, args.endpoint_ms / 1000, on_final)
+
+    with FileSource(args.path, args.rate, chunk, speed=args.speed) as source:
+        chunks = clock.track(source.generator())
+        if not args.no_vad:
+            chunks = VoiceActivityGate(args.rate).filter(chunks)
+        fanout = AudioFanout(chunks, args.rate, clock, history_s=max(args.pre_roll, 0.1)).start()
+        if mode == "restart":
+            target = target_factory(lambda sid, end, index: post(index))
+            rotations, gaps, handovers = run_restart(fanout, clock, target, args.limit, args.reconnect_ms / 1000)
+            filtered = 0
+        else:
+            rotations, gaps, handovers, posted, filtered = run_rotate(fanout, clock, target_factory, args)
+            for index in posted:
+                post(index)
+    return rotations, gaps, handovers, executed, filtered
+
+
+def main():
+    parser = argparse.ArgumentParser(description="STT 스트림 교대 공백/유실/중복 재생 측정")
+    parser.add_argument("path", help="16bit mono WAV")
+    parser.add_argument("--frame-ms", type=int, default=100)
+    parser.add_argument("--speed", type=float, default=10.0, help="재생 배속 (None 불가: 교대 판단에 시간이 필요)")
+    parser.add_argument("--limit", type=float, default=30.0, help="스트림 길이 한도 (오디오 초, 실제 290)")
+    parser.add_argument("--overlap", type=float, default=6.0, help="겹쳐 보내는 시간 (오디오 초)")
+    parser.add_argument("--pre-roll", type=float, default=1.0)
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--reconnect-ms", type=float, default=1500, help="restart 방식의 재연결 시간")
+    parser.add_argument("--endpoint-ms", type=float, default=300, help="발화 끝 → 최종 결과까지 필요한 오디오")
+    parser.add_argument("--no-vad", action="store_true")
+    args = parser.parse_args()
+
+    pcm, args.rate = read_wav(args.path)
+    segments = speech_segments(pcm, args.rate)
+    print(f"[BENCH] 발화 {len(segments)}개, 오디오 {len(pcm) / args.rate:.1f}초, "
+          f"한도 {args.limit:g}초 / 겹침 {args.overlap:g}초 / 재연결 {args.reconnect_ms:g} ms")
+
+    print(f"{'mode':>8} | {'rotations':>9} | {'boundary':>8} | {'gap max ms':>10} | "
+          f"{'lost':>4} | {'dup':>4} | {'filtered':>8}")
+    for mode in ("restart", "rotate"):
+        rotations, gaps, handovers, executed, filtered = replay(args, segments, mode)
+        lost = sum(1 for index in range(len(segments)) if executed[index] == 0)
+        duplicated = sum(1 for count in executed.values() if count > 1)
+        gap = max(gaps) * 1000 if gaps else 0.0
+        print(f"{mode:>8} | {rotations:>9} | {handovers:>8} | {gap:>10.0f} | "
+              f"{lost:>4} | {duplicated:>4} | {filtered:>8}")
+    print("(gap: 이전 스트림이 받은 마지막 오디오와 다음 스트림이 받은 첫 오디오 사이 VAD 통과 오디오)")
+
+
+if __name__ == "__main__":
+    main()
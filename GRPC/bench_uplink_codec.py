@@ -0,0 +1,93 @@
+"""
+🗜️ bench_uplink_codec.py
+업링크 코덱(LINEAR16 / FLAC / OGG_OPUS)별 전송량, 인코더 CPU, 명령 지연 비교
+
+사용법:
+  python bench_uplink_codec.py director_calls.wav            # 오프라인: 전송량 + 인코더 CPU
+  python bench_uplink_codec.py director_calls.wav --live     # Google 연결: 발화 끝 → 최종 결과 지연 추가
+ - 16bit mono WAV, --live는 5분 이내 파일과 GOOGLE_APPLICATION_CREDENTIALS 필요
+"""
+
+import argparse
+import time
+
+from bench_common import (SendLog, format_header, format_row, match_latencies,
+                          read_wav, speech_end_offsets, summarize)
+from tc_audio import FileSource, UPLINK_CODECS, UplinkEncoder, chunk_size, frame_requests
+
+CODECS = ("LINEAR16", "FLAC", "OGG_OPUS")
+
+
+def encode_offline(path, rate, codec, request_ms):
+    """📦 파일 전체를 최대 속도로 인코딩: (입력 초, 전송 바이트, 인코더 CPU 초)"""
+    with FileSource(path, rate, chunk_size(rate, request_ms), speed=None) as source:
+        frames = frame_requests(source.generator(), rate, target_ms=request_ms, pace=False)
+        if UPLINK_CODECS[codec] is None:
+            raw = sum(len(f) for f in frames)
+            return raw / 2 / rate, raw, 0.0
+        encoder = UplinkEncoder(rate, codec)
+        for _ in encoder.encode(frames):
+            pass
+        return encoder.input_bytes / 2 / rate, encoder.output_bytes, encoder.cpu_seconds
+
+
+def run_live(client, path, rate, codec, request_ms):
+    """🎧 실시간 스트리밍으로 최종 결과 도착 시각 수집"""
+    from google.cloud import speech
+    config = speech.RecognitionConfig(
+        encoding=speech.RecognitionConfig.AudioEncoding[codec],
+        sample_rate_hertz=rate,
+        language_code="en-US"
+    )
+    streaming_config = speech.StreamingRecognitionConfig(config=config, interim_results=False)
+
+    send_log = SendLog(rate)
+    finals = []
+    with FileSource(path, rate, chunk_size(rate, request_ms)) as source:
+        frames = send_log.wrap(frame_requests(source.generator(), rate, target_ms=request_ms))
+        if UPLINK_CODECS[codec] is not None:
+            frames = UplinkEncoder(rate, codec).encode(frames)
+        requests_gen = (speech.StreamingRecognizeRequest(audio_content=bytes(f)) for f in frames)
+        for response in client.streaming_recognize(streaming_config, requests_gen):
+            for result in response.results:
+                if result.is_final:
+                    finals.append((time.monotonic(), result.result_end_time.total_seconds()))
+                    print(f"  🎧 [{codec}] {result.alternatives[0].transcript.strip()}")
+    return finals, send_log
+
+
+def main():
+    parser = argparse.ArgumentParser(description="업링크 코덱 비교")
+    parser.add_argument("wav")
+    parser.add_argument("--codecs", nargs="+", default=list(CODECS), choices=CODECS)
+    parser.add_argument("--request-ms", type=int, default=100)
+    parser.add_argument("--live", action="store_true", help="Google STT로 실제 명령 지연까지 측정")
+    args = parser.parse_args()
+
+    pcm, rate = read_wav(args.wav)
+    print(f"{'codec':>10} | {'kbit/s':>8} | {'ratio':>6} | {'CPU %':>6}")
+    for codec in args.codecs:
+        seconds, sent, cpu = encode_offline(args.wav, rate, codec, args.request_ms)
+        kbps = sent * 8 / 1000 / max(seconds, 1e-9)
+        ratio = sent / max(seconds * rate * 2, 1)
+        print(f"{codec:>10} | {kbps:>8.1f} | {ratio:>6.1%} | {cpu / max(seconds, 1e-9):>6.2%}")
+
+    if not args.live:
+        return
+
+    from google.cloud import speech
+    client = speech.SpeechClient()
+    speech_ends = speech_end_offsets(pcm, rate)
+    rows = []
+    for codec in args.codecs:
+        finals, send_log = run_live(client, args.wav, rate, codec, args.request_ms)
+        rows.append((codec, summarize(match_latencies(finals, speech_ends, send_log))))
+
+    print()
+    print(format_header("codec"))
+    for label, stats in rows:
+        print(format_row(label, stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+🗄️ tc_archive.py
+캡처 오디오 롤링 아카이브 (메모리 맵 세그먼트 파일 + 캡처 시각 인덱스)
+"""
+
+import glob
+import json
+import os
+import threading
+import time
+import wave
+
+import numpy as np
+
+# ✅ 아카이브 기본 설정
+SAMPLE_WIDTH = 2
+SEGMENT_SECONDS = 300       # 세그먼트 파일 하나의 길이
+INDEX_STEP_S = 0.01         # 인덱스 행 최소 간격 (10 ms 프레임까지 구분)
+MARKS_FILE = "commands.log"
+META_FILE = "archive.json"
+
+
+def _segment_paths(directory, slot):
+    base = os.path.join(directory, f"seg_{slot:04d}")
+    return base + ".pcm", base + ".idx"
+
+
+class _Segment:
+    """💾 세그먼트 하나: int16 오디오 파일 + 인덱스 파일 (둘 다 np.memmap)
+
+    인덱스 0행은 [행 수, 세그먼트 순번], 1행부터 [청크 끝 샘플 위치, 청크 끝 캡처 시각(벽시계)].
+    """
+
+    def __init__(self, directory, slot, rate, seconds, mode):
+        self.slot = slot
+        self.rate = rate
+        pcm_path, idx_path = _segment_paths(directory, slot)
+        self.capacity = int(seconds * rate)
+        self.index_capacity = int(seconds / INDEX_STEP_S) + 1
+        self.pcm = np.memmap(pcm_path, dtype=np.int16, mode=mode, shape=(self.capacity,))
+        self.index = np.memmap(idx_path, dtype=np.float64, mode=mode, shape=(self.index_capacity + 1, 2))
+
+    @property
+    def rows(self):
+        return int(self.index[0, 0])
+
+    @property
+    def seq(self):
+        return int(self.index[0, 1])
+
+    @property
+    def length(self):
+        """🔢 기록된 샘플 수"""
+        return int(self.index[self.rows, 0]) if self.rows else 0
+
+    def time_range(self):
+        if not self.rows:
+            return None
+        first_end, first_t = self.index[1]
+        return first_t - first_end / self.rate, self.index[self.rows, 1]
+
+    def reset(self, seq):
+        self.index[0] = (0, seq)
+
+    def append_row(self, end_sample, wall_time):
+        rows = self.rows
+        if rows and (wall_time - self.index[rows, 1] < INDEX_STEP_S or rows >= self.index_capacity):
+            # 너무 촘촘하거나 인덱스가 찼으면 마지막 행을 늘린다
+            self.index[rows] = (end_sample, wall_time)
+            return
+        self.index[rows + 1] = (end_sample, wall_time)
+        self.index[0, 0] = rows + 1
+
+    def locate(self, wall_time):
+        """⏱️ 벽시계 시각 → 세그먼트 안의 샘플 위치"""
+        rows = self.index[1:self.rows + 1]
+        i = min(int(np.searchsorted(rows[:, 1], wall_time)), len(rows) - 1)
+        end_sample, end_t = rows[i]
+        pos = int(round(end_sample - (end_t - wall_time) * self.rate))
+        start = int(rows[i - 1, 0]) if i else 0
+        return min(max(pos, start), int(end_sample))
+
+    def flush(self):
+        self.pcm.flush()
+        self.index.flush()
+
+    def close(self):
+        self.flush()
+        del self.pcm, self.index
+
+
+class AudioArchive:
+    """🗄️ 최근 retain_hours 시간의 캡처 오디오를 디스크에 돌려가며 보관
+
+    - 고정 크기 세그먼트 파일 slots개를 순서대로 재사용한다 (가장 오래된 세그먼트를 덮어씀).
+    - 오디오는 np.memmap에 바로 복사하고, 청크마다 캡처 시각 인덱스 행을 남긴다.
+    - 캡처 시각은 time.monotonic 기준으로 받아서 벽시계(time.time)로 바꿔 저장한다
+      (프로그램을 다시 시작해도 로그의 시각으로 찾을 수 있게).
+    - 같은 디렉터리를 read_only=True로 열면 다른 프로세스에서 구간을 꺼낼 수 있다.
+    """
+
+    def __init__(self, directory, rate, retain_hours=4.0, segment_seconds=SEGMENT_SECONDS, read_only=False):
+        self.directory = directory
+        self.rate = rate
+        self.segment_seconds = segment_seconds
+        self.slots = max(2, int(np.ceil(retain_hours * 3600 / segment_seconds)))
+        self.read_only = read_only
+        self._wall_offset = time.time() - time.monotonic()
+        self._lock = threading.Lock()
+        self._current = None
+        self.written_seconds = 0.0
+        self.write_seconds = 0.0        # 아카이브 쓰기에 쓴 시간 (리더 쓰레드 기준)
+        if not read_only:
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, META_FILE), "w", encoding="utf-8") as f:
+                json.dump({"rate": rate, "segment_seconds": segment_seconds, "retain_hours": retain_hours}, f)
+            self._open_next(self._last_seq() + 1)
+
+    @classmethod
+    def open(cls, directory):
+        """📂 기록 중인(또는 기록된) 아카이브를 읽기 전용으로 열기"""
+        with open(os.path.join(directory, META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(directory, meta["rate"], retain_hours=meta["retain_hours"],
+                   segment_seconds=meta["segment_seconds"], read_only=True)
+
+    def _existing_slots(self):
+        slots = []
+        for path in glob.glob(os.path.join(self.directory, "seg_*.idx")):
+            slot = int(os.path.basename(path)[4:8])
+            if slot < self.slots and os.path.exists(_segment_paths(self.directory, slot)[0]):
+                slots.append(slot)
+        return sorted(slots)
+
+    def _last_seq(self):
+        last = 0
+        for slot in self._existing_slots():
+            segment = _Segment(self.directory, slot, self.rate, self.segment_seconds, "r")
+            last = max(last, segment.seq)
+        return last
+
+    def _open_next(self, seq):
+        if self._current is not None:
+            self._current.close()
+        slot = seq % self.slots
+        pcm_path, _ = _segment_paths(self.directory, slot)
+        mode = "r+" if os.path.exists(pcm_path) else "w+"
+        self._current = _Segment(self.directory, slot, self.rate, self.segment_seconds, mode)
+        self._current.reset(seq)
+
+    def wall_time(self, captured_at):
+        """🕰️ time.monotonic 캡처 시각 → 벽시계 시각"""
+        return captured_at + self._wall_offset
+
+    def write(self, chunk, captured_at=None):
+        """✍️ int16 청크 기록 (captured_at: 청크 끝 캡처 시각, time.monotonic 기준)"""
+        start = time.perf_counter()
+        samples = np.frombuffer(chunk, dtype=np.int16)
+        end_t = self.wall_time(captured_at if captured_at is not None else time.monotonic())
+        with self._lock:
+            pos = 0
+            while pos < len(samples):
+                segment = self._current
+                offset = segment.length
+                n = min(len(samples) - pos, segment.capacity - offset)
+                if n <= 0:
+                    self._open_next(segment.seq + 1)
+                    continue
+                segment.pcm[offset:offset + n] = samples[pos:pos + n]
+                pos += n
+                # 나눠 쓴 앞부분의 끝 시각은 청크 끝 시각에서 거꾸로 계산
+                segment.append_row(offset + n, end_t - (len(samples) - pos) / self.rate)
+        self.written_seconds += len(samples) / self.rate
+        self.write_seconds += time.perf_counter() - start
+
+    def segments(self):
+        """📚 기록이 있는 세그먼트 목록 (오래된 순)"""
+        found = []
+        for slot in self._existing_slots():
+            if self._current is not None and slot == self._current.slot:
+                segment = self._current
+            else:
+                segment = _Segment(self.directory, slot, self.rate, self.segment_seconds, "r")
+            if segment.rows:
+                found.append(segment)
+        return sorted(found, key=lambda s: s.seq)
+
+    def slice(self, start_time, end_time):
+        """✂️ 벽시계 구간 [start_time, end_time]의 오디오 (int16 배열, 끊긴 구간은 이어붙임)"""
+        parts = []
+        with self._lock:
+            for segment in self.segments():
+                first_t, last_t = segment.time_range()
+                if last_t < start_time or first_t > end_time:
+                    continue
+                a = segment.locate(start_time) if start_time > first_t else 0
+                b = segment.locate(end_time) if end_time < last_t else segment.length
+                if b > a:
+                    parts.append(np.array(segment.pcm[a:b]))
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int16)
+
+    def export_wav(self, path, start_time, end_time):
+        """💾 구간을 16bit mono WAV로 저장하고 길이(초)를 반환"""
+        pcm = self.slice(start_time, end_time)
+        with wave.open(path, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(SAMPLE_WIDTH)
+            wf.setframerate(self.rate)
+            wf.writeframes(pcm.tobytes())
+        return len(pcm) / self.rate
+
+    def mark(self, label, captured_at):
+        """📌 명령 실행 기록: 나중에 해당 오디오를 바로 찾을 수 있게 (벽시계 시각, 라벨)을 남긴다"""
+        wall = self.wall_time(captured_at)
+        with open(os.path.join(self.directory, MARKS_FILE), "a", encoding="utf-8") as f:
+            f.write(f"{wall:.3f}\t{label}\n")
+        return wall
+
+    def marks(self):
+        """📌 (벽시계 시각, 라벨) 목록"""
+        path = os.path.join(self.directory, MARKS_FILE)
+        if not os.path.exists(path):
+            return []
+        with open(path, encoding="utf-8") as f:
+            rows = [line.rstrip("\n").split("\t", 1) for line in f if "\t" in line]
+        return [(float(t), label) for t, label in rows]
+
+    def close(self):
+        with self._lock:
+            if self._current is not None:
+                self._current.close()
+                self._current = None
+
+
+class ArchiveRecorder:
+    """🎙️ 오디오 소스(보통 BusSource)를 별도 쓰레드에서 읽어 아카이브에 기록
+
+    캡처 콜백은 버스에 한 번 써넣기만 하고, 디스크 쓰기는 이 쓰레드가 자기 커서로 따라가며 한다.
+    """
+
+    def __init__(self, archive, source):
+        self.archive = archive
+        self._source = source
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        with self._source as stream:
+            for chunk in stream.generator():
+                self.archive.write(chunk, stream.last_captured_at)
+
+    def stop(self):
+        self._source.close()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+        self.archive.close()
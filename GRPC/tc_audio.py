@@ -0,0 +1,1724 @@
+"""
+🎙️ tc_audio.py
+TriCaster 음성 제어용 오디오 캡처 계층 (링버퍼 + 오디오 소스 + 요청 프레이밍)
+"""
+
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+import wave
+from collections import deque
+
+import numpy as np
+
+from tc_dsp import DelayAndSumBeamformer, PolyphaseResampler
+
+try:
+    import pyaudio
+except ImportError:
+    pyaudio = None
+
+try:
+    import alsaaudio
+except ImportError:
+    alsaaudio = None
+
+# ✅ 링버퍼 기본 설정
+SAMPLE_WIDTH = 2          # int16
+BUFFER_SECONDS = 10       # 링버퍼에 보관하는 최대 오디오 길이
+MAX_STAMPS = 8192         # 청크별 캡처 시각 기록 개수 한도
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+# ✅ 공유 메모리 오디오 버스 설정
+BUS_HEADER_WORDS = 8      # magic, rate, 슬롯 크기, 슬롯 수, 쓰기 순번, 종료 플래그, 예비 2
+BUS_POLL_S = 0.005        # 다른 프로세스에서 읽을 때 새 슬롯 확인 간격
+
+# ✅ 입력 레벨 측정
+LEVEL_FLOOR_DBFS = -90.0  # 무음(0) 청크의 표시 레벨
+CLIP_SAMPLE = 32767       # 이 값 이상(절대값)이면 클리핑으로 센다
+
+# ✅ 캡처 장치 감시 (핫플러그)
+DEVICE_WATCHDOG_S = 0.5   # 이 시간 동안 콜백이 없으면 장치가 끊긴 것으로 본다
+DEVICE_RETRY_S = 1.0      # 장치 다시 열기 시도 간격
+WATCHDOG_TICK_S = 0.05
+
+# ✅ PortAudio 콜백 status_flags (pyaudio.paInputUnderflow / paInputOverflow)
+PA_INPUT_UNDERFLOW = 0x1
+PA_INPUT_OVERFLOW = 0x2
+BEAM_BUDGET = 0.1         # 빔포머 처리 시간 한도 (청크 길이 대비, 넘으면 단계를 낮춤)
+
+# ✅ 리눅스 저지연 캡처 백엔드 (PortAudio 콜백 버퍼를 거치지 않음)
+ALSA_PERIOD_MS = 5        # ALSA 주기 길이: 한 번에 읽는 오디오 (작을수록 지연↓, 깨어나는 횟수↑)
+ALSA_PERIODS = 4          # ALSA 하드웨어 버퍼 = 주기 × 이 값
+PIPEWIRE_LATENCY_MS = 5   # pw-record 노드 지연 (quantum)
+
+# ✅ 요청 프레이밍 설정
+LOW_LATENCY_FRAME_MS = (10, 20, 40)   # 저지연 모드 캡처 프레임 길이
+MAX_REQUEST_BYTES = 25 * 1024         # streaming_recognize 요청당 오디오 한도
+
+# ✅ 업링크 코덱: RecognitionConfig.AudioEncoding 이름 → soundfile (format, subtype)
+UPLINK_CODECS = {
+    "LINEAR16": None,
+    "FLAC": ("FLAC", "PCM_16"),
+    "OGG_OPUS": ("OGG", "OPUS"),
+}
+SFC_SET_OGG_PAGE_LATENCY_MS = 0x1302  # libsndfile ≥ 1.1: Ogg 페이지를 모아두는 최대 시간
+OGG_PAGE_LATENCY_MS = 20.0
+
+
+class AudioRingBuffer:
+    """🎚️ 사전 할당된 int16 링버퍼 (단일 생산자 / 단일 소비자)
+
+    - 생산자(PortAudio 콜백)는 write()만, 소비자(요청 제너레이터)는 read()만 호출한다.
+    - 쓰기/읽기 위치는 단조 증가하는 바이트 카운터이며, 각자 자기 카운터만 갱신한다.
+    - read()는 내부 버퍼에 대한 memoryview를 복사 없이 돌려준다.
+      drop_newest/block 정책에서는 다음 read() 호출 전까지 view가 덮어써지지 않는다.
+      drop_oldest 정책에서는 생산자가 버퍼를 한 바퀴 돌기 전까지만 유효하다.
+    - block 정책은 공간이 생길 때까지 생산자를 기다리게 한다 (파일 재생 최대 속도 모드용).
+    - 청크마다 캡처 시각을 기록하고, read(max_age=...)는 그보다 오래된 청크를 버린다.
+    """
+
+    def __init__(self, capacity_bytes, overflow="drop_oldest"):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"지원하지 않는 overflow 정책: {overflow}")
+        capacity_bytes -= capacity_bytes % SAMPLE_WIDTH
+        self._capacity = capacity_bytes
+        self._buf = bytearray(capacity_bytes)
+        self._view = memoryview(self._buf)
+        self._overflow = overflow
+        self._write_pos = 0
+        self._read_pos = 0
+        self._free_pos = 0        # 이 위치 이전은 소비자가 다 쓴 구간 (덮어써도 됨)
+        self._stamps = deque(maxlen=MAX_STAMPS)   # (청크 끝 위치, 캡처 시각)
+        self._interrupted = False
+        self._data_ready = threading.Event()
+        self._space_ready = threading.Event()
+        self.closed = False
+        self.overflow_count = 0
+        self.dropped_bytes = 0
+        self.stale_bytes = 0
+        self.last_captured_at = None
+        self.peak_depth = 0
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    def depth(self):
+        """📏 아직 읽지 않은 바이트 수"""
+        return min(self._write_pos - self._read_pos, self._capacity)
+
+    def take_peak_depth(self):
+        """📏 마지막 호출 이후 가장 많이 밀렸던 바이트 수를 반환하고 초기화"""
+        peak, self.peak_depth = self.peak_depth, self.depth()
+        return peak
+
+    def write(self, data, captured_at=None):
+        """✍️ 생산자 쪽: 오디오 블록을 링버퍼에 복사 (오버플로 정책 적용)"""
+        if captured_at is None:
+            captured_at = time.monotonic()
+        data = memoryview(data)
+        n = len(data)
+        if self.closed or n == 0:
+            return False
+        if n > self._capacity:
+            data = data[n - self._capacity:]
+            n = self._capacity
+
+        if self._write_pos + n - self._free_pos > self._capacity:
+            if self._overflow == "block":
+                while self._write_pos + n - self._free_pos > self._capacity:
+                    self._space_ready.clear()
+                    if self.closed:
+                        return False
+                    if self._write_pos + n - self._free_pos <= self._capacity:
+                        break
+                    self._space_ready.wait(0.1)
+            else:
+                self.overflow_count += 1
+                if self._overflow == "drop_newest":
+                    self.dropped_bytes += n
+                    return False
+                # drop_oldest: 그대로 덮어쓰고, 소비자가 read() 시점에 밀린 구간을 건너뛴다
+
+        start = self._write_pos % self._capacity
+        first = min(n, self._capacity - start)
+        self._view[start:start + first] = data[:first]
+        if first < n:
+            self._view[:n - first] = data[first:]
+        # 데이터 복사와 캡처 시각 기록이 끝난 뒤에 쓰기 위치를 공개한다
+        self._stamps.append((self._write_pos + n, captured_at))
+        self._write_pos += n
+        depth = self._write_pos - self._read_pos
+        if depth > self.peak_depth:
+            self.peak_depth = min(depth, self._capacity)
+        self._data_ready.set()
+        return True
+
+    def read(self, timeout=None, max_age=None):
+        """📤 소비자 쪽: 읽을 수 있는 연속 구간을 memoryview로 반환
+
+        닫혔으면 None, timeout 안에 데이터가 없으면 빈 memoryview를 반환한다.
+        max_age(초)를 주면 캡처된 지 그보다 오래된 청크는 보내지 않고 버린다.
+        """
+        while True:
+            self._data_ready.clear()
+            view = self._take(max_age)
+            if view is not None:
+                return view
+            if self.closed:
+                return None
+            if not self._data_ready.wait(timeout) or self._interrupted:
+                self._interrupted = False
+                return self._view[0:0]
+
+    def interrupt(self):
+        """⏸️ 대기 중인 read()를 빈 view로 즉시 돌려보낸다 (버퍼는 계속 사용)"""
+        self._interrupted = True
+        self._data_ready.set()
+
+    def _take(self, max_age=None):
+        # 직전에 넘겨준 view 구간을 반납한다
+        self._free_pos = self._read_pos
+        self._space_ready.set()
+        write_pos = self._write_pos
+        backlog = write_pos - self._read_pos
+        if backlog <= 0:
+            return None
+        if backlog > self._capacity:
+            # 생산자가 한 바퀴 앞질렀다 → 가장 오래된 구간 폐기
+            skipped = backlog - self._capacity
+            self.dropped_bytes += skipped
+            self._read_pos += skipped
+
+        if max_age is not None:
+            # ⏳ 전송 시점 기준으로 너무 오래된 청크는 인식기에 넣지 않는다
+            cutoff = time.monotonic() - max_age
+            while self._stamps and self._stamps[0][1] < cutoff:
+                end_pos, captured_at = self._stamps.popleft()
+                end_pos = min(end_pos, write_pos)
+                if end_pos > self._read_pos:
+                    self.stale_bytes += end_pos - self._read_pos
+                    self._read_pos = end_pos
+                self.last_captured_at = captured_at
+
+        backlog = write_pos - self._read_pos
+        if backlog <= 0:
+            return None
+        start = self._read_pos % self._capacity
+        n = min(backlog, self._capacity - start)
+        self._read_pos += n
+        while self._stamps and self._stamps[0][0] <= self._read_pos:
+            self.last_captured_at = self._stamps.popleft()[1]
+        return self._view[start:start + n]
+
+    def discard(self):
+        """🗑️ 소비자 쪽: 밀린 오디오를 모두 버리고 버린 바이트 수를 반환"""
+        write_pos = self._write_pos
+        skipped = max(0, min(write_pos - self._read_pos, self._capacity))
+        self.stale_bytes += skipped
+        self._read_pos = write_pos
+        self._free_pos = write_pos
+        self._space_ready.set()
+        while self._stamps and self._stamps[0][0] <= write_pos:
+            self.last_captured_at = self._stamps.popleft()[1]
+        return skipped
+
+    def close(self):
+        """🛑 버퍼 종료: 대기 중인 소비자를 깨운다"""
+        self.closed = True
+        self._data_ready.set()
+        self._space_ready.set()
+
+
+class SharedAudioBus:
+    """📡 공유 메모리 오디오 버스 (작성자 하나 / 읽는 쪽 여럿, 프로세스 간 공유 가능)
+
+    - 작성자는 청크를 고정 크기 슬롯에 한 번만 써넣고(publish), 읽는 쪽은 각자 자기 커서로 읽는다.
+      읽는 쪽마다 복사하지 않으며, 느린 리더가 있어도 작성자는 기다리지 않는다.
+    - 슬롯마다 (순번, 캡처 시각, 길이)를 기록한다. 쓰는 동안은 순번을 EMPTY_SEQ로 바꿔 두었다가
+      다 쓴 뒤에 공개하므로 리더는 덮어써지는 중인 슬롯을 건너뛸 수 있다 (seqlock 방식).
+    - 다른 프로세스에서는 SharedAudioBus.attach(name)으로 같은 버스를 열어서 읽는다.
+    """
+
+    EMPTY_SEQ = np.iinfo(np.uint64).max
+    MAGIC = 0x54434255   # "TCBU"
+
+    def __init__(self, rate, slot_samples, seconds=BUFFER_SECONDS, name=None, _attach=False, _owner=False):
+        from multiprocessing import shared_memory
+        if _attach:
+            self._shm = shared_memory.SharedMemory(name=name)
+            if not _owner and self._shm.name not in _created_buses:
+                _untrack_shared_memory(self._shm)
+            header = np.ndarray(BUS_HEADER_WORDS, dtype=np.uint64, buffer=self._shm.buf)
+            magic, rate, slot_bytes, n_slots = (int(word) for word in header[:4])
+            del header      # 헤더 view가 남아 있으면 close()가 BufferError를 낸다
+            if magic != self.MAGIC:
+                self._shm.close()
+                raise ValueError(f"오디오 버스가 아닙니다: {name}")
+        else:
+            slot_bytes = slot_samples * SAMPLE_WIDTH
+            n_slots = max(4, int(seconds * rate / slot_samples))
+            size = (BUS_HEADER_WORDS + 3 * n_slots) * 8 + slot_bytes * n_slots
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            _created_buses.add(self._shm.name)
+        self.owner = not _attach or _owner
+        self.name = self._shm.name
+        self._readers = []
+        self.rate = rate
+        self.slot_bytes = slot_bytes
+        self.n_slots = n_slots
+
+        buf = self._shm.buf
+        self._header = np.ndarray(BUS_HEADER_WORDS, dtype=np.uint64, buffer=buf)
+        offset = BUS_HEADER_WORDS * 8
+        self._seqs = np.ndarray(n_slots, dtype=np.uint64, buffer=buf, offset=offset)
+        self._stamps = np.ndarray(n_slots, dtype=np.float64, buffer=buf, offset=offset + 8 * n_slots)
+        self._sizes = np.ndarray(n_slots, dtype=np.uint64, buffer=buf, offset=offset + 16 * n_slots)
+        data_offset = offset + 24 * n_slots
+        self._data = buf[data_offset:data_offset + slot_bytes * n_slots]
+        if self.owner:
+            self._seqs[:] = self.EMPTY_SEQ
+            self._header[:] = 0
+            self._header[:4] = (self.MAGIC, rate, slot_bytes, n_slots)
+
+        self._published = threading.Condition()
+        self.published_bytes = 0
+
+    @classmethod
+    def attach(cls, name, owner=False):
+        """🔗 다른 프로세스가 만든 버스에 붙기 (읽기 전용으로 사용)
+
+        owner=True는 이전 실행이 남긴 버스를 넘겨받아 지울 때 쓴다 (release()에서 unlink).
+        """
+        return cls(None, None, name=name, _attach=True, _owner=owner)
+
+    @property
+    def write_seq(self):
+        """🔢 다음에 쓸 슬롯 순번 (= 지금까지 공개된 슬롯 수)"""
+        return int(self._header[4])
+
+    @property
+    def closed(self):
+        return bool(self._header[5])
+
+    def publish(self, data, captured_at=None):
+        """📣 작성자 쪽: 청크를 슬롯에 써넣고 공개 (슬롯보다 길면 나눠서 쓴다)"""
+        if captured_at is None:
+            captured_at = time.monotonic()
+        data = memoryview(data).cast("B")
+        n = len(data)
+        if n == 0 or self.closed:
+            return False
+        seq = self.write_seq
+        pieces = range(0, n, self.slot_bytes)
+        for i, pos in enumerate(pieces):
+            piece = data[pos:pos + self.slot_bytes]
+            slot = seq % self.n_slots
+            self._seqs[slot] = self.EMPTY_SEQ
+            start = slot * self.slot_bytes
+            self._data[start:start + len(piece)] = piece
+            # 나눠 쓴 조각의 캡처 시각은 청크 끝 시각에서 거꾸로 계산
+            self._stamps[slot] = captured_at - (n - pos - len(piece)) / SAMPLE_WIDTH / self.rate
+            self._sizes[slot] = len(piece)
+            self._seqs[slot] = seq
+            seq += 1
+            self._header[4] = seq
+        self.published_bytes += n
+        with self._published:
+            self._published.notify_all()
+        return True
+
+    def wait(self, timeout):
+        """⏳ 새 슬롯 공개를 기다린다 (다른 프로세스의 작성자는 BUS_POLL_S 간격으로 확인)"""
+        with self._published:
+            self._published.wait(timeout if self.owner else min(timeout, BUS_POLL_S))
+
+    def wake(self):
+        with self._published:
+            self._published.notify_all()
+
+    def reader(self, from_start=False):
+        """👀 이 버스를 읽는 독립 커서 생성"""
+        reader = BusReader(self, from_start=from_start)
+        self._readers.append(reader)
+        return reader
+
+    def close(self):
+        """🛑 작성자 쪽: 더 쓰지 않음을 알린다 (리더는 남은 슬롯을 다 읽으면 끝난다)"""
+        if self.owner and not self.closed:
+            self._header[5] = 1
+        self.wake()
+
+    def release(self):
+        """🧹 이 프로세스의 공유 메모리 매핑 해제 (작성자면 세그먼트 삭제)
+
+        매핑을 닫기 전에 리더가 마지막으로 넘겨준 view와 헤더/슬롯 배열을 모두 놓는다.
+        """
+        for reader in self._readers:
+            reader.release_view()
+        self._readers = []
+        del self._header, self._seqs, self._stamps, self._sizes
+        try:
+            self._data.release()
+            self._shm.close()
+        except BufferError:
+            pass    # 아직 쓰는 중인 view가 있으면 매핑은 GC에 맡긴다
+        if self.owner:
+            self._shm.unlink()
+
+
+_created_buses = set()      # 이 프로세스가 만든 버스 이름 (자기 버스에 붙을 때는 등록을 지우면 안 됨)
+
+
+def _untrack_shared_memory(shm):
+    """🧷 attach한 쪽 프로세스가 끝날 때 resource_tracker가 세그먼트를 지우지 않게 한다
+
+    만든 프로세스의 등록까지 지우면 나중에 unlink()가 KeyError 경고를 내므로,
+    다른 프로세스가 만든 세그먼트에만 호출한다.
+    """
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+
+class BusReader:
+    """👀 SharedAudioBus 읽기 커서 (AudioRingBuffer의 소비자 쪽과 같은 인터페이스)
+
+    AudioSource(buffer=...)에 넣으면 버스를 읽는 오디오 소스가 된다.
+    read()는 슬롯에 대한 memoryview를 복사 없이 돌려주며, 작성자가 버스를 한 바퀴 돌기 전까지 유효하다.
+    한 바퀴 이상 뒤처지면 밀린 슬롯을 건너뛰고 dropped_bytes에 센다 (작성자는 기다리지 않음).
+    """
+
+    def __init__(self, bus, from_start=False):
+        self._bus = bus
+        self._next = max(0, bus.write_seq - bus.n_slots) if from_start else bus.write_seq
+        self._interrupted = False
+        self._view = None         # 마지막으로 넘겨준 슬롯 view (버스 매핑 해제 전에 놓는다)
+        self.closed = False
+        self.overflow_count = 0
+        self.dropped_bytes = 0
+        self.stale_bytes = 0
+        self.last_captured_at = None
+        self.peak_depth = 0
+
+    @property
+    def capacity(self):
+        return self._bus.slot_bytes * self._bus.n_slots
+
+    def depth(self):
+        return min(self._bus.write_seq - self._next, self._bus.n_slots) * self._bus.slot_bytes
+
+    def take_peak_depth(self):
+        peak, self.peak_depth = self.peak_depth, self.depth()
+        return peak
+
+    def read(self, timeout=None, max_age=None):
+        """📤 다음 슬롯을 memoryview로 반환 (닫혔으면 None, timeout 동안 없으면 빈 view)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            view = self._take(max_age)
+            if view is not None:
+                return view
+            if self.closed or self._bus.closed:
+                return None
+            if self._interrupted:
+                self._interrupted = False
+                return memoryview(b"")
+            remaining = 1.0 if deadline is None else deadline - time.monotonic()
+            if remaining <= 0:
+                return memoryview(b"")
+            self._bus.wait(remaining)
+
+    def _take(self, max_age=None):
+        bus = self._bus
+        cutoff = None if max_age is None else time.monotonic() - max_age
+        while True:
+            write_seq = bus.write_seq
+            backlog = write_seq - self._next
+            if backlog <= 0:
+                return None
+            self.peak_depth = max(self.peak_depth, min(backlog, bus.n_slots) * bus.slot_bytes)
+            if backlog > bus.n_slots:
+                # 작성자가 한 바퀴 앞질렀다 → 덮어써진 슬롯 폐기
+                skipped = backlog - bus.n_slots
+                self.overflow_count += 1
+                self.dropped_bytes += skipped * bus.slot_bytes
+                self._next += skipped
+            seq = self._next
+            slot = seq % bus.n_slots
+            if bus._seqs[slot] != seq:
+                continue        # 읽는 사이에 덮어써짐 → 다시 계산
+            size = int(bus._sizes[slot])
+            captured_at = float(bus._stamps[slot])
+            if bus._seqs[slot] != seq:
+                continue
+            self._next = seq + 1
+            self.last_captured_at = captured_at
+            if cutoff is not None and captured_at < cutoff:
+                self.stale_bytes += size
+                continue
+            start = slot * bus.slot_bytes
+            self._view = bus._data[start:start + size]
+            return self._view
+
+    def interrupt(self):
+        self._interrupted = True
+        self._bus.wake()
+
+    def discard(self):
+        """🗑️ 밀린 슬롯을 모두 건너뛰고 건너뛴 바이트 수를 반환"""
+        write_seq = self._bus.write_seq
+        skipped = max(0, min(write_seq - self._next, self._bus.n_slots)) * self._bus.slot_bytes
+        self.stale_bytes += skipped
+        self._next = write_seq
+        return skipped
+
+    def close(self):
+        self.closed = True
+        self._bus.wake()
+
+    def release_view(self):
+        """🧹 마지막으로 넘겨준 view를 놓는다 (이후 그 view에 접근하면 ValueError)"""
+        if self._view is not None:
+            try:
+                self._view.release()
+            except BufferError:
+                pass    # 소비자가 아직 이 view 위에 배열을 들고 있다 → 매핑 해제는 GC에 맡김
+            self._view = None
+
+
+class InputLevel:
+    """📶 캡처 청크의 RMS/피크 레벨 (캡처 쪽에서 청크당 한 번만 계산)
+
+    update()는 캡처 콜백에서, take()는 화면 갱신 타이머에서 호출한다.
+    take()는 마지막 호출 이후 가장 큰 값을 돌려주므로 프레임이 아무리 짧아도 피크를 놓치지 않는다.
+    """
+
+    def __init__(self):
+        self._rms = 0.0
+        self._peak = 0
+        self._clipped = 0
+        self.updated_at = None
+
+    def update(self, data, captured_at=None):
+        samples = np.frombuffer(data, dtype=np.int16)
+        if not len(samples):
+            return
+        x = samples.astype(np.float32)
+        rms = float(np.sqrt(np.dot(x, x) / len(x)))
+        peak = int(np.abs(samples, dtype=np.int32).max())
+        # 읽는 쪽과 락 없이 주고받으므로 각 값은 최대값으로만 갱신한다
+        if rms > self._rms:
+            self._rms = rms
+        if peak > self._peak:
+            self._peak = peak
+        if peak >= CLIP_SAMPLE:
+            self._clipped += 1
+        self.updated_at = captured_at if captured_at is not None else time.monotonic()
+
+    @staticmethod
+    def _dbfs(value):
+        return float(20.0 * np.log10(value / 32768.0)) if value > 0 else LEVEL_FLOOR_DBFS
+
+    def take(self):
+        """📤 마지막 호출 이후 최대 (RMS dBFS, 피크 dBFS, 클리핑 청크 수)를 반환하고 초기화"""
+        rms, peak, clipped = self._rms, self._peak, self._clipped
+        self._rms, self._peak, self._clipped = 0.0, 0, 0
+        return max(self._dbfs(rms), LEVEL_FLOOR_DBFS), max(self._dbfs(peak), LEVEL_FLOOR_DBFS), clipped
+
+
+class AudioSource:
+    """🎧 오디오 소스 공통 인터페이스
+
+    모든 소스는 with 블록으로 열고 닫으며, generator()는 int16 mono 오디오를
+    bytes-like 청크로 내보낸다 (소스가 끝나거나 닫히면 종료).
+    서브클래스는 _open()/_close()를 구현하고 캡처한 오디오를 _push()로 넣는다.
+    bus(SharedAudioBus)를 주면 링버퍼 대신 버스에 한 번만 써넣고, 이 소스도 버스 리더로 읽는다.
+    thread_hook은 오디오를 넣는 쓰레드(PortAudio 콜백 등)에서 _push() 때마다 호출된다 (쓰레드 튜닝용).
+    """
+
+    realtime = True     # False면 실시간보다 빠르게 재생되는 소스 (요청 페이싱 불필요)
+
+    def __init__(self, rate, chunk, buffer_seconds=BUFFER_SECONDS, overflow="drop_oldest",
+                 max_age=None, on_stale=None, buffer=None, bus=None, thread_hook=None):
+        self._rate = rate
+        self._chunk = chunk
+        self._max_age = max_age
+        self._on_stale = on_stale
+        self._publish_bus = bus
+        self._thread_hook = thread_hook
+        self.stale_drops = 0
+        self.level = InputLevel()
+        if bus is not None:
+            if bus.rate != rate:
+                raise ValueError(f"오디오 버스 샘플레이트 불일치: {bus.rate} != {rate}")
+            buffer = bus.reader()
+        if buffer is None:
+            # 청크 크기의 배수로 잡아서 청크가 버퍼 끝에서 잘리지 않게 한다
+            chunk_bytes = chunk * SAMPLE_WIDTH
+            n_chunks = max(2, int(buffer_seconds * rate / chunk))
+            buffer = AudioRingBuffer(n_chunks * chunk_bytes, overflow=overflow)
+        self._buff = buffer
+        self.closed = True
+
+    def __enter__(self):
+        self._open()
+        self.closed = False
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+        self._close()
+
+    def close(self):
+        """🛑 generator()를 끝낸다 (다른 쓰레드에서 호출해도 안전)"""
+        self.closed = True
+        self._buff.close()
+
+    def _open(self):
+        raise NotImplementedError
+
+    def _close(self):
+        raise NotImplementedError
+
+    @property
+    def rate(self):
+        return self._rate
+
+    @property
+    def chunk(self):
+        return self._chunk
+
+    @property
+    def overflow_count(self):
+        return self._buff.overflow_count
+
+    @property
+    def last_captured_at(self):
+        """⏱️ 마지막으로 꺼낸 청크의 캡처 시각 (time.monotonic 기준)"""
+        return self._buff.last_captured_at
+
+    @property
+    def buffered_seconds(self):
+        """📏 링버퍼에 아직 읽지 않고 쌓여 있는 오디오 길이(초)"""
+        return self._bytes_to_seconds(self._buff.depth())
+
+    def capture_stats(self):
+        """📊 캡처 경로 계측값 (마지막 호출 이후 최대 버퍼 깊이 포함)"""
+        return {
+            "input_overflows": 0,
+            "input_underflows": 0,
+            "ring_overflows": self._buff.overflow_count,
+            "dropped_seconds": self._bytes_to_seconds(self._buff.dropped_bytes),
+            "stale_seconds": self._bytes_to_seconds(self._buff.stale_bytes),
+            "buffered_seconds": self.buffered_seconds,
+            "peak_buffered_seconds": self._bytes_to_seconds(self._buff.take_peak_depth()),
+            "adc_latency": None,
+            "max_adc_latency": None,
+        }
+
+    def discard_backlog(self):
+        """🗑️ 세션 재시작 전에 밀린 오디오를 폐기하고 폐기한 길이(초)를 반환"""
+        return self._bytes_to_seconds(self._buff.discard())
+
+    def _bytes_to_seconds(self, n_bytes):
+        return n_bytes / SAMPLE_WIDTH / self._rate
+
+    def _push(self, data, captured_at=None):
+        if self._thread_hook is not None:
+            self._thread_hook()
+        self.level.update(data, captured_at)
+        if self._publish_bus is not None:
+            return self._publish_bus.publish(data, captured_at)
+        return self._buff.write(data, captured_at)
+
+    def _finish(self):
+        """🏁 소스 끝: 남은 오디오를 다 읽으면 generator()가 종료된다"""
+        if self._publish_bus is not None:
+            self._publish_bus.close()
+        else:
+            self._buff.close()
+
+    def generator(self):
+        """🔁 쌓여 있는 오디오를 한 번에 복사 없이(memoryview) 넘겨준다"""
+        while not self.closed:
+            stale_before = self._buff.stale_bytes
+            chunk = self._buff.read(timeout=0.5, max_age=self._max_age)
+            stale = self._buff.stale_bytes - stale_before
+            if stale:
+                self.stale_drops += 1
+                if self._on_stale:
+                    self._on_stale(self._bytes_to_seconds(stale))
+            if chunk is None:
+                return
+            if not chunk:
+                continue
+            yield chunk
+
+
+class MicrophoneStream(AudioSource):
+    """🎤 마이크 입력을 STT 스트리밍용으로 처리
+
+    콜백마다 PortAudio의 입력 오버플로/언더플로 플래그를 세고,
+    time_info의 ADC 캡처 시각을 time.monotonic 기준으로 바꿔서 청크와 함께 기록한다.
+    device_rate를 주면 장치를 그 샘플레이트("native" = 장치 기본값)로 열고,
+    콜백 안에서 폴리페이즈 필터로 rate까지 변환한다 (OS 쪽 리샘플링 지연/지터 회피).
+    mic_array(MicArray)를 주면 장치를 다채널로 열고 콜백 안에서 지연-합 빔포머로 모노를 만든다
+    (리샘플링 전, 장치 샘플레이트에서). 장치 채널이 모자라면 기존처럼 모노로 연다.
+    """
+
+    def __init__(self, rate, chunk, device_index=None, device_rate=None, mic_array=None,
+                 beam_budget=BEAM_BUDGET, **kwargs):
+        super().__init__(rate, chunk, **kwargs)
+        self._device_index = device_index
+        self._device_rate = device_rate
+        self._capture_rate = rate
+        self._resampler = None
+        self._mic_array = mic_array
+        self._beam_budget = beam_budget
+        self._beamformer = None
+        self._channels = 1
+        self.resample_calls = 0
+        self.resample_seconds = 0.0
+        self.resample_max = 0.0
+        self.input_overflows = 0
+        self.input_underflows = 0
+        self.adc_latency = None       # 마지막 청크: 끝 샘플 ADC 캡처 → 콜백 실행까지 걸린 시간(초)
+        self.max_adc_latency = 0.0
+        self.captured_seconds = 0.0   # 장치에서 받은 오디오 누적 길이 (처리 부하 계산용)
+
+    def _open(self, interface=None):
+        if pyaudio is None:
+            raise RuntimeError("pyaudio가 설치되어 있지 않아 마이크를 열 수 없습니다.")
+        self._audio_interface = interface or pyaudio.PyAudio()
+        self._capture_rate = self._resolve_device_rate()
+        max_channels = self._device_info()["maxInputChannels"] if self._mic_array is not None else 1
+        self._prepare_processing(max_channels)
+        self._audio_stream = self._audio_interface.open(
+            format=pyaudio.paInt16,
+            channels=self._channels,
+            rate=self._capture_rate,
+            input=True,
+            input_device_index=self._device_index,
+            frames_per_buffer=int(round(self._chunk * self._capture_rate / self._rate)),
+            stream_callback=self._fill_buffer,
+        )
+
+    def _prepare_processing(self, max_channels):
+        """🧰 캡처 샘플레이트/장치 채널 수가 정해진 뒤 리샘플러와 빔포머 준비"""
+        self._resampler = None
+        if self._capture_rate != self._rate:
+            self._resampler = PolyphaseResampler(self._capture_rate, self._rate)
+        self._beamformer = None
+        self._channels = 1
+        if self._mic_array is not None and max_channels >= self._mic_array.device_channels:
+            self._channels = self._mic_array.device_channels
+            self._beamformer = DelayAndSumBeamformer(self._capture_rate, self._mic_array, budget=self._beam_budget)
+
+    def _resolve_device_rate(self):
+        """🎚️ 실제로 장치를 열 샘플레이트"""
+        if self._device_rate is None:
+            return self._rate
+        if self._device_rate == "native":
+            return int(self._device_info()["defaultSampleRate"])
+        return int(self._device_rate)
+
+    def _device_info(self):
+        if self._device_index is None:
+            return self._audio_interface.get_default_input_device_info()
+        return self._audio_interface.get_device_info_by_index(self._device_index)
+
+    @property
+    def capture_rate(self):
+        return self._capture_rate
+
+    def _close(self):
+        self._audio_stream.stop_stream()
+        self._audio_stream.close()
+        self._audio_interface.terminate()
+
+    def _fill_buffer(self, in_data, frame_count, time_info, status_flags):
+        if status_flags & PA_INPUT_OVERFLOW:
+            self.input_overflows += 1
+        if status_flags & PA_INPUT_UNDERFLOW:
+            self.input_underflows += 1
+        self._deliver(in_data, frame_count, self._adc_to_monotonic(time_info, frame_count))
+        return None, pyaudio.paContinue
+
+    def _deliver(self, in_data, frame_count, captured_at):
+        """📤 장치에서 받은 청크 → (빔포밍) → (리샘플링) → 링버퍼 (백엔드 공통)"""
+        self.captured_seconds += frame_count / self._capture_rate
+        if self._beamformer is not None:
+            in_data, captured_at = self._beamform(in_data, captured_at)
+        if self._resampler is not None:
+            in_data, captured_at = self._resample(in_data, captured_at)
+        self._push(in_data, captured_at)
+
+    def _resample(self, in_data, captured_at):
+        """🔁 장치 샘플레이트 → rate 변환 (청크당 CPU 시간 기록, 필터 지연만큼 캡처 시각 보정)"""
+        start = time.perf_counter()
+        samples = np.frombuffer(in_data, dtype=np.int16)
+        out = np.clip(np.rint(self._resampler.process(samples)), -32768, 32767).astype(np.int16).tobytes()
+        elapsed = time.perf_counter() - start
+        self.resample_calls += 1
+        self.resample_seconds += elapsed
+        self.resample_max = max(self.resample_max, elapsed)
+        return out, captured_at - self._resampler.delay_seconds
+
+    def _beamform(self, in_data, captured_at):
+        """🎯 다채널(인터리브) 청크 → 빔포머 모노 청크 (빔포머 지연만큼 캡처 시각 보정)"""
+        frames = np.frombuffer(in_data, dtype=np.int16).reshape(-1, self._channels)
+        out = np.clip(np.rint(self._beamformer.process(frames)), -32768, 32767).astype(np.int16).tobytes()
+        return out, captured_at - self._beamformer.delay_seconds
+
+    def _adc_to_monotonic(self, time_info, frame_count):
+        """⏱️ 청크 마지막 샘플의 ADC 캡처 시각 → time.monotonic 기준
+
+        PortAudio 스트림 시계와 monotonic의 차이는 콜백 시점의 current_time으로 맞춘다.
+        ADC 시각을 주지 않는 호스트 API(0 반환)에서는 콜백 시각을 그대로 쓴다.
+        """
+        now = time.monotonic()
+        adc_time = time_info.get("input_buffer_adc_time", 0.0) if time_info else 0.0
+        current_time = time_info.get("current_time", 0.0) if time_info else 0.0
+        if adc_time <= 0.0 or current_time <= 0.0:
+            return now
+        captured_at = min(now, now - (current_time - adc_time) + frame_count / self._capture_rate)
+        self.adc_latency = now - captured_at
+        self.max_adc_latency = max(self.max_adc_latency, self.adc_latency)
+        return captured_at
+
+    def capture_stats(self):
+        stats = super().capture_stats()
+        stats.update(input_overflows=self.input_overflows, input_underflows=self.input_underflows,
+                     adc_latency=self.adc_latency, max_adc_latency=self.max_adc_latency,
+                     capture_rate=self._capture_rate)
+        if self._mic_array is not None:
+            if self._beamformer is None:
+                stats.update(beam_mode="mono (장치 채널 부족)")
+            else:
+                beam = self._beamformer.stats()
+                stats.update(beam_mode=beam["mode"], beam_channels=beam["channels"], beam_avg=beam["avg"],
+                             beam_max=beam["max"], beam_load=beam["avg"] * beam["calls"] / self.captured_seconds
+                             if self.captured_seconds else 0.0, beam_degradations=beam["degradations"])
+        if self.resample_calls:
+            stats.update(resample_avg=self.resample_seconds / self.resample_calls,
+                         resample_max=self.resample_max,
+                         resample_load=self.resample_seconds / self.captured_seconds)
+        return stats
+
+
+class PersistentMicrophone(MicrophoneStream):
+    """🎙️ 프로그램이 끝날 때까지 열어두는 캡처 장치
+
+    STT 세션을 다시 시작할 때마다 PyAudio를 새로 열고 닫지 않는다.
+    세션은 attach()로 붙었다가 떨어지며, 장치는 그 사이에도 계속 링버퍼에 녹음한다.
+    다음 세션은 이전 세션이 멈춘 지점부터 이어 읽는다 (max_age보다 오래된 오디오는 버림).
+
+    감시 쓰레드가 콜백이 watchdog_s 동안 멈추거나 스트림이 죽으면 장치가 끊긴 것으로 보고,
+    같은 장치 또는 backup_devices를 백그라운드에서 다시 연다. 번호로 준 장치도 처음 열 때 이름을 기억해서
+    이름으로만 다시 찾는다 (장치 목록이 바뀌면 같은 번호에 다른 장치가 올 수 있음).
+    그동안에는 무음 청크를 실시간으로 넣어서 인식 세션은 끊기지 않고 짧은 무음만 보게 된다.
+    """
+
+    def __init__(self, rate, chunk, device_index=None, backup_devices=(), watchdog_s=DEVICE_WATCHDOG_S,
+                 retry_s=DEVICE_RETRY_S, on_device_event=None, **kwargs):
+        super().__init__(rate, chunk, device_index=device_index, **kwargs)
+        self._primary = device_index
+        self._backups = list(backup_devices)
+        self._watchdog_s = watchdog_s
+        self._retry_s = retry_s
+        self._on_device_event = on_device_event
+        self._watchdog = None
+        self._watchdog_stop = threading.Event()
+        self._last_callback = None
+        self._lost_at = None
+        self._silence_pos = None
+        self.device_name = None
+        self.device_losses = 0
+        self.recovery_times = []
+
+    def start(self):
+        """▶️ 장치 열기 (한 번만)"""
+        if self.closed:
+            self.__enter__()
+        return self
+
+    def stop(self):
+        """⏹️ 장치 닫기 (프로그램 종료 시)"""
+        if not self.closed:
+            self.__exit__(None, None, None)
+
+    def attach(self, max_age=None, on_stale=None):
+        """🔌 이 장치를 읽는 인식 세션 생성 (with 블록으로 사용)"""
+        return CaptureSession(self, max_age=max_age, on_stale=on_stale)
+
+    def _open(self, interface=None):
+        super()._open(interface)
+        self.device_name = self._current_device_name()
+        self._last_callback = time.monotonic()
+        if not isinstance(self._primary, str):
+            # 번호/기본 장치는 처음 연 장치의 이름으로 기억한다 (다시 열 때는 이름으로만 찾음)
+            self._primary = self.device_name
+            self._backups = [self._device_name_of(candidate) for candidate in self._backups]
+        if self._watchdog is None:
+            self._watchdog_stop.clear()
+            self._watchdog = threading.Thread(target=self._watch, daemon=True)
+            self._watchdog.start()
+
+    def _close(self):
+        self._watchdog_stop.set()
+        if self._watchdog and self._watchdog is not threading.current_thread():
+            self._watchdog.join(timeout=2.0)
+        self._watchdog = None
+        self._release_stream()
+
+    def _release_stream(self):
+        """🧹 (끊긴) 스트림 정리: 장치가 사라진 뒤라 오류가 나도 무시"""
+        try:
+            MicrophoneStream._close(self)
+        except Exception:
+            pass
+
+    def _current_device_name(self):
+        try:
+            if self._device_index is None:
+                return self._audio_interface.get_default_input_device_info()["name"]
+            return self._audio_interface.get_device_info_by_index(self._device_index)["name"]
+        except Exception:
+            return None
+
+    def _device_name_of(self, candidate):
+        """🏷️ 장치 번호 → 이름 (이름이면 그대로, 찾을 수 없으면 None)"""
+        if candidate is None or isinstance(candidate, str):
+            return candidate
+        try:
+            return self._audio_interface.get_device_info_by_index(candidate)["name"]
+        except Exception:
+            return None
+
+    def _fill_buffer(self, in_data, frame_count, time_info, status_flags):
+        self._last_callback = time.monotonic()
+        return super()._fill_buffer(in_data, frame_count, time_info, status_flags)
+
+    @property
+    def lost(self):
+        return self._lost_at is not None
+
+    def _emit(self, event, **info):
+        if self._on_device_event:
+            try:
+                self._on_device_event(event, info)
+            except Exception:
+                pass
+
+    def _stream_alive(self):
+        try:
+            return self._audio_stream.is_active()
+        except Exception:
+            return False
+
+    def _watch(self):
+        """🐕 장치 감시: 끊김 감지 → 무음 채우기 → 주기적으로 다시 열기"""
+        next_retry = 0.0
+        while not self._watchdog_stop.wait(WATCHDOG_TICK_S):
+            now = time.monotonic()
+            if not self.lost:
+                if now - self._last_callback < self._watchdog_s and self._stream_alive():
+                    continue
+                self._lost_at = self._last_callback
+                self._silence_pos = self._last_callback
+                self.device_losses += 1
+                self._release_stream()
+                self._emit("lost", device=self.device_name, losses=self.device_losses)
+                next_retry = now
+            self._fill_silence(now)
+            if now >= next_retry:
+                next_retry = now + self._retry_s
+                self._reopen()
+
+    def _fill_silence(self, now):
+        """🔇 끊긴 동안 흘러간 시간만큼 무음 청크를 넣는다 (캡처 시각 포함)"""
+        chunk_seconds = self._chunk / self._rate
+        silence = bytes(self._chunk * SAMPLE_WIDTH)
+        while self._silence_pos + chunk_seconds <= now:
+            self._silence_pos += chunk_seconds
+            self._push(silence, self._silence_pos)
+
+    def _find_device(self, interface, candidate):
+        """🔍 장치 이름 → 지금 열 수 있는 입력 장치 번호 (재연결 후 번호가 바뀌므로 번호로는 찾지 않음)"""
+        if candidate is None:
+            return None
+        for index in range(interface.get_device_count()):
+            info = interface.get_device_info_by_index(index)
+            if info.get("maxInputChannels", 0) <= 0:
+                continue
+            if candidate == info.get("name"):
+                return index
+        return None
+
+    def _reopen(self):
+        """🔁 원래 장치 → 백업 장치 순서로 다시 열기 (PortAudio를 새로 초기화해야 장치 목록이 갱신됨)"""
+        try:
+            interface = pyaudio.PyAudio()
+        except Exception:
+            return False
+        for candidate in [self._primary] + self._backups:
+            index = self._find_device(interface, candidate)
+            if index is None:
+                continue
+            self._device_index = index
+            try:
+                self._fill_silence(time.monotonic())
+                self._last_callback = time.monotonic()
+                MicrophoneStream._open(self, interface)
+            except Exception:
+                continue
+            self.device_name = self._current_device_name()
+            recovery = time.monotonic() - self._lost_at
+            self.recovery_times.append(recovery)
+            self._lost_at = None
+            self._emit("recovered", device=self.device_name, recovery=recovery,
+                       backup=candidate != self._primary)
+            return True
+        interface.terminate()
+        return False
+
+    def capture_stats(self):
+        stats = super().capture_stats()
+        stats.update(device_name=self.device_name, device_losses=self.device_losses, device_lost=self.lost,
+                     last_recovery=self.recovery_times[-1] if self.recovery_times else None,
+                     max_recovery=max(self.recovery_times) if self.recovery_times else None)
+        return stats
+
+
+class CaptureSession(AudioSource):
+    """🔌 PersistentMicrophone에 붙는 인식 세션: 닫아도 장치는 계속 녹음한다"""
+
+    def __init__(self, device, max_age=None, on_stale=None):
+        super().__init__(device.rate, device.chunk, max_age=max_age, on_stale=on_stale,
+                         buffer=device._buff)
+        self._device = device
+        self.level = device.level
+
+    def _open(self):
+        self._device.start()
+
+    def _close(self):
+        pass
+
+    def close(self):
+        """🔌 세션만 닫는다: 대기 중인 generator()를 깨워서 끝내고 링버퍼는 그대로 둔다"""
+        self.closed = True
+        self._buff.interrupt()
+
+    def capture_stats(self):
+        return self._device.capture_stats()
+
+
+class AlsaSource(MicrophoneStream):
+    """🐧 ALSA PCM 직접 읽기 캡처 (pyalsaaudio, 리눅스 전용)
+
+    PortAudio 콜백 버퍼 없이 period_ms 길이의 ALSA 주기를 블로킹 read로 바로 받아 링버퍼에 넣는다.
+    generator()의 청크 계약은 MicrophoneStream과 같다 (int16 mono, 캡처 시각 포함).
+    device: "default", "hw:1,0", "plughw:CARD=Array,DEV=0" 등 ALSA PCM 이름
+    캡처 시각은 read가 돌아온 시각 (주기의 마지막 샘플 기준, ALSA 타임스탬프는 쓰지 않음).
+    리샘플링/빔포밍 옵션은 MicrophoneStream과 같고, 다채널로 열 수 없으면 모노로 연다.
+    """
+
+    backend = "alsa"
+
+    def __init__(self, rate, chunk, device="default", period_ms=ALSA_PERIOD_MS, periods=ALSA_PERIODS, **kwargs):
+        kwargs.pop("device_index", None)
+        super().__init__(rate, chunk, **kwargs)
+        self._device = device
+        self._period_ms = period_ms
+        self._periods = periods
+        self._pcm = None
+        self._reader = None
+        self._stop = threading.Event()
+        self.reads = 0
+
+    def _open(self):
+        if alsaaudio is None:
+            raise RuntimeError("pyalsaaudio가 설치되어 있지 않아 ALSA로 캡처할 수 없습니다.")
+        if self._device_rate == "native":
+            raise ValueError("ALSA 백엔드는 device_rate='native'를 지원하지 않습니다 (샘플레이트를 숫자로 지정).")
+        self._capture_rate = int(self._device_rate or self._rate)
+        self._period = max(1, int(self._capture_rate * self._period_ms / 1000))
+        wanted = self._mic_array.device_channels if self._mic_array is not None else 1
+        try:
+            self._pcm = self._open_pcm(wanted)
+            opened = wanted
+        except alsaaudio.ALSAAudioError:
+            if wanted == 1:
+                raise
+            self._pcm = self._open_pcm(1)
+            opened = 1
+        self._prepare_processing(opened)
+        self._stop.clear()
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    def _open_pcm(self, channels):
+        return alsaaudio.PCM(type=alsaaudio.PCM_CAPTURE, mode=alsaaudio.PCM_NORMAL, device=self._device,
+                             rate=self._capture_rate, channels=channels, format=alsaaudio.PCM_FORMAT_S16_LE,
+                             periodsize=self._period, periods=self._periods)
+
+    def _read_loop(self):
+        """📥 읽기 쓰레드: PCM 핸들은 이 쓰레드만 쓰고, 루프가 끝난 뒤 여기서 닫는다"""
+        pcm = self._pcm
+        frame_bytes = SAMPLE_WIDTH * self._channels
+        try:
+            while not self._stop.is_set():      # _close()가 멈추라고 알리면 현재 read가 돌아온 뒤 끝
+                try:
+                    length, data = pcm.read()
+                except alsaaudio.ALSAAudioError:
+                    if self._stop.is_set():
+                        break
+                    self.input_overflows += 1
+                    continue
+                if length < 0:
+                    # -EPIPE: 오버런 (읽기가 늦어 ALSA 버퍼가 넘침) → pyalsaaudio가 다시 준비해 둔다
+                    self.input_overflows += 1
+                    continue
+                if self.closed and self._buff.closed:
+                    break
+                self.reads += 1
+                if length:
+                    self._deliver(data[:length * frame_bytes], length, time.monotonic())
+        finally:
+            self._pcm = None
+            pcm.close()
+            self._finish()
+
+    def _close(self):
+        """🛑 읽기 쓰레드에 멈추라고 알리고 기다린다 (read 중인 핸들을 다른 쓰레드에서 닫지 않음)
+
+        장치가 멈춰 read가 돌아오지 않으면 기다리기를 포기하고, 핸들은 read가 돌아올 때 읽기 쓰레드가 닫는다.
+        """
+        self._stop.set()
+        if self._reader and self._reader is not threading.current_thread():
+            self._reader.join(timeout=1.0)
+
+    def capture_stats(self):
+        stats = super().capture_stats()
+        stats.update(backend=self.backend, period_ms=self._period_ms)
+        return stats
+
+
+class PipeWireSource(MicrophoneStream):
+    """🎛️ PipeWire 캡처: pw-record가 표준 출력으로 내보내는 raw s16 오디오를 주기 단위로 읽는다
+
+    노드 지연(latency_ms)을 직접 지정해서 PipeWire 그래프의 quantum을 작게 잡는다.
+    target: PipeWire 노드 이름/번호 (None = 기본 입력), 캡처 시각은 읽기가 끝난 시각.
+    """
+
+    backend = "pipewire"
+    COMMAND = "pw-record"
+
+    def __init__(self, rate, chunk, target=None, latency_ms=PIPEWIRE_LATENCY_MS, **kwargs):
+        kwargs.pop("device_index", None)
+        super().__init__(rate, chunk, **kwargs)
+        self._target = target
+        self._latency_ms = latency_ms
+        self._process = None
+        self._reader = None
+        self.reads = 0
+
+    def _command(self, channels):
+        cmd = [self.COMMAND, "--rate", str(self._capture_rate), "--channels", str(channels),
+               "--format", "s16", "--latency", f"{self._latency_ms}ms"]
+        if self._target is not None:
+            cmd += ["--target", str(self._target)]
+        return cmd + ["-"]
+
+    def _open(self):
+        if shutil.which(self.COMMAND) is None:
+            raise RuntimeError(f"{self.COMMAND}가 없어 PipeWire로 캡처할 수 없습니다 (pipewire-bin 패키지).")
+        if self._device_rate == "native":
+            raise ValueError("PipeWire 백엔드는 device_rate='native'를 지원하지 않습니다 (샘플레이트를 숫자로 지정).")
+        self._capture_rate = int(self._device_rate or self._rate)
+        # PipeWire는 없는 채널을 채워서 주므로 요청한 채널 수 그대로 연다
+        self._prepare_processing(self._mic_array.device_channels if self._mic_array is not None else 1)
+        self._process = subprocess.Popen(self._command(self._channels), stdout=subprocess.PIPE,
+                                         stderr=subprocess.DEVNULL, bufsize=0)
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    def _read_loop(self):
+        frame_bytes = SAMPLE_WIDTH * self._channels
+        period_bytes = max(1, int(self._capture_rate * self._latency_ms / 1000)) * frame_bytes
+        pending = b""
+        stdout = self._process.stdout
+        try:
+            while True:
+                data = os.read(stdout.fileno(), period_bytes)
+                if not data or self.closed and self._buff.closed:     # pw-record 종료(EOF) 또는 소스 닫힘
+                    break
+                data = pending + data
+                usable = len(data) - len(data) % frame_bytes
+                pending = data[usable:]
+                if usable:
+                    self.reads += 1
+                    self._deliver(data[:usable], usable // frame_bytes, time.monotonic())
+        finally:
+            # 읽기 오류(OSError 등)로 끝나도 링버퍼를 닫아야 generator()를 기다리는 쪽이 빠져나온다
+            self._finish()
+
+    def _close(self):
+        if self._process is not None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=1.0)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+        if self._reader and self._reader is not threading.current_thread():
+            self._reader.join(timeout=1.0)
+
+    def capture_stats(self):
+        stats = super().capture_stats()
+        stats.update(backend=self.backend, period_ms=self._latency_ms)
+        return stats
+
+
+class BusSource(AudioSource):
+    """📡 공유 메모리 오디오 버스를 읽는 소스 (키워드 검출, 녹음, 레벨 미터 등 추가 소비자용)
+
+    bus는 SharedAudioBus 객체 또는 다른 프로세스가 만든 버스 이름이다.
+    소스마다 자기 커서로 읽으므로 느려도 인식기나 작성자를 막지 않는다.
+    """
+
+    def __init__(self, bus, max_age=None, on_stale=None, from_start=False):
+        self._attached = isinstance(bus, str)
+        if self._attached:
+            bus = SharedAudioBus.attach(bus)
+        super().__init__(bus.rate, bus.slot_bytes // SAMPLE_WIDTH, max_age=max_age, on_stale=on_stale,
+                         buffer=bus.reader(from_start=from_start))
+        self.bus = bus
+
+    def _open(self):
+        pass
+
+    def _close(self):
+        if self._attached:
+            self.bus.release()
+
+
+class _FeederSource(AudioSource):
+    """🧵 별도 쓰레드에서 청크를 만들어 넣는 소스의 공통 부분
+
+    speed=1.0은 실시간, 2.0은 2배속, None은 소비자가 받아가는 만큼 최대 속도로 넣는다.
+    최대 속도에서는 링버퍼가 block 정책으로 동작해 오디오를 하나도 버리지 않는다.
+    """
+
+    def __init__(self, rate, chunk, speed=1.0, **kwargs):
+        if speed is not None and not speed > 0:
+            raise ValueError(f"재생 배속은 0보다 커야 합니다 (최대 속도는 None): {speed}")
+        if speed is None:
+            kwargs["overflow"] = "block"
+            kwargs["max_age"] = None
+        super().__init__(rate, chunk, **kwargs)
+        self._speed = speed
+        self.realtime = speed == 1.0
+        self._feeder = None
+
+    def _open(self):
+        self._feeder = threading.Thread(target=self._feed, daemon=True)
+        self._feeder.start()
+
+    def _close(self):
+        if self._feeder and self._feeder is not threading.current_thread():
+            self._feeder.join(timeout=1.0)
+
+    def _frames(self):
+        """청크 크기의 int16 bytes를 차례로 돌려주는 제너레이터 (서브클래스 구현)"""
+        raise NotImplementedError
+
+    def generator(self):
+        """🔁 실시간 소스와 같은 계약: 밀린 오디오도 청크 크기 이하의 view로 나눠서 넘긴다
+
+        최대 속도에서는 소비자가 읽을 때마다 링버퍼에 수 초가 쌓여 있으므로, 그대로 넘기면
+        VAD처럼 청크 단위로 판단하는 단계가 실시간과 다른 결과를 낸다.
+        """
+        n_bytes = self._chunk * SAMPLE_WIDTH
+        for view in super().generator():
+            if len(view) <= n_bytes:
+                yield view
+                continue
+            for pos in range(0, len(view), n_bytes):
+                yield view[pos:pos + n_bytes]
+
+    def _feed(self):
+        start = time.monotonic()
+        sent = 0
+        try:
+            for frame in self._frames():
+                if self.closed and self._buff.closed:
+                    break
+                sent += len(frame) // SAMPLE_WIDTH
+                if self._speed is None:
+                    captured_at = time.monotonic()
+                else:
+                    # 청크의 마지막 샘플이 '녹음되는' 시각까지 기다린다
+                    captured_at = start + sent / self._rate / self._speed
+                    delay = captured_at - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                if not self._push(frame, captured_at) and self._buff.closed:
+                    break
+        finally:
+            # 파일 읽기 오류 등으로 끝나도 링버퍼를 닫아야 generator()를 기다리는 쪽이 빠져나온다
+            self._finish()
+
+
+class FileSource(_FeederSource):
+    """📂 WAV / raw PCM(int16 mono) 파일 재생 소스"""
+
+    def __init__(self, path, rate, chunk, speed=1.0, loop=False, **kwargs):
+        super().__init__(rate, chunk, speed=speed, **kwargs)
+        self._path = path
+        self._loop = loop
+
+    def _open(self):
+        if self._path.lower().endswith(".wav"):
+            with wave.open(self._path, "rb") as wf:
+                if wf.getsampwidth() != SAMPLE_WIDTH or wf.getnchannels() != 1:
+                    raise ValueError(f"16bit mono WAV만 지원합니다: {self._path}")
+                if wf.getframerate() != self._rate:
+                    raise ValueError(f"샘플레이트 불일치: {wf.getframerate()} != {self._rate} ({self._path})")
+        elif not os.path.isfile(self._path):
+            raise FileNotFoundError(self._path)
+        super()._open()
+
+    def _frames(self):
+        n_bytes = self._chunk * SAMPLE_WIDTH
+        while True:
+            if self._path.lower().endswith(".wav"):
+                with wave.open(self._path, "rb") as wf:
+                    while True:
+                        data = wf.readframes(self._chunk)
+                        if not data:
+                            break
+                        yield data
+            else:
+                with open(self._path, "rb") as f:
+                    while True:
+                        data = f.read(n_bytes)
+                        if len(data) < SAMPLE_WIDTH:
+                            break
+                        yield data[:len(data) - len(data) % SAMPLE_WIDTH]
+            if not self._loop or self.closed:
+                return
+
+
+class ToneSource(_FeederSource):
+    """🎵 합성 톤/잡음 소스 (마이크 없는 환경 점검 및 부하 테스트용)"""
+
+    def __init__(self, rate, chunk, freq=440.0, amplitude=0.3, noise=0.0, duration=None,
+                 speed=1.0, seed=0, **kwargs):
+        super().__init__(rate, chunk, speed=speed, **kwargs)
+        self._freq = freq
+        self._amplitude = amplitude
+        self._noise = noise
+        self._duration = duration
+        self._rng = np.random.default_rng(seed)
+
+    def _frames(self):
+        total = None if self._duration is None else int(self._duration * self._rate)
+        pos = 0
+        while total is None or pos < total:
+            n = self._chunk if total is None else min(self._chunk, total - pos)
+            t = (pos + np.arange(n)) / self._rate
+            x = np.zeros(n)
+            if self._freq:
+                x += self._amplitude * np.sin(2 * np.pi * self._freq * t)
+            if self._noise:
+                x += self._rng.normal(0.0, self._noise, n)
+            yield (np.clip(x, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+            pos += n
+
+
+def open_source(spec, rate, chunk, speed=1.0, persistent=False, **kwargs):
+    """🏭 설정 문자열로 오디오 소스 생성
+
+    "mic" → 기본 마이크, "mic:2" → 2번 입력 장치, "file:경로" → 파일 재생,
+    "tone:440" → 합성 톤, "noise:0.1" → 백색 잡음, "bus:이름" → 공유 메모리 오디오 버스 읽기
+    "alsa" / "alsa:hw:1,0" → ALSA PCM 직접 캡처, "pipewire" / "pipewire:노드" → pw-record 캡처
+    persistent=True면 마이크를 세션과 무관하게 열어두는 PersistentMicrophone으로 만든다.
+    """
+    kind, _, arg = spec.partition(":")
+    if kind == "bus":
+        bus = BusSource(arg, max_age=kwargs.get("max_age"), on_stale=kwargs.get("on_stale"))
+        if bus.rate != rate:
+            bus._close()
+            raise ValueError(f"오디오 버스 샘플레이트 불일치: {bus.rate} != {rate}")
+        return bus
+    if kind == "mic":
+        mic_class = PersistentMicrophone if persistent else MicrophoneStream
+        return mic_class(rate, chunk, device_index=int(arg) if arg else None, **kwargs)
+    if kind == "alsa":
+        return AlsaSource(rate, chunk, device=arg or "default", **kwargs)
+    if kind == "pipewire":
+        return PipeWireSource(rate, chunk, target=arg or None, **kwargs)
+    if kind == "file":
+        return FileSource(arg, rate, chunk, speed=speed, **kwargs)
+    if kind == "tone":
+        return ToneSource(rate, chunk, freq=float(arg or 440.0), speed=speed, **kwargs)
+    if kind == "noise":
+        return ToneSource(rate, chunk, freq=None, noise=float(arg or 0.1), speed=speed, **kwargs)
+    raise ValueError(f"알 수 없는 오디오 소스: {spec}")
+
+
+def chunk_size(rate, frame_ms):
+    """📐 캡처 프레임 길이(ms) → 샘플 수"""
+    return int(rate * frame_ms / 1000)
+
+
+class AudioTimeline:
+    """🕰️ 인식기로 보낸 오디오 위치(초) → 그 오디오의 캡처 시각(time.monotonic)
+
+    Google 인식 결과의 result_end_time은 '서버가 받은 오디오' 기준 위치라서,
+    VAD가 무음을 억제하면 캡처 시각과 어긋난다. track()을 VAD/전처리 뒤, 프레이밍 앞에 끼워서
+    청크가 나갈 때마다 (누적 전송 위치, 그 순간 소스에서 마지막으로 꺼낸 청크의 캡처 시각)을 기록한다.
+    청크 하나는 캡처 시간상 연속이므로 청크 안의 위치는 끝 시각에서 거꾸로 계산한다.
+    """
+
+    def __init__(self, rate, max_segments=MAX_STAMPS):
+        self._rate = rate
+        self._segments = deque(maxlen=max_segments)   # (전송 끝 위치(초), 캡처 시각)
+        self.sent_seconds = 0.0
+
+    def track(self, chunks, clock):
+        """🔁 청크를 그대로 넘기면서 위치를 기록하는 제너레이터 (clock: 캡처 시각을 돌려주는 함수)"""
+        for chunk in chunks:
+            self.sent_seconds += len(chunk) / SAMPLE_WIDTH / self._rate
+            captured_at = clock()
+            if captured_at is not None:
+                self._segments.append((self.sent_seconds, captured_at))
+            yield chunk
+
+    def captured_at(self, offset):
+        """⏱️ 전송 위치 offset(초)의 캡처 시각 (기록이 없으면 None)"""
+        if offset is None or not self._segments:
+            return None
+        found = None
+        for end, captured_at in reversed(self._segments):
+            if end < offset:
+                break
+            found = (end, captured_at)
+        if found is None:
+            # 마지막 기록보다 뒤 → 가장 최근 캡처 시각
+            return self._segments[-1][1]
+        end, captured_at = found
+        return captured_at - (end - offset)
+
+
+class AudioFanout:
+    """🔀 전처리된 오디오 흐름 하나를 여러 독자에게 똑같이 나눠준다 (인식 스트림을 겹쳐 돌릴 때)
+
+    - 펌프 쓰레드가 원래 제너레이터를 읽어, 구독 중인 독자의 큐마다 같은 청크를 넣는다.
+      캡처 시각은 청크를 꺼낸 직후 clock()으로 읽는다 (AudioTimeline.track과 같은 방식).
+    - subscribe(pre_roll_s)는 최근 pre_roll_s 초 분량(history_s 한도 안)부터 받는다.
+      새로 여는 스트림이 이미 시작된 발화를 앞부분부터 듣게 하기 위함.
+    - 위치(초)는 분배기에 들어온 오디오의 누적 길이다. 독자마다 받은 구간(start_seconds ~ end_seconds)을
+      기록하므로 교대할 때 두 독자 사이의 겹침/공백을 그대로 잴 수 있다.
+    """
+
+    def __init__(self, chunks, rate, clock, history_s=2.0):
+        self._chunks = chunks
+        self._rate = rate
+        self._clock = clock
+        self._history_s = history_s
+        self._history = deque()     # (청크, 캡처 시각, 시작 위치, 끝 위치)
+        self._readers = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self.seconds = 0.0
+        self.finished = False
+        self.error = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._pump, daemon=True)
+        self._thread.start()
+        return self
+
+    def _pump(self):
+        try:
+            for chunk in self._chunks:
+                # 링버퍼 view는 다음 read에서 덮어써질 수 있으므로 독자들에게는 복사본을 준다
+                data = bytes(chunk)
+                captured_at = self._clock()
+                with self._lock:
+                    start = self.seconds
+                    self.seconds += len(data) / SAMPLE_WIDTH / self._rate
+                    item = (data, captured_at, start, self.seconds)
+                    self._history.append(item)
+                    while self._history and self.seconds - self._history[0][2] > self._history_s:
+                        self._history.popleft()
+                    for reader in self._readers:
+                        reader._put(item)
+        except Exception as e:
+            self.error = e
+        finally:
+            with self._lock:
+                self.finished = True
+                for reader in self._readers:
+                    reader._queue.put(None)
+                self._readers = []
+
+    def subscribe(self, pre_roll_s=0.0):
+        """📖 새 독자: 지금부터의 오디오(pre_roll_s > 0이면 그만큼 앞선 오디오부터)를 받는다"""
+        with self._lock:
+            backlog = [item for item in self._history if item[3] > self.seconds - pre_roll_s] if pre_roll_s else []
+            reader = FanoutReader(self, backlog, backlog[0][2] if backlog else self.seconds)
+            if self.finished:
+                reader._queue.put(None)
+            else:
+                self._readers.append(reader)
+        return reader
+
+    def _unsubscribe(self, reader):
+        with self._lock:
+            if reader in self._readers:
+                self._readers.remove(reader)
+
+
+class FanoutReader:
+    """📖 AudioFanout 독자: generator()로 청크를 받고, last_captured_at은 마지막으로 꺼낸 청크의 캡처 시각
+
+    close()하면 더 이상 새 청크를 받지 않고, 이미 받은 청크까지 내보낸 뒤 generator()가 끝난다.
+    """
+
+    def __init__(self, fanout, backlog, start_seconds):
+        self._fanout = fanout
+        self._queue = queue.Queue()
+        self.start_seconds = start_seconds    # 받은 첫 오디오의 분배기 위치
+        self.end_seconds = start_seconds      # 받은 마지막 오디오의 분배기 위치 (끝)
+        self.last_captured_at = None
+        for item in backlog:
+            self._put(item)
+
+    def _put(self, item):
+        self._queue.put(item)
+        self.end_seconds = item[3]
+
+    def generator(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            data, captured_at = item[0], item[1]
+            if captured_at is not None:
+                self.last_captured_at = captured_at
+            yield data
+
+    def close(self):
+        self._fanout._unsubscribe(self)
+        self._queue.put(None)
+
+
+def frame_requests(chunks, rate, target_ms=100, max_bytes=MAX_REQUEST_BYTES,
+                   pace=True, catchup=2.0):
+    """📦 청크를 목표 길이의 요청 단위로 재구성하고 실시간 속도에 맞춰 내보낸다
+
+    - 요청 하나는 target_ms 길이이며 max_bytes를 절대 넘지 않는다.
+    - pace=True면 밀린 오디오도 한꺼번에 보내지 않고 실시간의 catchup 배속까지만 보낸다.
+    """
+    target = chunk_size(rate, target_ms) * SAMPLE_WIDTH
+    target = max(SAMPLE_WIDTH, min(target, max_bytes - max_bytes % SAMPLE_WIDTH))
+    frame_seconds = target / SAMPLE_WIDTH / rate
+    pending = bytearray()
+    next_due = None
+
+    for chunk in chunks:
+        if not pending and len(chunk) == target:
+            # 청크 크기가 이미 요청 크기와 같으면 복사 없이 그대로 넘긴다
+            frames = (chunk,)
+        else:
+            pending += chunk
+            frames = []
+            while len(pending) >= target:
+                frames.append(bytes(pending[:target]))
+                del pending[:target]
+
+        for frame in frames:
+            if pace:
+                now = time.monotonic()
+                if next_due is not None and next_due > now:
+                    time.sleep(next_due - now)
+                else:
+                    next_due = now
+                next_due += frame_seconds / catchup
+            yield frame
+
+    if pending:
+        yield bytes(pending)
+
+
+class _StreamSink:
+    """📥 soundfile이 쓰는 가상 파일: 새로 써진 바이트만 take()로 꺼낸다
+
+    이미 꺼낸 위치로 되돌아가서 쓰는 헤더 갱신은 무시한다 (스트리밍이라 되돌릴 수 없음).
+    """
+
+    def __init__(self):
+        self._base = 0              # 이미 꺼낸 바이트 수
+        self._pending = bytearray()
+        self._pos = 0
+
+    def write(self, data):
+        data = memoryview(data)
+        n = len(data)
+        offset = self._pos - self._base
+        if offset < 0:
+            data = data[min(-offset, n):]
+            offset = 0
+        if len(data):
+            self._pending[offset:offset + len(data)] = data
+        self._pos += n
+        return n
+
+    def read(self, size=-1):
+        return b""
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self._pos
+        elif whence == 2:
+            offset += self._base + len(self._pending)
+        self._pos = offset
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def take(self):
+        out = bytes(self._pending)
+        self._base += len(out)
+        self._pending.clear()
+        return out
+
+
+class UplinkEncoder:
+    """🗜️ 압축 업링크 인코더 단계 (FLAC / OGG_OPUS)
+
+    encode()는 int16 청크를 받아 별도 워커 쓰레드에서 인코딩하고,
+    만들어진 압축 바이트를 요청 제너레이터 쪽으로 넘긴다.
+    인코더를 열 수 없거나 인코딩 중 오류가 나면 error에 기록하고 codec을 "LINEAR16"으로 바꾼 뒤
+    남은 오디오는 원본 PCM 그대로 넘긴다 (호출 쪽에서 error를 보고 다음 세션부터 무압축으로 설정).
+    """
+
+    def __init__(self, rate, codec="OGG_OPUS", max_queue=64):
+        if UPLINK_CODECS.get(codec) is None:
+            raise ValueError(f"압축 코덱이 아닙니다: {codec}")
+        self._rate = rate
+        self.codec = codec
+        self._format, self._subtype = UPLINK_CODECS[codec]
+        self._max_queue = max_queue
+        self.error = None
+        self.input_bytes = 0
+        self.output_bytes = 0
+        self.cpu_seconds = 0.0
+        self._soundfile = None
+        try:
+            import soundfile
+            self._soundfile = soundfile
+            # 🔍 미리 한 번 열어 봐서 libsndfile이 이 코덱을 못 쓰면 요청 설정 전에 무압축으로 바꾼다
+            self._open(_StreamSink()).close()
+        except Exception as e:
+            self._fall_back(e)
+
+    def _open(self, sink):
+        return self._soundfile.SoundFile(sink, mode="w", samplerate=self._rate, channels=1,
+                                         format=self._format, subtype=self._subtype)
+
+    def _fall_back(self, error):
+        self.error = error
+        self.codec = "LINEAR16"
+
+    def _worker(self, chunks, out, stop):
+        cpu_start = time.thread_time()
+        sink = _StreamSink()
+        chunks = iter(chunks)
+        pending = None
+        try:
+            if self.error is None:
+                try:
+                    with self._open(sink) as encoder:
+                        if self._format == "OGG":
+                            self._set_page_latency(encoder)
+                        for chunk in chunks:
+                            if stop.is_set():
+                                break
+                            pending = chunk
+                            self.input_bytes += len(chunk)
+                            encoder.write(np.frombuffer(chunk, dtype=np.int16))
+                            encoder.flush()
+                            self._emit(out, stop, sink.take())
+                            pending = None
+                            self.cpu_seconds = time.thread_time() - cpu_start
+                    self._emit(out, stop, sink.take())
+                except Exception as e:
+                    self._fall_back(e)
+            if self.error is not None:
+                # ↩️ 인코더 실패: 남은 오디오는 원본 PCM 그대로
+                if pending is not None:
+                    self._emit(out, stop, bytes(pending))
+                for chunk in chunks:
+                    if stop.is_set():
+                        break
+                    self.input_bytes += len(chunk)
+                    self._emit(out, stop, bytes(chunk))
+        finally:
+            self.cpu_seconds = time.thread_time() - cpu_start
+            self._put(out, stop, None)
+
+    def _set_page_latency(self, encoder):
+        """⏱️ Ogg 페이지 지연을 줄인다 (기본값은 약 1초 분량을 모아서 내보냄)
+
+        soundfile의 비공개 API(_snd, _ffi, SoundFile._file)를 쓰므로, 없는 버전에서는 기본 페이지 크기를 그대로 쓴다.
+        """
+        sf = self._soundfile
+        if not (hasattr(sf, "_snd") and hasattr(sf, "_ffi") and hasattr(encoder, "_file")):
+            return False
+        try:
+            latency = sf._ffi.new("double*", OGG_PAGE_LATENCY_MS)
+            sf._snd.sf_command(encoder._file, SFC_SET_OGG_PAGE_LATENCY_MS, latency, sf._ffi.sizeof("double"))
+        except (AttributeError, TypeError):
+            return False
+        return True
+
+    def _emit(self, out, stop, data):
+        if data:
+            self.output_bytes += len(data)
+            self._put(out, stop, data)
+
+    def _put(self, out, stop, item):
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def encode(self, chunks):
+        """🔁 압축된 바이트 청크를 내보내는 제너레이터 (인코더 실패 후에는 원본 PCM)"""
+        # 실행마다 새 큐/정지 플래그: 닫힌 이전 실행의 워커가 아직 끝나지 않았어도 섞이지 않게
+        out = queue.Queue(maxsize=self._max_queue)
+        stop = threading.Event()
+        worker = threading.Thread(target=self._worker, args=(chunks, out, stop), daemon=True)
+        worker.start()
+        try:
+            while True:
+                data = out.get()
+                if data is None:
+                    return
+                yield data
+        finally:
+            stop.set()
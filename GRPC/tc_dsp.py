@@ -0,0 +1,657 @@
+"""
+🎛️ tc_dsp.py
+int16 오디오 프레임용 NumPy 신호처리 단계 (VAD, 전처리 체인 등)
+"""
+
+import math
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# ✅ 공통 상수
+SAMPLE_WIDTH = 2
+INT16_FULL_SCALE = 32768.0
+NOISE_FLOOR_MIN_DBFS = -90.0   # 디지털 무음(0)에 잡음 바닥이 끌려 내려가지 않게 하는 하한
+
+
+def to_samples(chunk):
+    """🔢 bytes/memoryview → int16 배열 (복사 없음)"""
+    return np.frombuffer(chunk, dtype=np.int16)
+
+
+def to_int16_bytes(x):
+    """🔢 float 배열(int16 스케일) → int16 bytes (클리핑 포함)"""
+    return np.clip(x, -32768, 32767).astype(np.int16).tobytes()
+
+
+def frame_dbfs(frames):
+    """📏 프레임별 RMS 레벨 (dBFS)"""
+    x = frames.astype(np.float32)
+    rms = np.sqrt(np.mean(x * x, axis=-1))
+    return 20.0 * np.log10(rms / INT16_FULL_SCALE + 1e-9)
+
+
+class VoiceActivityGate:
+    """🗣️ 에너지/영교차율 기반 음성 구간 게이트 (프리롤 + 행오버)
+
+    - 음성 구간만 통과시키고, 무음 구간은 억제해서 업링크 대역폭과 과금을 줄인다.
+    - 게이트가 열릴 때 직전 pre_roll_ms 만큼의 오디오를 앞에 붙여서 첫 음절이 잘리지 않게 한다.
+    - 음성이 끝난 뒤에도 hangover_ms 동안은 계속 보내서 STT가 발화 끝을 판단할 수 있게 한다.
+    - 억제 중에도 keepalive_s 마다 짧은 무음을 보내서 서버의 오디오 타임아웃을 막는다.
+    """
+
+    def __init__(self, rate, frame_ms=10, pre_roll_ms=300, hangover_ms=500,
+                 threshold_db=12.0, min_speech_dbfs=-50.0, zcr_max=0.35,
+                 keepalive_s=5.0, floor_rise_db_s=2.0, floor_fall_db_s=20.0, floor_percentile=20.0):
+        self._rate = rate
+        self._frame = max(1, rate * frame_ms // 1000)
+        self._pre_roll_bytes = rate * pre_roll_ms // 1000 * SAMPLE_WIDTH
+        self._hangover_frames = max(0, hangover_ms // frame_ms)
+        self._threshold_db = threshold_db
+        self._min_speech_dbfs = min_speech_dbfs
+        self._zcr_max = zcr_max
+        self._keepalive_bytes = int(keepalive_s * rate) * SAMPLE_WIDTH
+        self._floor_rise_db_s = floor_rise_db_s
+        self._floor_fall_db_s = floor_fall_db_s
+        self._floor_percentile = floor_percentile
+
+        self._pre_roll = deque()
+        self._pre_roll_size = 0
+        self._hang_left = 0
+        self._since_sent = 0
+        self.noise_dbfs = -60.0
+        self.active = False
+        self.suppressed_seconds = 0.0
+        self.forwarded_seconds = 0.0
+
+    def is_speech(self, samples):
+        """🔍 프레임별 음성 여부 (벡터 연산)"""
+        n_frames = len(samples) // self._frame
+        if n_frames == 0:
+            return np.zeros(0, dtype=bool)
+        frames = samples[:n_frames * self._frame].reshape(n_frames, self._frame)
+        level = frame_dbfs(frames)
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+        threshold = max(self.noise_dbfs + self._threshold_db, self._min_speech_dbfs)
+        # 영교차율이 높은 구간(히스 잡음)은 충분히 클 때만 음성으로 본다
+        speech = (level > threshold) & ((zcr < self._zcr_max) | (level > threshold + 10.0))
+
+        self._track_noise(level)
+        return speech
+
+    def _track_noise(self, level):
+        """📉 잡음 바닥 추정: 모든 프레임(음성 판정 포함)의 낮은 백분위수를 따라가되 속도를 제한
+
+        올라갈 때는 천천히(floor_rise_db_s), 내려갈 때는 빠르지만 floor_fall_db_s 이하로.
+        음성 판정 프레임도 반영해야 음성처럼 보이는 일정한 잡음(공조, 객석)에 게이트가 계속 열려 있지 않고,
+        내려가는 속도를 제한해야 몇 프레임의 거의 무음(드롭아웃, 발화 가장자리)에 바닥이 곤두박질치지 않는다.
+        """
+        estimate = max(float(np.percentile(level, self._floor_percentile)), NOISE_FLOOR_MIN_DBFS)
+        seconds = len(level) * self._frame / self._rate
+        if estimate > self.noise_dbfs:
+            self.noise_dbfs = min(estimate, self.noise_dbfs + self._floor_rise_db_s * seconds)
+        else:
+            self.noise_dbfs = max(estimate, self.noise_dbfs - self._floor_fall_db_s * seconds)
+
+    def _seconds(self, n_bytes):
+        return n_bytes / SAMPLE_WIDTH / self._rate
+
+    def _remember(self, chunk):
+        self._pre_roll.append(bytes(chunk))
+        self._pre_roll_size += len(chunk)
+        while self._pre_roll and self._pre_roll_size - len(self._pre_roll[0]) >= self._pre_roll_bytes:
+            self._pre_roll_size -= len(self._pre_roll.popleft())
+
+    def filter(self, chunks):
+        """🚪 음성 구간 청크만 통과시키는 제너레이터"""
+        for chunk in chunks:
+            speech = self.is_speech(to_samples(chunk))
+            if speech.any():
+                last = int(np.flatnonzero(speech)[-1])
+                self._hang_left = self._hangover_frames - (len(speech) - 1 - last)
+            else:
+                self._hang_left -= len(speech)
+
+            if speech.any() or self._hang_left > 0:
+                if not self.active and self._pre_roll:
+                    # 🎬 게이트 열림: 프리롤 + 현재 청크를 한 번에 전송
+                    self._pre_roll.append(chunk)
+                    chunk = b"".join(self._pre_roll)
+                    self.suppressed_seconds -= self._seconds(self._pre_roll_size)
+                    self._pre_roll.clear()
+                    self._pre_roll_size = 0
+                self.active = True
+                self._since_sent = 0
+                self.forwarded_seconds += self._seconds(len(chunk))
+                yield chunk
+                continue
+
+            self.active = False
+            self._remember(chunk)
+            self.suppressed_seconds += self._seconds(len(chunk))
+            self._since_sent += len(chunk)
+            if self._since_sent >= self._keepalive_bytes:
+                # 💤 서버 타임아웃 방지용 무음 프레임
+                self._since_sent = 0
+                silence = bytes(len(chunk))
+                self.forwarded_seconds += self._seconds(len(silence))
+                yield silence
+
+
+class EchoGate:
+    """🔇 자체 TTS 안내 음성이 재생되는 동안 캡처된 오디오를 무음으로 바꾸는 시간 정렬 게이트
+
+    - 재생 시작/끝 시각(time.monotonic)을 기록해 두고, 캡처 시각이 그 구간에 걸치는 샘플만 0으로 만든다.
+      청크 길이는 그대로라서 인식 스트림과 전송 위치 ↔ 캡처 시각 매핑은 흐트러지지 않는다.
+    - tail_ms는 출력 버퍼 지연 + 실내 잔향을 덮기 위한 여유이다.
+    - is_echo()로 인식 결과의 캡처 시각이 재생 구간에 속하는지 확인할 수 있다 (결과 단계 방어).
+    """
+
+    def __init__(self, rate, pre_ms=50, tail_ms=400, history=64):
+        self._rate = rate
+        self._pre = pre_ms / 1000.0
+        self._tail = tail_ms / 1000.0
+        self._intervals = deque(maxlen=history)     # [시작, 끝] (끝 None = 재생 중)
+        self._lock = threading.Lock()
+        self.playbacks = 0
+        self.gated_seconds = 0.0
+
+    def playback_started(self, at=None):
+        """▶️ TTS 재생 시작 기록"""
+        with self._lock:
+            self._intervals.append([time.monotonic() if at is None else at, None])
+            self.playbacks += 1
+
+    def playback_audible(self, at=None):
+        """🔊 실제 소리가 나기 시작한 시각으로 열린 재생 구간의 시작을 보정 (열린 구간이 없으면 무시)"""
+        with self._lock:
+            if self._intervals and self._intervals[-1][1] is None:
+                self._intervals[-1][0] = time.monotonic() if at is None else at
+
+    def playback_finished(self, at=None):
+        """⏹️ TTS 재생 끝 기록 (시작이 기록되지 않았으면 무시)"""
+        with self._lock:
+            if self._intervals and self._intervals[-1][1] is None:
+                self._intervals[-1][1] = time.monotonic() if at is None else at
+
+    def _spans(self):
+        with self._lock:
+            return [(start - self._pre, float("inf") if end is None else end + self._tail)
+                    for start, end in self._intervals]
+
+    def is_echo(self, captured_at):
+        """🔍 캡처 시각이 자체 음성 재생 구간(여유 포함)에 속하는지"""
+        if captured_at is None:
+            return False
+        return any(start <= captured_at <= end for start, end in self._spans())
+
+    def filter(self, chunks, clock):
+        """🚪 청크를 그대로 넘기되 재생 구간에 걸친 샘플은 0으로 (clock: 청크 끝 캡처 시각을 돌려주는 함수)"""
+        for chunk in chunks:
+            end_t = clock()
+            spans = self._spans() if end_t is not None else []
+            n = len(chunk) // SAMPLE_WIDTH
+            start_t = end_t - n / self._rate if spans else None
+            if not any(start <= end_t and end >= start_t for start, end in spans):
+                yield chunk
+                continue
+            times = start_t + (np.arange(n) + 1) / self._rate
+            mask = np.zeros(n, dtype=bool)
+            for start, end in spans:
+                mask |= (times >= start) & (times <= end)
+            samples = to_samples(chunk).copy()
+            samples[mask] = 0
+            self.gated_seconds += int(mask.sum()) / self._rate
+            yield samples.tobytes()
+
+
+class PushToTalkGate:
+    """🎙️ 푸시투토크(키/페달) 게이트: 누르고 있는 동안만 인식기로 오디오를 보낸다
+
+    - press()/release()는 UI 쓰레드에서 호출한다. 키 자동 반복(누름/뗌 반복)은 debounce_ms 안에
+      다시 눌리면 계속 누른 것으로 본다.
+    - filter()는 누른 시각 기준 pre_roll_ms 전부터의 오디오(캡처 시각 기준)를 먼저 보내고,
+      키를 떼면 제너레이터를 끝내서 요청 스트림을 반쯤 닫는다 → 서버가 발화 끝을 기다리지 않고 바로 최종 결과를 준다.
+    """
+
+    def __init__(self, rate, pre_roll_ms=300, debounce_ms=80):
+        self._rate = rate
+        self._pre_roll = pre_roll_ms / 1000.0
+        self._debounce = debounce_ms / 1000.0
+        self._down = False
+        self._pressed_at = None
+        self._released_at = None
+        self._pressed = threading.Event()
+        self.presses = 0
+        self.talk_seconds = 0.0
+
+    def press(self):
+        """⬇️ 키 누름 (자동 반복 누름은 무시)"""
+        if self._down:
+            return
+        if not self.active:
+            self._pressed_at = time.monotonic()
+            self.presses += 1
+        self._down = True
+        self._pressed.set()
+
+    def release(self):
+        """⬆️ 키 뗌"""
+        self._down = False
+        self._released_at = time.monotonic()
+        self._pressed.clear()
+
+    @property
+    def active(self):
+        """🔴 누르고 있거나, 뗀 지 debounce_ms가 안 지났는지"""
+        if self._down:
+            return True
+        return self._released_at is not None and self._pressed_at is not None and \
+            self._released_at > self._pressed_at and time.monotonic() - self._released_at < self._debounce
+
+    def wait_for_press(self, abort, poll=0.2):
+        """⏳ 키가 눌릴 때까지 대기 (abort()가 True가 되면 False 반환)"""
+        while not self._pressed.wait(poll):
+            if abort():
+                return False
+        return not abort()
+
+    def filter(self, chunks, clock):
+        """🚪 누른 시각 - pre_roll_ms 이후에 캡처된 오디오만, 키를 뗄 때까지 통과 (clock: 청크 끝 캡처 시각)"""
+        cutoff = self._pressed_at - self._pre_roll
+        for chunk in chunks:
+            end_t = clock()
+            if end_t is not None and cutoff is not None:
+                n = len(chunk) // SAMPLE_WIDTH
+                keep = int(min(n, max(0.0, end_t - cutoff) * self._rate))
+                if keep <= 0:
+                    continue        # 프리롤보다 오래된 버퍼 오디오
+                if keep < n:
+                    chunk = chunk[(n - keep) * SAMPLE_WIDTH:]
+                cutoff = None
+            self.talk_seconds += len(chunk) / SAMPLE_WIDTH / self._rate
+            yield chunk
+            if not self.active:
+                return
+
+
+class HighPassFilter:
+    """🔈 DC/저역 잡음 제거용 고역 통과 필터 (HVAC 럼블 등)
+
+    1차 고역 통과 필터를 order 단 직렬로 연결한다. 재귀식 y[n] = a·y[n-1] + u[n]을
+    block 샘플 단위 누적합(cumsum)으로 풀어서 샘플 루프 없이 벡터 연산으로 처리한다.
+    최소 위상이라 추가 지연이 없다.
+    """
+
+    name = "highpass"
+
+    def __init__(self, rate, cutoff_hz=100.0, order=2, block=128):
+        self._a = float(np.exp(-2.0 * np.pi * cutoff_hz / rate))
+        self._block = block
+        self._pow = self._a ** np.arange(block)
+        self._inv_pow = 1.0 / self._pow
+        self._x_prev = [0.0] * order
+        self._y_prev = [0.0] * order
+
+    def _stage(self, x, i):
+        a = self._a
+        u = a * np.diff(x, prepend=self._x_prev[i])
+        self._x_prev[i] = float(x[-1])
+        y = np.empty_like(u)
+        prev = self._y_prev[i]
+        for start in range(0, len(u), self._block):
+            seg = u[start:start + self._block]
+            m = len(seg)
+            y[start:start + m] = self._pow[:m] * (a * prev + np.cumsum(seg * self._inv_pow[:m]))
+            prev = float(y[start + m - 1])
+        self._y_prev[i] = prev
+        return y
+
+    def process(self, x):
+        if len(x) == 0:
+            return x
+        y = x.astype(np.float64)
+        for i in range(len(self._y_prev)):
+            y = self._stage(y, i)
+        return y.astype(np.float32)
+
+
+class AutomaticGainControl:
+    """🎚️ 자동 이득 조절: 속삭인 "cut"과 외친 "cut"의 레벨 차이를 줄인다
+
+    청크 RMS로 목표 이득을 구하고, 올릴 때는 천천히(release), 내릴 때는 빠르게(attack) 따라간다.
+    청크 안에서는 이전 이득 → 새 이득으로 선형 보간해서 끊김이 없게 한다.
+    gate_dbfs보다 조용하거나 추정 잡음 바닥 + speech_margin_db 아래인 구간에서는 이득을 바꾸지 않는다.
+    """
+
+    name = "agc"
+
+    def __init__(self, rate, target_dbfs=-20.0, max_gain_db=24.0, min_gain_db=-12.0,
+                 attack_ms=20.0, release_ms=800.0, gate_dbfs=-50.0, speech_margin_db=10.0):
+        self._rate = rate
+        self._target = target_dbfs
+        self._max_gain = max_gain_db
+        self._min_gain = min_gain_db
+        self._attack_s = attack_ms / 1000.0
+        self._release_s = release_ms / 1000.0
+        self._gate = gate_dbfs
+        self._margin = speech_margin_db
+        self.noise_dbfs = gate_dbfs
+        self.gain_db = 0.0
+
+    def process(self, x):
+        if len(x) == 0:
+            return x
+        level = float(frame_dbfs(x))
+        desired = self.gain_db
+        if level > max(self._gate, self.noise_dbfs + self._margin):
+            desired = float(np.clip(self._target - level, self._min_gain, self._max_gain))
+        # 잡음 바닥: 더 조용한 청크는 바로 따라가고, 그 외에는 천천히 올린다
+        if level < self.noise_dbfs:
+            self.noise_dbfs = level
+        else:
+            self.noise_dbfs += 0.01 * (level - self.noise_dbfs)
+        duration = len(x) / self._rate
+        tau = self._attack_s if desired < self.gain_db else self._release_s
+        new_gain = self.gain_db + (desired - self.gain_db) * (1.0 - np.exp(-duration / tau))
+
+        ramp = np.linspace(self.gain_db, new_gain, len(x), dtype=np.float32)
+        self.gain_db = new_gain
+        return x * np.power(10.0, ramp / 20.0, dtype=np.float32)
+
+
+class SpectralSubtraction:
+    """🔇 STFT 기반 스펙트럼 차감 잡음 제거 (PA 블리드, 정상 잡음)
+
+    sqrt-Hann 창 50% 오버랩으로 분석/합성하고, 프레임 전력이 낮을 때 잡음 스펙트럼을 추정한다.
+    청크 하나에 들어온 프레임들은 한 번에 행렬 연산으로 처리한다.
+    지연: n_fft - hop 샘플
+    """
+
+    name = "denoise"
+
+    def __init__(self, rate, n_fft=512, over_subtraction=2.0, floor=0.08, noise_update=0.02):
+        self._n_fft = n_fft
+        self._hop = n_fft // 2
+        self._window = np.sqrt(np.hanning(n_fft + 1)[:-1]).astype(np.float32)
+        self._alpha = over_subtraction
+        self._floor = floor
+        self._beta = noise_update
+        self._input = np.zeros(n_fft - self._hop, dtype=np.float32)
+        self._overlap = np.zeros(n_fft - self._hop, dtype=np.float32)
+        self.noise_psd = None
+
+    def process(self, x):
+        buf = np.concatenate((self._input, x))
+        n_frames = (len(buf) - self._n_fft) // self._hop + 1
+        if n_frames <= 0:
+            self._input = buf
+            return np.zeros(0, dtype=np.float32)
+
+        idx = np.arange(self._n_fft)[None, :] + self._hop * np.arange(n_frames)[:, None]
+        spec = np.fft.rfft(buf[idx] * self._window, axis=1)
+        psd = spec.real ** 2 + spec.imag ** 2
+
+        # 잡음 추정: 더 작은 값은 바로 따라가고, 큰 값은 천천히 따라간다
+        frame_psd = psd.mean(axis=0)
+        if self.noise_psd is None:
+            self.noise_psd = frame_psd
+        else:
+            self.noise_psd = np.where(frame_psd < self.noise_psd, frame_psd,
+                                      self.noise_psd + self._beta * (frame_psd - self.noise_psd))
+
+        gain = 1.0 - self._alpha * self.noise_psd / np.maximum(psd, 1e-9)
+        gain = np.sqrt(np.maximum(gain, self._floor ** 2))
+        frames = np.fft.irfft(spec * gain, n=self._n_fft, axis=1).astype(np.float32) * self._window
+
+        # 오버랩-애드 합성
+        out = np.zeros(self._hop * n_frames + self._n_fft - self._hop, dtype=np.float32)
+        out[:len(self._overlap)] += self._overlap
+        for i in range(n_frames):
+            out[i * self._hop:i * self._hop + self._n_fft] += frames[i]
+        ready = self._hop * n_frames
+        self._overlap = out[ready:]
+        self._input = buf[ready:]
+        return out[:ready]
+
+
+class PolyphaseResampler:
+    """🔁 유리수 비율 폴리페이즈 리샘플러 (장치 고유 샘플레이트 → 인식기 샘플레이트)
+
+    Kaiser 창 sinc 저역 통과 필터를 up개 위상으로 나눠 두고, 출력 샘플을 위상별로 묶어서
+    출력 샘플마다 필요한 입력 창과 위상 계수를 인덱스 배열로 한 번에 모아 곱한다 (샘플 루프 없음).
+    48000 → 16000처럼 정수배 감소면 위상이 하나라 입력 stride view(복사 없음) × 계수 벡터 한 번이다.
+    지연: 필터 길이의 절반 (delay_seconds)
+    """
+
+    name = "resample"
+
+    def __init__(self, in_rate, out_rate, zero_crossings=32, cutoff=0.9, beta=8.0):
+        g = math.gcd(int(in_rate), int(out_rate))
+        self._up = int(out_rate) // g
+        self._down = int(in_rate) // g
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+
+        ratio = max(self._up, self._down)
+        n_taps = 2 * zero_crossings * ratio + 1
+        t = np.arange(n_taps) - (n_taps - 1) / 2.0
+        fc = 0.5 * cutoff / ratio      # 업샘플된 샘플레이트 기준 정규화 차단 주파수
+        h = 2.0 * fc * np.sinc(2.0 * fc * t) * np.kaiser(n_taps, beta) * self._up
+        self.delay_seconds = (n_taps - 1) / 2.0 / (in_rate * self._up)
+
+        # 위상별 계수 (입력 창과 바로 곱할 수 있게 뒤집어 둔다)
+        self._taps = -(-n_taps // self._up)
+        h = np.concatenate((h, np.zeros(self._taps * self._up - n_taps)))
+        self._phases = np.ascontiguousarray(h.reshape(self._taps, self._up).T[:, ::-1], dtype=np.float32)
+        self._history = np.zeros(self._taps - 1, dtype=np.float32)
+        self._next = 0      # 다음 출력 샘플의 위치 (업샘플 기준, 이번 입력 블록 시작 = 0)
+
+    def process(self, x):
+        up, down, taps = self._up, self._down, self._taps
+        n = len(x)
+        n_out = max(0, -(-(n * up - self._next) // down))
+        buf = np.concatenate((self._history, np.asarray(x, dtype=np.float32)))
+        j = self._next + down * np.arange(n_out)        # 출력 샘플의 업샘플 기준 위치
+        if up == 1:
+            # 정수배 감소: 입력 위의 stride view 하나 × 계수 벡터
+            windows = np.lib.stride_tricks.as_strided(
+                buf[self._next:], shape=(n_out, taps), strides=(down * buf.strides[0], buf.strides[0]),
+                writeable=False)
+            y = windows @ self._phases[0]
+        else:
+            # 일반 유리수 비율: 출력마다 입력 창과 위상 계수를 한 번에 모아서 곱한다
+            windows = buf[(j // up)[:, None] + np.arange(taps)]
+            y = np.einsum("ij,ij->i", windows, self._phases[j % up])
+        self._next += n_out * down - n * up
+        self._history = buf[len(buf) - (taps - 1):]
+        return y
+
+
+class MicArray:
+    """🎙️ 마이크 어레이 배치와 조준 방향
+
+    positions: 캡슐 위치 목록 (미터, 어레이 기준 좌표 (x, y) 또는 (x, y, z))
+    target: 화자 위치 (같은 좌표계, 미터) → 근거리 모델 (책상 위 어레이 ↔ 감독석처럼 가까울 때)
+    azimuth: 화자 방향 (도, +x축 기준 반시계) → 원거리 모델. 둘 다 없으면 정면(지연 0)
+    channels: 캡슐별 장치 채널 번호 (기본 0, 1, 2, ...), device_channels: 장치를 열 채널 수
+    (ReSpeaker처럼 처리된 채널/재생 루프백이 섞여 있는 장치용)
+    """
+
+    def __init__(self, positions, target=None, azimuth=None, channels=None, device_channels=None,
+                 speed_of_sound=343.0):
+        self.positions = np.array([tuple(p) + (0.0,) * (3 - len(p)) for p in positions], dtype=np.float64)
+        self.target = None if target is None else np.array(tuple(target) + (0.0,) * (3 - len(target)))
+        self.azimuth = azimuth
+        self.channels = list(channels) if channels is not None else list(range(len(self.positions)))
+        if len(self.channels) != len(self.positions):
+            raise ValueError(f"채널 수({len(self.channels)})와 캡슐 수({len(self.positions)})가 다릅니다.")
+        self.device_channels = device_channels or max(self.channels) + 1
+        self.speed_of_sound = speed_of_sound
+
+    def arrival_times(self, target=None, azimuth=None):
+        """⏱️ 캡슐별 소리 도착 시각 (초, 어레이 중심 기준 상대값)"""
+        target = self.target if target is None and azimuth is None else target
+        azimuth = self.azimuth if azimuth is None and target is None else azimuth
+        if target is not None:
+            t = np.linalg.norm(self.positions - np.asarray(target, dtype=np.float64), axis=1)
+        elif azimuth is not None:
+            a = np.deg2rad(azimuth)
+            t = -(self.positions @ np.array([np.cos(a), np.sin(a), 0.0]))
+        else:
+            t = np.zeros(len(self.positions))
+        return (t - t.mean()) / self.speed_of_sound
+
+    def steering_delays(self, rate, **steer):
+        """📐 캡슐별로 늦춰야 할 샘플 수 (가장 늦게 도착하는 캡슐 = 0)"""
+        t = self.arrival_times(**steer)
+        return (t.max() - t) * rate
+
+
+class DelayAndSumBeamformer:
+    """🎯 지연-합 빔포머: 다채널 캡처 → 화자 방향으로 정렬해 더한 모노 신호
+
+    캡슐마다 (정수 지연 + 분수 지연) 만큼 늦춰서 화자 소리를 맞춘 뒤 평균한다.
+    분수 지연은 Kaiser 창 sinc FIR(2·half_taps+1 탭)이며, 채널 × 출력 샘플의 입력 창을
+    sliding window view에서 한 번에 모아 einsum 한 번으로 계산한다 (샘플/채널 루프 없음).
+    지연: 가장 큰 조준 지연 + half_taps (delay_seconds, 단계를 바꿔도 그대로 유지)
+
+    budget(0~1)은 청크 길이 대비 허용 처리 시간이다. 최근 window 청크 평균이 넘으면 한 단계씩 낮춘다:
+    "fractional"(분수 지연 FIR) → "integer"(반올림한 정수 지연 평균) → "reference"(첫 캡슐만)
+    """
+
+    name = "beamform"
+    MODES = ("fractional", "integer", "reference")
+
+    def __init__(self, rate, array, half_taps=8, beta=6.0, budget=0.1, window=50, mode="fractional"):
+        self.rate = rate
+        self.array = array
+        self.channels = np.asarray(array.channels)
+        self._half = half_taps
+        self._beta = beta
+        self._budget = budget
+        self._recent = deque(maxlen=window)
+        self.mode = mode
+        self.degradations = 0
+        self.calls = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.steer()
+
+    def steer(self, **steer):
+        """🧭 조준 다시 계산 (target= 또는 azimuth=, 없으면 어레이 설정값). 지연 버퍼는 비운다."""
+        delays = self.array.steering_delays(self.rate, **steer)
+        n_taps = 2 * self._half + 1
+        whole = np.floor(delays)
+        frac = delays - whole
+        self._shift = whole.astype(np.int64)                  # 캡슐별 정수 지연
+        self._round = np.rint(delays + self._half).astype(np.int64)
+        t = np.arange(n_taps)[None, :] - self._half - frac[:, None]
+        h = np.sinc(t) * np.kaiser(n_taps, self._beta)[None, :]
+        h /= h.sum(axis=1, keepdims=True)
+        # 입력 창과 바로 곱할 수 있게 뒤집고, 평균(1/채널 수)까지 미리 곱해 둔다
+        self._taps = np.ascontiguousarray(h[:, ::-1] / len(delays), dtype=np.float32)
+        self._span = int(self._shift.max()) + n_taps - 1      # 필요한 과거 샘플 수
+        self._history = np.zeros((len(delays), self._span), dtype=np.float32)
+        self.delay_seconds = (float(delays.max()) + self._half) / self.rate
+
+    def process(self, frames):
+        """🔀 (샘플 수, 장치 채널 수) int16 배열 → 모노 float32 (int16 스케일)"""
+        start = time.perf_counter()
+        x = np.asarray(frames)[:, self.channels].T.astype(np.float32)
+        n = x.shape[1]
+        buf = np.concatenate((self._history, x), axis=1)
+        span = self._span
+        if self.mode == "fractional":
+            n_taps = self._taps.shape[1]
+            windows = np.lib.stride_tricks.sliding_window_view(buf, n_taps, axis=1)
+            first = span - self._shift - (n_taps - 1)            # 캡슐별 첫 출력 창 시작 위치
+            rows = np.arange(len(first))[:, None]
+            y = np.einsum("cnt,ct->n", windows[rows, first[:, None] + np.arange(n)], self._taps)
+        elif self.mode == "integer":
+            rows = np.arange(len(self._round))[:, None]
+            y = buf[rows, span - self._round[:, None] + np.arange(n)].mean(axis=0)
+        else:
+            y = buf[0, span - self._round[0] + np.arange(n)]
+        self._history = buf[:, buf.shape[1] - span:] if span else buf[:, :0]
+        self._account(time.perf_counter() - start, n)
+        return y
+
+    def _account(self, elapsed, n):
+        self.calls += 1
+        self.total_seconds += elapsed
+        self.max_seconds = max(self.max_seconds, elapsed)
+        if not n:
+            return
+        self._recent.append(elapsed / (n / self.rate))
+        if (len(self._recent) == self._recent.maxlen and np.mean(self._recent) > self._budget
+                and self.mode != self.MODES[-1]):
+            self.mode = self.MODES[self.MODES.index(self.mode) + 1]
+            self.degradations += 1
+            self._recent.clear()
+
+    def stats(self):
+        """📊 처리 단계, 호출 수, 청크당 평균/최대 처리 시간(초), 단계 하향 횟수"""
+        return {
+            "mode": self.mode,
+            "channels": len(self.channels),
+            "calls": self.calls,
+            "avg": self.total_seconds / self.calls if self.calls else 0.0,
+            "max": self.max_seconds,
+            "degradations": self.degradations,
+        }
+
+
+class DspChain:
+    """⛓️ 전처리 단계 묶음 + 단계별 처리 시간 카운터
+
+    budget(0~1)은 청크 길이 대비 허용 처리 시간 비율이며, 넘은 횟수를 over_budget에 센다.
+    """
+
+    def __init__(self, rate, stages, budget=0.25):
+        self._rate = rate
+        self.stages = list(stages)
+        self._budget = budget
+        self.timing = {stage.name: [0, 0.0, 0.0] for stage in self.stages}   # 횟수, 합계, 최대 (초)
+        self.over_budget = 0
+        self.max_load = 0.0
+
+    def process(self, chunk):
+        x = to_samples(chunk).astype(np.float32)
+        duration = len(x) / self._rate
+        total = 0.0
+        for stage in self.stages:
+            start = time.perf_counter()
+            x = stage.process(x)
+            elapsed = time.perf_counter() - start
+            counter = self.timing[stage.name]
+            counter[0] += 1
+            counter[1] += elapsed
+            counter[2] = max(counter[2], elapsed)
+            total += elapsed
+        if duration:
+            load = total / duration
+            self.max_load = max(self.max_load, load)
+            if load > self._budget:
+                self.over_budget += 1
+        return to_int16_bytes(x)
+
+    def filter(self, chunks):
+        """🔁 청크마다 전처리를 적용하는 제너레이터"""
+        for chunk in chunks:
+            out = self.process(chunk)
+            if out:
+                yield out
+
+    def timing_report(self):
+        """📊 단계별 평균/최대 처리 시간 (ms)"""
+        parts = []
+        for name, (calls, total, worst) in self.timing.items():
+            if calls:
+                parts.append(f"{name} 평균 {total / calls * 1000:.2f} ms / 최대 {worst * 1000:.2f} ms")
+        parts.append(f"최대 부하 {self.max_load:.1%}, 예산 초과 {self.over_budget}회")
+        return ", ".join(parts)
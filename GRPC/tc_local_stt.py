@@ -0,0 +1,116 @@
+"""
+🖥️ tc_local_stt.py
+오프라인 명령어 인식 엔진: 명령 문법으로 제한한 Vosk(Kaldi) 디코더 (CPU 전용, 네트워크 불필요)
+
+speech.SpeechClient 자리에 그대로 넣을 수 있도록 streaming_recognize(config, requests)를 같은 모양으로 제공한다.
+응답도 Google 응답과 같은 속성(results / is_final / stability / result_end_time / alternatives)만 쓴다.
+설치: pip install vosk (선택 의존성: 없으면 이 모듈은 import만 되고 LocalSpeechClient를 만들 때 ImportError)
+모델: https://alphacephei.com/vosk/models 의 영어 모델 (예: vosk-model-small-en-us-0.15, 약 40 MB)
+"""
+
+import datetime
+import json
+from collections import namedtuple
+
+try:
+    import vosk
+except ImportError:
+    vosk = None
+
+# ✅ 기본 설정
+ENDPOINT_S = 0.3            # 발화 끝 뒤 이만큼 무음이면 최종 결과 (VAD 행오버보다 짧게)
+MAX_UTTERANCE_S = 5.0       # 명령 하나가 이보다 길면 끊어서 최종 결과를 낸다
+UNKNOWN_WORD = "[unk]"      # 문법 밖 발화 (디코더가 이 단어로 흡수)
+
+LocalAlternative = namedtuple("LocalAlternative", "transcript confidence")
+LocalResult = namedtuple("LocalResult", "alternatives is_final stability result_end_time")
+LocalResponse = namedtuple("LocalResponse", "results")
+
+
+class LocalSpeechClient:
+    """🖥️ 문법 제한 로컬 인식기 (streaming_recognize만 Google SpeechClient와 같은 모양)
+
+    phrases: 말하는 형태 → 인식 결과 표기 ("p one cut" → "p1 cut", CommandGrammar.decoder_phrases())
+    디코더는 이 문구들(과 [unk])만 출력하므로 결과는 항상 명령 문법 안의 문장이다.
+    모델은 한 번만 읽고 스트림마다 인식기만 새로 만든다 (여러 마이크가 모델을 공유).
+    partial_stability: 중간 결과에 붙이는 안정도 (Vosk 중간 결과에는 안정도가 없다)
+    """
+
+    def __init__(self, model_path, phrases, partial_stability=0.0, endpoint_s=ENDPOINT_S,
+                 max_utterance_s=MAX_UTTERANCE_S):
+        if vosk is None:
+            raise ImportError("로컬 인식 엔진에는 vosk 패키지가 필요합니다 (pip install vosk)")
+        vosk.SetLogLevel(-1)
+        self._model = vosk.Model(model_path)
+        self._phrases = dict(phrases)
+        self._grammar = json.dumps(sorted(self._phrases) + [UNKNOWN_WORD])
+        self._longest = max((len(p.split()) for p in self._phrases), default=1)
+        self._partial_stability = partial_stability
+        self._endpoint_s = endpoint_s
+        self._max_utterance_s = max_utterance_s
+
+    def _recognizer(self, rate):
+        recognizer = vosk.KaldiRecognizer(self._model, rate, self._grammar)
+        recognizer.SetWords(True)
+        if hasattr(recognizer, "SetEndpointerDelays"):
+            # vosk ≥ 0.3.45: (발화 시작 전 최대 무음, 발화 끝 무음, 발화 최대 길이)
+            recognizer.SetEndpointerDelays(self._max_utterance_s, self._endpoint_s, self._max_utterance_s)
+        return recognizer
+
+    def to_transcript(self, text):
+        """🔤 디코더 출력 단어열 → 명령 표기 (가장 긴 문구부터 맞춰 바꾸고, [unk]는 버린다)"""
+        words = text.split()
+        out = []
+        i = 0
+        while i < len(words):
+            for n in range(min(self._longest, len(words) - i), 0, -1):
+                phrase = " ".join(words[i:i + n])
+                if phrase in self._phrases:
+                    out.append(self._phrases[phrase])
+                    i += n
+                    break
+            else:
+                if words[i] != UNKNOWN_WORD:
+                    out.append(words[i])
+                i += 1
+        return " ".join(out)
+
+    def _final_response(self, result, sent_seconds):
+        words = [w for w in result.get("result", []) if w.get("word") != UNKNOWN_WORD]
+        transcript = self.to_transcript(result.get("text", ""))
+        if not transcript or not words:
+            return None
+        confidence = sum(w.get("conf", 1.0) for w in words) / len(words)
+        end = datetime.timedelta(seconds=words[-1].get("end", sent_seconds))
+        return LocalResponse([LocalResult([LocalAlternative(transcript, confidence)], True, 1.0, end)])
+
+    def streaming_recognize(self, config, requests):
+        """📡 요청(audio_content = LINEAR16 PCM) iterable → 응답 제너레이터 (호출한 쓰레드에서 디코딩)"""
+        recognition = config.config
+        encoding = getattr(recognition.encoding, "name", recognition.encoding)
+        if encoding not in ("LINEAR16", "ENCODING_UNSPECIFIED", 0):
+            raise ValueError(f"로컬 인식 엔진은 LINEAR16만 받습니다: {encoding}")
+        rate = recognition.sample_rate_hertz
+        interim = getattr(config, "interim_results", False)
+        recognizer = self._recognizer(rate)
+        sent_seconds = 0.0
+        last_partial = ""
+        for request in requests:
+            data = bytes(request.audio_content)
+            sent_seconds += len(data) / 2 / rate
+            if recognizer.AcceptWaveform(data):
+                last_partial = ""
+                response = self._final_response(json.loads(recognizer.Result()), sent_seconds)
+                if response:
+                    yield response
+            elif interim:
+                partial = self.to_transcript(json.loads(recognizer.PartialResult()).get("partial", ""))
+                if partial and partial != last_partial:
+                    last_partial = partial
+                    end = datetime.timedelta(seconds=sent_seconds)
+                    alternative = LocalAlternative(partial, 0.0)
+                    yield LocalResponse([LocalResult([alternative], False, self._partial_stability, end)])
+        # 요청 스트림이 끝나면 남은 발화를 마무리한다 (Google이 half-close 때 하는 것과 같음)
+        response = self._final_response(json.loads(recognizer.FinalResult()), sent_seconds)
+        if response:
+            yield response
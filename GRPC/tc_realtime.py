@@ -0,0 +1,155 @@
+"""
+⚡ tc_realtime.py
+캡처/인식/명령 쓰레드용 OS 튜닝 (스케줄링 우선순위, CPU 고정, gc 제어)
+
+모든 설정은 선택 사항이며, 권한이 없거나 지원하지 않는 OS에서는 가능한 단계까지만 적용하고 넘어간다.
+"""
+
+import contextlib
+import gc
+import os
+import sys
+import threading
+
+# ✅ 기본 설정
+RT_PRIORITY = {"audio": 70, "stt": 50, "dispatch": 60}     # SCHED_FIFO 우선순위 (1~99)
+NICE_FALLBACK = {"audio": -10, "stt": -5, "dispatch": -8}  # 실시간 스케줄링이 안 될 때 nice 값
+GC_THRESHOLD = (50000, 50, 100)                             # 0세대 수집 빈도를 크게 낮춤 (기본 700)
+
+# Windows SetThreadPriority 값
+_WIN_PRIORITY = {"audio": 15, "stt": 1, "dispatch": 2}     # TIME_CRITICAL / ABOVE_NORMAL / HIGHEST
+
+
+def _linux_priority(tid, role, results):
+    priority = RT_PRIORITY.get(role)
+    if priority is not None and hasattr(os, "sched_setscheduler"):
+        try:
+            # RESET_ON_FORK: 이 쓰레드가 만드는 쓰레드(gRPC, 피더 등)는 실시간 정책을 물려받지 않는다
+            # (물려받으면 같은 우선순위끼리 GIL을 주고받다 단일 코어에서 멈출 수 있음)
+            policy = os.SCHED_FIFO | getattr(os, "SCHED_RESET_ON_FORK", 0)
+            os.sched_setscheduler(tid, policy, os.sched_param(priority))
+            results["priority"] = f"SCHED_FIFO {priority}"
+            return
+        except (PermissionError, OSError):
+            pass
+    nice = NICE_FALLBACK.get(role)
+    if nice is not None:
+        # 음수 nice는 권한이 필요하다 → 안 되면 -1까지 올리며 시도 (0은 기본값이라 적용으로 치지 않음)
+        for value in range(nice, 0):
+            try:
+                os.setpriority(os.PRIO_PROCESS, tid, value)
+                results["priority"] = f"nice {value}"
+                return
+            except (PermissionError, OSError):
+                continue
+    results["priority"] = "기본값 (권한 없음)"
+
+
+def _windows_priority(role, results):
+    import ctypes
+    kernel32 = ctypes.windll.kernel32
+    value = _WIN_PRIORITY.get(role, 0)
+    if kernel32.SetThreadPriority(kernel32.GetCurrentThread(), value):
+        results["priority"] = f"thread priority {value}"
+    else:
+        results["priority"] = "기본값 (설정 실패)"
+
+
+def _set_affinity(tid, cpus, results):
+    if not cpus:
+        return
+    if hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(tid, set(cpus))
+            results["cpus"] = sorted(cpus)
+        except OSError as e:
+            results["cpus"] = f"실패 ({e})"
+    elif sys.platform == "win32":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        mask = sum(1 << cpu for cpu in cpus)
+        if kernel32.SetThreadAffinityMask(kernel32.GetCurrentThread(), mask):
+            results["cpus"] = sorted(cpus)
+        else:
+            results["cpus"] = "실패"
+
+
+def tune_current_thread(role, cpus=None):
+    """⚡ 지금 실행 중인 쓰레드의 우선순위를 올리고 CPU를 고정한다
+
+    role: "audio" / "stt" / "dispatch" (역할별 우선순위는 RT_PRIORITY / NICE_FALLBACK)
+    적용된 내용을 dict로 반환한다 (권한이 없으면 기본값으로 남고 예외는 내지 않는다).
+    """
+    results = {"role": role, "thread": threading.current_thread().name}
+    if sys.platform.startswith("linux"):
+        tid = threading.get_native_id()
+        _linux_priority(tid, role, results)
+        _set_affinity(tid, cpus, results)
+    elif sys.platform == "win32":
+        try:
+            _windows_priority(role, results)
+            _set_affinity(None, cpus, results)
+        except Exception as e:
+            results["priority"] = f"기본값 ({e})"
+    else:
+        results["priority"] = "기본값 (지원하지 않는 OS)"
+    return results
+
+
+class ThreadTuner:
+    """🧵 쓰레드마다 한 번만 튜닝을 적용하는 훅 (PortAudio 콜백처럼 쓰레드가 바뀔 수 있는 곳용)"""
+
+    def __init__(self, role, cpus=None, on_tuned=None):
+        self._role = role
+        self._cpus = cpus
+        self._on_tuned = on_tuned
+        self._tuned = set()
+
+    def __call__(self):
+        ident = threading.get_ident()
+        if ident in self._tuned:
+            return
+        self._tuned.add(ident)
+        results = tune_current_thread(self._role, self._cpus)
+        if self._on_tuned:
+            self._on_tuned(results)
+
+
+def configure_gc(threshold=GC_THRESHOLD, freeze=True):
+    """🧹 gc 튜닝: 시작 시 만든 객체를 영구 세대로 옮기고(freeze) 0세대 수집 빈도를 낮춘다"""
+    gc.collect()
+    if freeze and hasattr(gc, "freeze"):
+        gc.freeze()
+    if threshold:
+        gc.set_threshold(*threshold)
+    return {"threshold": gc.get_threshold(), "frozen": gc.get_freeze_count() if hasattr(gc, "get_freeze_count") else 0}
+
+
+_gc_pause_lock = threading.Lock()
+_gc_pause_depth = 0
+_gc_was_enabled = False
+
+
+@contextlib.contextmanager
+def gc_paused(enabled=True):
+    """⏸️ 짧은 CPU 핫패스(명령 요청 만들기 등) 동안 gc를 멈춘다 (enabled=False면 아무것도 안 함)
+
+    gc는 프로세스 전체(오디오/STT 쓰레드 포함)에 걸리므로 네트워크 대기처럼 길어질 수 있는 구간은 넣지 않는다.
+    중첩되거나 여러 쓰레드가 동시에 써도 되도록 깊이를 세어서, 가장 바깥 구간이 끝날 때만 다시 켠다.
+    """
+    global _gc_pause_depth, _gc_was_enabled
+    if not enabled:
+        yield
+        return
+    with _gc_pause_lock:
+        if _gc_pause_depth == 0:
+            _gc_was_enabled = gc.isenabled()
+            gc.disable()
+        _gc_pause_depth += 1
+    try:
+        yield
+    finally:
+        with _gc_pause_lock:
+            _gc_pause_depth -= 1
+            if _gc_pause_depth == 0 and _gc_was_enabled:
+                gc.enable()
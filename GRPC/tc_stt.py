@@ -0,0 +1,544 @@
+"""
+🧠 tc_stt.py
+음성 인식 결과 처리 계층 (명령 문법, 명령 버스, 스트림 교대, 엔진 헤징 등)
+"""
+
+import queue
+import re
+import threading
+import time
+from collections import deque
+
+
+class CommandGrammar:
+    """🔤 음성 명령 문법: 인식 결과 정규화/해석 + 인식기 적응용 문구 목록
+
+    input_map(말하는 입력 이름 → TriCaster 입력)과 phonetic_map(발음 보정)으로 만든다.
+    받아들이는 발화: 입력 선택("p1"), 빠른 컷("p1 cut"), 동사(verbs), 준비 확인(ready_word)
+    """
+
+    def __init__(self, input_map, phonetic_map, verbs=("cut", "mix"), ready_word="test"):
+        self.input_map = input_map
+        self.phonetic_map = phonetic_map
+        self.verbs = tuple(verbs)
+        self.ready_word = ready_word
+        # 발음 보정표에서 숫자 읽기("one" → "1")를 뽑아 둔다 (문구 목록에 말하는 형태로 넣기 위함)
+        self.number_words = {}
+        for word, value in phonetic_map.items():
+            if word.isalpha() and value.isdigit():
+                self.number_words.setdefault(value, word)
+
+    def normalize(self, command):
+        """🔤 STT 결과를 명령어 형태로 정규화 (발음 보정 포함)"""
+        words = command.lower().split()
+        original_phrase = ' '.join(words)
+        normalized_command = self.phonetic_map.get(original_phrase, original_phrase)
+
+        if normalized_command == original_phrase:
+            normalized = [self.phonetic_map.get(w, w) for w in words]
+            normalized_command = ' '.join(normalized).strip()
+
+        if normalized_command.startswith(self.ready_word):
+            normalized_command = self.ready_word
+        return normalized_command
+
+    def reduce(self, normalized_command):
+        """🎯 복합 명령 정리: "p1 cut"은 그대로, 그 밖의 여러 단어는 마지막 명령만 남긴다"""
+        tokens = normalized_command.split()
+        if len(tokens) == 2 and tokens[1] == "cut" and tokens[0] in self.input_map:
+            return normalized_command
+        if len(tokens) >= 2:
+            return tokens[-1]
+        return normalized_command
+
+    def is_valid(self, command):
+        valid_cmds = list(self.input_map.keys()) + list(self.verbs)
+        return command in valid_cmds or command.endswith("cut")
+
+    def key(self, transcript):
+        """🔑 인식 결과 → 실행될 명령"""
+        return self.reduce(self.normalize(transcript))
+
+    def spoken_forms(self, name):
+        """🗣️ 입력 이름을 말하는 형태들 ("p1" → p1, p 1, p one / "2" → 2, two)"""
+        forms = [name]
+        match = re.fullmatch(r"([a-z]*)(\d+)", name)
+        if match:
+            letters, digits = match.groups()
+            word = self.number_words.get(digits)
+            if letters:
+                forms.append(f"{letters} {digits}")
+                if word:
+                    forms.append(f"{letters} {word}")
+            elif word:
+                forms.append(word)
+        return forms
+
+    def phrase_hints(self, boosts):
+        """📚 인식기 적응용 (문구 목록, 가중치) 묶음: 문법이 받아들이는 발화를 전부 말하는 형태로 펼친다
+
+        boosts: {"verb": ..., "quick_cut": ..., "input": ..., "ready": ...} (없는 묶음은 만들지 않음)
+        """
+        inputs = [form for name in self.input_map for form in self.spoken_forms(name)]
+        groups = {
+            "verb": list(self.verbs),
+            "quick_cut": [f"{form} cut" for form in inputs],
+            "input": inputs,
+            "ready": [self.ready_word],
+        }
+        return [(groups[name], boost) for name, boost in boosts.items() if name in groups and boost]
+
+    def decoder_phrases(self):
+        """🧩 문법 제한 디코더(로컬 인식기)용 {말하는 형태: 인식 결과 표기}
+
+        디코더 어휘는 단어뿐이라 숫자가 들어간 형태는 빼고, 결과는 명령 표기로 되돌린다 ("p one cut" → "p1 cut").
+        """
+        inputs = {form: name for name in self.input_map for form in self.spoken_forms(name)
+                  if not any(c.isdigit() for c in form)}
+        phrases = {verb: verb for verb in self.verbs}
+        phrases.update(inputs)
+        phrases.update({f"{form} cut": f"{name} cut" for form, name in inputs.items()})
+        phrases[self.ready_word] = self.ready_word
+        return phrases
+
+
+class CommandBus:
+    """🚌 여러 마이크의 인식 결과를 하나의 순서 있는 명령 흐름으로 합친다
+
+    - 인식 쓰레드들은 post()만 호출하고, 실제 명령 실행은 버스 쓰레드 하나가 도착 순서대로 처리한다.
+    - 서로 다른 마이크에서 dedup_window 초 안에 같은 명령이 들어오면 한 번만 실행한다.
+      (같은 마이크의 반복 명령은 그대로 통과)
+    - thread_hook은 버스 쓰레드가 시작할 때 한 번 호출된다 (우선순위/CPU 고정 등).
+    """
+
+    def __init__(self, handler, key=None, dedup_window=1.0, thread_hook=None):
+        self._handler = handler
+        self._thread_hook = thread_hook
+        self._key = key or (lambda transcript: transcript)
+        self._dedup_window = dedup_window
+        self._queue = queue.Queue()
+        self._recent = {}           # 명령 키 → (마이크 ID, 캡처 시각)
+        self._thread = None
+        self.dispatched = 0
+        self.duplicates = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._queue.put(None)
+
+    def post(self, mic_id, transcript, captured_at=None):
+        """📮 인식 결과 등록 (captured_at: 해당 오디오의 캡처 시각, time.monotonic 기준)"""
+        if captured_at is None:
+            captured_at = time.monotonic()
+        self._queue.put((mic_id, transcript, captured_at))
+
+    def is_duplicate(self, mic_id, transcript, captured_at):
+        """🔁 다른 마이크에서 방금 실행된 같은 명령인지 확인"""
+        key = self._key(transcript)
+        previous = self._recent.get(key)
+        if previous and previous[0] != mic_id and abs(captured_at - previous[1]) < self._dedup_window:
+            return True
+        self._recent[key] = (mic_id, captured_at)
+        return False
+
+    def _run(self):
+        if self._thread_hook:
+            self._thread_hook()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            mic_id, transcript, captured_at = item
+            if self.is_duplicate(mic_id, transcript, captured_at):
+                self.duplicates += 1
+                continue
+            self.dispatched += 1
+            try:
+                self._handler(transcript, captured_at)
+            except Exception as e:
+                print(f"❗[ERROR] 명령 처리 중 예외 발생: {e}")
+
+
+class InterimFastPath:
+    """⚡ 중간 인식 결과로 명령을 먼저 실행하고, 최종 결과가 오면 맞춰 본다
+
+    - 중간 결과는 안정도(stability)가 threshold 이상인 앞부분만 이어붙여서 parse()에 넘긴다.
+      parse()는 바로 실행해도 되는 명령 또는 None을 돌려준다.
+    - 발화 하나에서 한 번만 실행하고, 최종 결과가 오면 key()로 비교한다:
+      "execute" = 먼저 실행한 것이 없음 (최종 결과를 평소대로 실행),
+      "confirmed" = 같은 명령 (다시 실행하지 않음), "diverged" = 다른 명령 (이중 실행 방지를 위해 실행하지 않음)
+    """
+
+    def __init__(self, parse, key=None, stability=0.8):
+        self._parse = parse
+        self._key = key or parse
+        self._stability = stability
+        self._fired = None
+        self._fired_at = None
+        self.fired = 0
+        self.confirmed = 0
+        self.diverged = 0
+        self.lead_seconds = []      # 먼저 실행한 명령이 최종 결과보다 앞선 시간
+
+    def stable_text(self, results):
+        """🧱 (transcript, stability) 목록에서 안정된 앞부분만 이어붙인 문장"""
+        parts = []
+        for transcript, stability in results:
+            if stability < self._stability:
+                break
+            parts.append(transcript)
+        return "".join(parts).strip()
+
+    def interim(self, results):
+        """⏩ 중간 결과 처리: 지금 실행할 명령 (없으면 None)"""
+        if self._fired is not None:
+            return None
+        text = self.stable_text(results)
+        command = self._parse(text) if text else None
+        if command is None:
+            return None
+        self._fired = command
+        self._fired_at = time.monotonic()
+        self.fired += 1
+        return command
+
+    def final(self, transcript):
+        """🏁 최종 결과 처리: (상태, 먼저 실행한 명령, 최종 결과의 명령, 앞선 시간(초))"""
+        fired, fired_at = self._fired, self._fired_at
+        self._fired = self._fired_at = None
+        if fired is None:
+            return "execute", None, None, None
+        final_command = self._key(transcript)
+        lead = time.monotonic() - fired_at
+        if final_command == fired:
+            self.confirmed += 1
+            self.lead_seconds.append(lead)
+            return "confirmed", fired, final_command, lead
+        self.diverged += 1
+        return "diverged", fired, final_command, lead
+
+
+class RotationArbiter:
+    """⚖️ 겹쳐 도는 두 인식 스트림의 최종 결과 중 어느 쪽을 쓸지 정한다 (중복 실행/유실 없이)
+
+    - 평소에는 현재 스트림(owner)의 결과만 쓴다.
+    - 다음 스트림(successor)이 열리면 그 결과는 잡아두고, 현재 스트림이 최종 결과를 내는 순간(발화 경계)
+      그 결과의 캡처 시각을 경계(boundary)로 넘긴다: 경계까지는 이전 스트림, 경계 뒤는 새 스트림 몫.
+    - 발화 경계가 오지 않으면 force()로 지정한 시각에서 넘긴다.
+    - 같은 발화라도 스트림마다 캡처 시각 계산이 조금씩 다르므로, 경계 앞뒤 tolerance 초 안의 결과는
+      다른 스트림이 tolerance 안에서 이미 쓴 결과가 있으면 같은 발화로 보고 버린다.
+    """
+
+    def __init__(self, tolerance=0.5):
+        self._tolerance = tolerance
+        self._lock = threading.Lock()
+        self._held = []             # 넘기기 전에 도착한 새 스트림 결과 (캡처 시각, 항목)
+        self._near = []             # 경계 부근에서 쓴 결과 (스트림, 캡처 시각)
+        self.owner = None
+        self.successor = None
+        self.previous = None
+        self.boundary = None
+        self.handovers = 0
+        self.duplicates = 0
+
+    def start(self, sid):
+        with self._lock:
+            self.owner = sid
+
+    def begin(self, sid):
+        """🆕 다음 스트림이 열렸다 (현재 스트림의 다음 최종 결과에서 넘긴다)"""
+        with self._lock:
+            self.successor = sid
+            self._held = []
+
+    def accepts(self, sid, audio_ts):
+        """✅ 스트림 sid의 이 시각 결과를 지금 써도 되는지 (중간 결과 빠른 실행용)"""
+        with self._lock:
+            return sid == self.owner and self._owns(sid, audio_ts) and not self._is_near_duplicate(sid, audio_ts)
+
+    def offer(self, sid, audio_ts, item):
+        """📨 스트림 sid의 최종 결과 → (지금 쓸 항목 목록, 이번에 넘겼는지)
+
+        item이 None이면 쓸 것은 없지만 발화 경계로는 센다 (이미 먼저 실행된 명령 등).
+        """
+        with self._lock:
+            if sid == self.owner and self.successor is not None:
+                released = self._hand_over(audio_ts, sid)
+                return [i for i in [item] + released if i is not None], True
+            if sid == self.successor:
+                self._held.append((audio_ts, item))
+                return [], False
+            if self._accept(sid, audio_ts, item):
+                return ([item] if item is not None else []), False
+            return [], False
+
+    def force(self, audio_ts):
+        """⏱️ 발화 경계 없이 audio_ts 시각에서 넘긴다 → 잡아두었던 결과 중 쓸 항목 목록"""
+        with self._lock:
+            if self.successor is None:
+                return []
+            return [i for i in self._hand_over(audio_ts) if i is not None]
+
+    def _hand_over(self, audio_ts, boundary_sid=None):
+        self.previous, self.owner, self.successor = self.owner, self.successor, None
+        self.boundary = audio_ts
+        self.handovers += 1
+        # 발화 경계로 넘길 때는 경계를 만든 결과 자체가 이전 스트림이 쓴 결과다
+        self._near = [(boundary_sid, audio_ts)] if boundary_sid is not None else []
+        held, self._held = self._held, []
+        return [item for ts, item in held if self._accept(self.owner, ts, item)]
+
+    def _accept(self, sid, audio_ts, item):
+        """이 결과를 쓸지 정하고, 경계 부근이면 기록한다"""
+        if not self._owns(sid, audio_ts) or self._is_near_duplicate(sid, audio_ts):
+            if item is not None:
+                self.duplicates += 1
+            return False
+        if self.boundary is not None and audio_ts is not None and abs(audio_ts - self.boundary) <= self._tolerance:
+            self._near.append((sid, audio_ts))
+        return True
+
+    def _owns(self, sid, audio_ts):
+        if self.boundary is None or audio_ts is None:
+            return sid == self.owner
+        if sid == self.owner:
+            return audio_ts > self.boundary
+        if sid == self.previous:
+            return audio_ts <= self.boundary
+        return False
+
+    def _is_near_duplicate(self, sid, audio_ts):
+        if audio_ts is None:
+            return False
+        return any(other != sid and abs(audio_ts - ts) <= self._tolerance for other, ts in self._near)
+
+
+class RecognitionSession:
+    """🧵 인식 스트림 하나를 별도 쓰레드에서 돌린다 (예외는 error에 보관)"""
+
+    def __init__(self, sid, reader, target, clock=time.monotonic):
+        self.sid = sid
+        self.reader = reader
+        self.error = None
+        self.started_at = clock()
+        self._thread = threading.Thread(target=self._run, args=(target,), daemon=True, name=f"stt-session-{sid}")
+        self._thread.start()
+
+    def _run(self, target):
+        try:
+            target(self.sid, self.reader)
+        except Exception as e:
+            self.error = e
+
+    @property
+    def alive(self):
+        return self._thread.is_alive()
+
+    def close(self):
+        """🛑 새 오디오를 더 보내지 않는다 (요청 스트림이 끝나고, 남은 결과를 받은 뒤 쓰레드가 끝남)"""
+        self.reader.close()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+
+class SessionRotator:
+    """🔄 스트림 길이 한도 전에 다음 인식 스트림을 미리 열어 끊김 없이 교대한다
+
+    - fanout.subscribe(pre_roll_s)로 같은 오디오를 받는 독자를 만들고,
+      run_session(sid, reader)가 그 오디오로 인식 스트림 하나를 끝까지 돌린다 (세션마다 별도 쓰레드).
+      run_session은 최종 결과마다 offer(sid, audio_ts, item)를 부른다.
+    - limit_s - overlap_s가 지나면 다음 스트림을 열어 두 스트림에 같은 오디오를 보내고,
+      현재 스트림의 다음 최종 결과(발화 경계)에서 넘긴다. limit_s까지 경계가 없으면 그 시점에 넘긴다.
+    - post(item)은 쓰기로 정해진 결과마다, on_rotate(info)는 교대할 때마다 호출된다.
+    """
+
+    def __init__(self, fanout, run_session, post, limit_s=290.0, overlap_s=15.0, pre_roll_s=1.0,
+                 tolerance=0.5, clock=time.monotonic, poll_s=0.1, on_rotate=None):
+        self._fanout = fanout
+        self._run_session = run_session
+        self._post = post
+        self._limit_s = limit_s
+        self._overlap_s = overlap_s
+        self._pre_roll_s = pre_roll_s
+        self._clock = clock
+        self._poll_s = poll_s
+        self._on_rotate = on_rotate
+        self._handed_over = threading.Event()
+        self.arbiter = RotationArbiter(tolerance)
+        self.rotations = []         # 교대 기록 (on_rotate에 넘긴 것과 같은 dict)
+
+    def offer(self, sid, audio_ts, item):
+        items, handed_over = self.arbiter.offer(sid, audio_ts, item)
+        for item in items:
+            self._post(item)
+        if handed_over:
+            self._handed_over.set()
+
+    def accepts(self, sid, audio_ts):
+        return self.arbiter.accepts(sid, audio_ts)
+
+    def _open(self, sid, pre_roll_s):
+        reader = self._fanout.subscribe(pre_roll_s)
+        return RecognitionSession(sid, reader, self._run_session, clock=self._clock)
+
+    def _wait(self, done, session, should_stop):
+        """⏳ done()이 참이 될 때까지 기다린다 (중지 요청이나 세션 종료 시 False)"""
+        while not done():
+            if should_stop() or not session.alive:
+                return False
+            self._handed_over.wait(self._poll_s)
+        return True
+
+    def run(self, should_stop):
+        """▶️ 중지 요청이 오거나 현재 스트림이 끝날 때까지 교대를 반복한다 (스트림에서 난 예외는 다시 던짐)"""
+        current = self._open(0, 0.0)
+        self.arbiter.start(current.sid)
+        sessions = [current]
+        try:
+            while True:
+                rotate_at = current.started_at + self._limit_s - self._overlap_s
+                if not self._wait(lambda: self._clock() >= rotate_at, current, should_stop):
+                    break
+                successor = self._open(current.sid + 1, self._pre_roll_s)
+                sessions.append(successor)
+                self.arbiter.begin(successor.sid)
+                deadline = current.started_at + self._limit_s
+                self._wait(lambda: self._handed_over.is_set() or self._clock() >= deadline, current, should_stop)
+                if should_stop():
+                    break
+                reason = "utterance"
+                if not self._handed_over.is_set():
+                    # 한도까지 발화 경계가 없었거나, 현재 스트림이 먼저 끊겼다 → 지금 위치에서 넘긴다
+                    reason = "error" if current.error else "limit"
+                    for item in self.arbiter.force(current.reader.last_captured_at):
+                        self._post(item)
+                self._handed_over.clear()
+                current.close()
+                info = {"from": current.sid, "to": successor.sid, "reason": reason,
+                        "overlap": max(0.0, current.reader.end_seconds - successor.reader.start_seconds),
+                        "gap": max(0.0, successor.reader.start_seconds - current.reader.end_seconds)}
+                self.rotations.append(info)
+                if self._on_rotate:
+                    self._on_rotate(info)
+                current = successor
+        finally:
+            for session in sessions:
+                session.close()
+        if current.error:
+            raise current.error
+
+
+class HedgeArbiter:
+    """🏁 같은 오디오를 받는 여러 인식 엔진의 최종 결과 중, 발화마다 먼저 온 믿을 만한 결과 하나만 쓴다
+
+    - thresholds: {엔진: 최소 신뢰도}. acceptable(transcript)가 참(유효한 명령)이고 신뢰도가 그 이상이면 채택.
+    - 같은 발화인지는 결과 끝의 캡처 시각으로 본다: 다른 엔진의 결과가 window 초 안이면 같은 발화.
+      이미 채택된 발화에 늦게 온 결과는 버리고, 채택된 결과보다 얼마나 늦었는지만 기록한다.
+    - 엔진별 통계(stats): 최종 결과 수, 채택(wins), 기준 미달(rejected), 늦음(late),
+      지연(latencies: 결과 끝 캡처 → 결과 도착), 늦은 시간(behind).
+      self.latencies는 채택된 결과만의 지연 (헤징한 경로의 지연 분포).
+    """
+
+    def __init__(self, thresholds, acceptable, window=0.7, clock=time.monotonic, max_utterances=64):
+        self._thresholds = dict(thresholds)
+        self._acceptable = acceptable
+        self._window = window
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._utterances = deque(maxlen=max_utterances)   # {"ts", "winner", "won_at", "engines"}
+        self.stats = {engine: {"finals": 0, "wins": 0, "rejected": 0, "late": 0, "latencies": [], "behind": []}
+                      for engine in self._thresholds}
+        self.latencies = []
+
+    def _match(self, engine, audio_ts):
+        if audio_ts is None:
+            return None
+        for utterance in reversed(self._utterances):
+            if (utterance["ts"] is not None and engine not in utterance["engines"]
+                    and abs(audio_ts - utterance["ts"]) <= self._window):
+                return utterance
+        return None
+
+    def offer(self, engine, transcript, confidence, audio_ts):
+        """📨 엔진의 최종 결과 → 이 결과를 쓸지 (발화마다 처음 채택된 하나만 True)"""
+        now = self._clock()
+        with self._lock:
+            stats = self.stats[engine]
+            stats["finals"] += 1
+            latency = now - audio_ts if audio_ts is not None else None
+            if latency is not None:
+                stats["latencies"].append(latency)
+            utterance = self._match(engine, audio_ts)
+            if utterance is None:
+                utterance = {"ts": audio_ts, "winner": None, "won_at": None, "engines": set()}
+                self._utterances.append(utterance)
+            utterance["engines"].add(engine)
+            if utterance["winner"] is not None:
+                stats["late"] += 1
+                stats["behind"].append(now - utterance["won_at"])
+                return False
+            if not self._acceptable(transcript) or (confidence or 0.0) < self._thresholds[engine]:
+                stats["rejected"] += 1
+                return False
+            utterance["winner"], utterance["won_at"] = engine, now
+            stats["wins"] += 1
+            if latency is not None:
+                self.latencies.append(latency)
+            return True
+
+    def win_rates(self):
+        """📊 엔진별 채택 비율 (채택된 발화 전체 대비)"""
+        total = sum(stats["wins"] for stats in self.stats.values())
+        return {engine: stats["wins"] / total if total else 0.0 for engine, stats in self.stats.items()}
+
+
+class HedgedRecognizer:
+    """🏁 같은 오디오를 여러 인식 엔진에 동시에 보낸다 (엔진마다 별도 세션)
+
+    - fanout.subscribe()로 엔진마다 독자를 만들고 run_engine(engine, reader)가 그 엔진으로 인식을 돌린다.
+    - 한 엔진이 끊겨도(WAN 장애 등) 나머지 엔진은 계속 동작하고, 끊긴 엔진은 retry_s 뒤에 다시 연다.
+      on_error(engine, error)는 엔진이 예외로 끝날 때마다 호출된다.
+    """
+
+    def __init__(self, fanout, engines, run_engine, retry_s=5.0, on_error=None, clock=time.monotonic, poll_s=0.1):
+        self._fanout = fanout
+        self._engines = list(engines)
+        self._run_engine = run_engine
+        self._retry_s = retry_s
+        self._on_error = on_error
+        self._clock = clock
+        self._poll_s = poll_s
+        self.restarts = {engine: 0 for engine in self._engines}
+
+    def _open(self, engine):
+        return RecognitionSession(engine, self._fanout.subscribe(), self._run_engine, clock=self._clock)
+
+    def run(self, should_stop):
+        """▶️ 중지 요청이 오거나 오디오가 끝날 때까지 엔진들을 돌린다"""
+        sessions = {engine: self._open(engine) for engine in self._engines}
+        retry_at = {}
+        try:
+            while not should_stop():
+                if self._fanout.finished and not any(session.alive for session in sessions.values()):
+                    break
+                now = self._clock()
+                for engine, session in sessions.items():
+                    if session.alive:
+                        continue
+                    if engine not in retry_at:
+                        if session.error and self._on_error:
+                            self._on_error(engine, session.error)
+                        retry_at[engine] = now + self._retry_s
+                    elif now >= retry_at[engine] and not self._fanout.finished:
+                        del retry_at[engine]
+                        sessions[engine] = self._open(engine)
+                        self.restarts[engine] += 1
+                time.sleep(self._poll_s)
+        finally:
+            for session in sessions.values():
+                session.close()
@@ -1,11 +1,10 @@
 import os
-import pyaudio
-from six.moves import queue
 from google.cloud import speech
 import requests
 import time
 import threading
 import re
+from tc_audio import MicrophoneStream
 
 # ✅ Google 인증 키 경로 설정
 os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = "C:/Users/JYP/Documents/GitHub/TC_AudioCommand/GRPC/my-key01.json"
@@ -22,46 +21,9 @@ INPUT_MAP = {
 # 🎧 오디오 설정
 RATE = 16000
 CHUNK = int(RATE / 10)
+MAX_AUDIO_AGE_S = 1.0   # 이보다 오래된 오디오는 인식기에 보내지 않음
 
 
-class MicrophoneStream:
-    def __init__(self, rate, chunk):
-        self._rate = rate
-        self._chunk = chunk
-        self._buff = queue.Queue()
-        self.closed = True
-
-    def __enter__(self):
-        self._audio_interface = pyaudio.PyAudio()
-        self._audio_stream = self._audio_interface.open(
-            format=pyaudio.paInt16,
-            channels=1,
-            rate=self._rate,
-            input=True,
-            frames_per_buffer=self._chunk,
-            stream_callback=self._fill_buffer,
-        )
-        self.closed = False
-        return self
-
-    def __exit__(self, type, value, traceback):
-        self._audio_stream.stop_stream()
-        self._audio_stream.close()
-        self.closed = True
-        self._buff.put(None)
-        self._audio_interface.terminate()
-
-    def _fill_buffer(self, in_data, frame_count, time_info, status_flags):
-        self._buff.put(in_data)
-        return None, pyaudio.paContinue
-
-    def generator(self):
-        while not self.closed:
-            chunk = self._buff.get()
-            if chunk is None:
-                continue
-            yield chunk
-
 # 🧠 발음 보정 테이블
 phonetic_map = {
     "one": "1", "two": "2", "too": "2", "to": "2", "three": "3", "tree": "3",
@@ -118,13 +80,20 @@ def direct_cut(input_key):
 
 # 🎤 음성 인식 루프
 
+def close_generator(generator):
+    """🔚 끝난 세션의 오디오 제너레이터를 닫는다 (gRPC 요청 쓰레드가 아직 실행 중이면 닫을 수 없어 ValueError → 무시)"""
+    try:
+        generator.close()
+    except ValueError:
+        pass
+
 def listen_print_loop(client, streaming_config, stream):
     global last_command, test_completed, last_command_time, last_preview_key
 
     while True:
         audio_generator = stream.generator()
         requests_gen = (
-            speech.StreamingRecognizeRequest(audio_content=content)
+            speech.StreamingRecognizeRequest(audio_content=bytes(content))
             for content in audio_generator
         )
         responses = client.streaming_recognize(streaming_config, requests_gen)
@@ -195,13 +164,14 @@ def listen_print_loop(client, streaming_config, stream):
 
         except Exception as e:
             print(f"⚠️ 세션 오류 발생: {e}\n🔄 STT 세션을 재시작합니다...", flush=True)
-            while not stream._buff.empty():
-                try:
-                    stream._buff.get_nowait()
-                except queue.Empty:
-                    break
             time.sleep(1)
+            # 이전 세션의 제너레이터를 먼저 닫아야 밀린 오디오를 버린 뒤 두 제너레이터가 같은 링버퍼를 나눠 읽지 않는다
+            close_generator(audio_generator)
+            dropped = stream.discard_backlog()
+            if dropped:
+                print(f"🗑️ 재시작 전 밀린 오디오 {dropped:.2f}초 폐기", flush=True)
             continue
+        close_generator(audio_generator)
 
 # ⏱️ STT 초기화 타이머
 
@@ -225,7 +195,10 @@ def main():
         interim_results=False,
     )
 
-    with MicrophoneStream(RATE, CHUNK) as stream:
+    def on_stale(seconds):
+        print(f"⚠️ 지연 오디오 {seconds:.2f}초 폐기됨", flush=True)
+
+    with MicrophoneStream(RATE, CHUNK, max_age=MAX_AUDIO_AGE_S, on_stale=on_stale) as stream:
         listen_print_loop(client, streaming_config, stream)
 
 if __name__ == "__main__":
@@ -0,0 +1,8 @@
+"""
+🧪 pytest 공통 설정: GRPC 폴더의 tc_* 모듈을 패키지 설치 없이 import
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
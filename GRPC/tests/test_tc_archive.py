@@ -0,0 +1,77 @@
+"""
+🧪 tc_archive 테스트: 세그먼트 경계를 넘는 구간 꺼내기, 슬롯 재사용
+
+1 kHz, 세그먼트 1초(1000샘플)로 작게 만들어서 몇 초만 써도 세그먼트가 넘어가게 한다.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from tc_archive import AudioArchive
+
+RATE = 1000
+BASE = 1000.0       # 첫 샘플 직전의 캡처 시각 (time.monotonic 기준)
+
+
+def write_chunks(archive, n_chunks, chunk=300):
+    """청크 i는 값 i로 채우고, 캡처 시각은 오디오 위치에 맞춘다 → 샘플 p의 시각 = BASE + (p + 1) / RATE"""
+    for i in range(n_chunks):
+        data = np.full(chunk, i, dtype=np.int16).tobytes()
+        archive.write(data, captured_at=BASE + (i + 1) * chunk / RATE)
+
+
+def at(archive, position):
+    """오디오 위치(샘플) → 벽시계 시각"""
+    return archive.wall_time(BASE + position / RATE)
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = AudioArchive(str(tmp_path), RATE, retain_hours=3 / 3600, segment_seconds=1)
+    yield archive
+    archive.close()
+
+
+def test_slice_across_segment_rollover(archive):
+    write_chunks(archive, 5)                    # 1500샘플 → 세그먼트 2개 (청크 3이 경계에 걸침)
+    assert [s.length for s in archive.segments()] == [1000, 500]
+    pcm = archive.slice(at(archive, 800), at(archive, 1300))
+    expected = np.repeat([2, 3, 4], [100, 300, 100])
+    assert np.array_equal(pcm, expected)
+
+
+def test_slice_whole_archive_returns_everything_in_order(archive):
+    write_chunks(archive, 5)
+    pcm = archive.slice(at(archive, -100), at(archive, 2000))
+    assert np.array_equal(pcm, np.repeat(np.arange(5), 300))
+
+
+def test_oldest_slot_is_reused_after_retention(archive, tmp_path):
+    assert archive.slots == 3
+    write_chunks(archive, 17)                   # 5100샘플 → 세그먼트 6개, 슬롯 3개를 돌려 씀
+    segments = archive.segments()
+    assert [s.seq for s in segments] == [4, 5, 6]
+    assert sorted(s.slot for s in segments) == [0, 1, 2]
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".pcm")]) == 3
+    # 덮어쓴 앞쪽 구간은 비어 있고, 남은 구간은 그대로 꺼낼 수 있다
+    assert len(archive.slice(at(archive, 0), at(archive, 2000))) == 0
+    pcm = archive.slice(at(archive, 3000), at(archive, 5100))
+    assert np.array_equal(pcm, np.repeat(np.arange(17), 300)[3000:5100])
+
+
+def test_reopened_archive_continues_after_newest_segment(archive, tmp_path):
+    write_chunks(archive, 5)
+    newest = archive.segments()[-1]
+    newest_seq, newest_slot = newest.seq, newest.slot
+    archive.close()
+    reopened = AudioArchive(str(tmp_path), RATE, retain_hours=3 / 3600, segment_seconds=1)
+    try:
+        # 새로 여는 쪽은 다음 순번으로 빈 슬롯(가장 오래된 자리)에서 시작하고, 기존 기록은 남는다
+        assert reopened._current.seq == newest_seq + 1
+        assert reopened._current.slot != newest_slot
+        reader = AudioArchive.open(str(tmp_path))
+        assert np.array_equal(reader.slice(at(archive, 0), at(archive, 1500)), np.repeat(np.arange(5), 300))
+    finally:
+        reopened.close()
@@ -0,0 +1,344 @@
+"""
+🧪 tc_audio 테스트: 링버퍼 오버플로 정책, 공유 메모리 버스 리더, 요청 프레이밍, 업링크 인코더
+"""
+
+import threading
+import time
+
+import pytest
+
+from tc_audio import (AudioRingBuffer, BusSource, SharedAudioBus, ToneSource, UplinkEncoder, _FeederSource,
+                      frame_requests)
+
+
+def pcm(value, n_samples):
+    """int16 값 하나로 채운 청크"""
+    return value.to_bytes(2, "little", signed=True) * n_samples
+
+
+def test_ring_rejects_unknown_policy():
+    with pytest.raises(ValueError):
+        AudioRingBuffer(64, overflow="spill")
+
+
+def test_ring_read_returns_written_audio_in_order():
+    ring = AudioRingBuffer(64)
+    ring.write(pcm(1, 4), captured_at=1.0)
+    ring.write(pcm(2, 4), captured_at=2.0)
+    assert bytes(ring.read(timeout=0)) == pcm(1, 4) + pcm(2, 4)
+    assert ring.last_captured_at == 2.0
+    assert len(ring.read(timeout=0)) == 0
+
+
+def test_ring_drop_newest_keeps_buffered_audio():
+    ring = AudioRingBuffer(16, overflow="drop_newest")
+    assert ring.write(pcm(1, 8))
+    assert not ring.write(pcm(2, 4))
+    assert ring.overflow_count == 1
+    assert ring.dropped_bytes == 8
+    assert bytes(ring.read(timeout=0)) == pcm(1, 8)
+
+
+def test_ring_drop_oldest_overwrites_and_reader_skips_lapped_audio():
+    ring = AudioRingBuffer(16, overflow="drop_oldest")
+    ring.write(pcm(1, 4))
+    ring.write(pcm(2, 4))
+    ring.write(pcm(3, 4))         # 한 바퀴를 넘음 → 가장 오래된 4샘플(8바이트)을 덮어씀
+    assert ring.overflow_count == 1
+    data = bytes(ring.read(timeout=0))
+    data += bytes(ring.read(timeout=0))
+    assert data == pcm(2, 4) + pcm(3, 4)
+    assert ring.dropped_bytes == 8
+
+
+def test_ring_drop_oldest_counts_depth_up_to_capacity():
+    ring = AudioRingBuffer(16, overflow="drop_oldest")
+    for value in range(5):
+        ring.write(pcm(value, 4))
+    assert ring.depth() == 16
+    assert ring.take_peak_depth() == 16
+
+
+def test_ring_block_policy_waits_for_reader_without_losing_audio():
+    ring = AudioRingBuffer(16, overflow="block")
+    written = threading.Event()
+
+    def producer():
+        for value in range(6):
+            ring.write(pcm(value, 4))
+        written.set()
+
+    thread = threading.Thread(target=producer, daemon=True)
+    thread.start()
+    assert not written.wait(0.2)          # 두 청크(16바이트)를 넣은 뒤 공간을 기다린다
+    received = b""
+    while len(received) < 6 * 8:
+        received += bytes(ring.read(timeout=1.0))
+    thread.join(1.0)
+    assert written.is_set()
+    assert received == b"".join(pcm(value, 4) for value in range(6))
+    assert ring.overflow_count == 0 and ring.dropped_bytes == 0
+
+
+def test_ring_close_releases_blocked_writer():
+    ring = AudioRingBuffer(8, overflow="block")
+    ring.write(pcm(1, 4))
+    result = []
+    thread = threading.Thread(target=lambda: result.append(ring.write(pcm(2, 4))), daemon=True)
+    thread.start()
+    time.sleep(0.05)
+    ring.close()
+    thread.join(1.0)
+    assert result == [False]
+    assert bytes(ring.read(timeout=0)) == pcm(1, 4)
+    assert ring.read(timeout=0) is None
+
+
+def test_ring_max_age_discards_stale_chunks():
+    ring = AudioRingBuffer(64)
+    now = time.monotonic()
+    ring.write(pcm(1, 4), captured_at=now - 5.0)
+    ring.write(pcm(2, 4), captured_at=now)
+    assert bytes(ring.read(timeout=0, max_age=1.0)) == pcm(2, 4)
+    assert ring.stale_bytes == 8
+
+
+def test_ring_oversized_write_keeps_newest_capacity():
+    ring = AudioRingBuffer(8, overflow="drop_newest")
+    assert ring.write(pcm(1, 2) + pcm(2, 4))
+    assert bytes(ring.read(timeout=0)) == pcm(2, 4)
+
+
+@pytest.fixture
+def bus():
+    """슬롯 4개(슬롯당 4샘플)짜리 작은 버스"""
+    bus = SharedAudioBus(16, 4, seconds=1)
+    yield bus
+    bus.release()
+
+
+def test_bus_readers_read_independently(bus):
+    first, second = bus.reader(), bus.reader()
+    bus.publish(pcm(1, 4), captured_at=1.0)
+    bus.publish(pcm(2, 4), captured_at=2.0)
+    assert bytes(first.read(timeout=0)) == pcm(1, 4)
+    assert bytes(first.read(timeout=0)) == pcm(2, 4)
+    assert bytes(second.read(timeout=0)) == pcm(1, 4)
+    assert first.last_captured_at == 2.0 and second.last_captured_at == 1.0
+    assert len(first.read(timeout=0)) == 0
+
+
+def test_bus_publish_splits_long_chunks_into_slots(bus):
+    reader = bus.reader()
+    bus.publish(pcm(1, 4) + pcm(2, 2), captured_at=10.0)
+    assert bytes(reader.read(timeout=0)) == pcm(1, 4)
+    assert reader.last_captured_at == pytest.approx(10.0 - 2 / 16)
+    assert bytes(reader.read(timeout=0)) == pcm(2, 2)
+    assert reader.last_captured_at == 10.0
+
+
+def test_bus_lapped_reader_skips_overwritten_slots(bus):
+    reader = bus.reader()
+    for value in range(7):          # 슬롯 4개 → 리더가 3슬롯 뒤처짐
+        bus.publish(pcm(value, 4))
+    assert reader.depth() == 4 * bus.slot_bytes
+    assert bytes(reader.read(timeout=0)) == pcm(3, 4)
+    assert reader.overflow_count == 1
+    assert reader.dropped_bytes == 3 * bus.slot_bytes
+    rest = [bytes(reader.read(timeout=0)) for _ in range(3)]
+    assert rest == [pcm(value, 4) for value in range(4, 7)]
+    assert len(reader.read(timeout=0)) == 0
+
+
+def test_bus_lap_does_not_block_writer_or_other_readers(bus):
+    slow, fast = bus.reader(), bus.reader()
+    for value in range(10):
+        assert bus.publish(pcm(value, 4))
+        assert bytes(fast.read(timeout=0)) == pcm(value, 4)
+    assert fast.overflow_count == 0
+    assert bytes(slow.read(timeout=0)) == pcm(6, 4)
+    assert slow.dropped_bytes == 6 * bus.slot_bytes
+
+
+def test_bus_from_start_reader_gets_retained_slots(bus):
+    for value in range(6):
+        bus.publish(pcm(value, 4))
+    reader = bus.reader(from_start=True)
+    assert [bytes(reader.read(timeout=0)) for _ in range(4)] == [pcm(value, 4) for value in range(2, 6)]
+
+
+def test_bus_reader_drops_stale_slots(bus):
+    reader = bus.reader()
+    now = time.monotonic()
+    bus.publish(pcm(1, 4), captured_at=now - 5.0)
+    bus.publish(pcm(2, 4), captured_at=now)
+    assert bytes(reader.read(timeout=0, max_age=1.0)) == pcm(2, 4)
+    assert reader.stale_bytes == bus.slot_bytes
+
+
+def test_bus_close_ends_reader_after_remaining_slots(bus):
+    reader = bus.reader()
+    bus.publish(pcm(1, 4))
+    bus.close()
+    assert not bus.publish(pcm(2, 4))
+    assert bytes(reader.read(timeout=0)) == pcm(1, 4)
+    assert reader.read(timeout=0) is None
+
+
+def test_bus_source_reads_published_audio(bus):
+    with BusSource(bus) as source:
+        bus.publish(pcm(1, 4))
+        bus.publish(pcm(2, 4))
+        bus.close()
+        assert b"".join(bytes(chunk) for chunk in source.generator()) == pcm(1, 4) + pcm(2, 4)
+
+
+def test_bus_release_invalidates_outstanding_reader_views():
+    bus = SharedAudioBus(16, 4, seconds=1)
+    reader = bus.reader()
+    bus.publish(pcm(1, 4))
+    view = reader.read(timeout=0)
+    bus.release()
+    with pytest.raises(ValueError):
+        bytes(view)
+
+
+def test_bus_attach_as_owner_unlinks_leftover_segment():
+    leftover = SharedAudioBus(16, 4, seconds=1)
+    name = leftover.name
+    SharedAudioBus.attach(name, owner=True).release()
+    with pytest.raises(FileNotFoundError):
+        SharedAudioBus.attach(name)
+    leftover.owner = False          # 이미 지워진 세그먼트 → 매핑만 해제
+    leftover.release()
+
+
+def test_feeder_source_rejects_non_positive_speed():
+    with pytest.raises(ValueError):
+        ToneSource(16000, 1600, speed=0.0)
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_feeder_source_error_ends_generator():
+    class BrokenSource(_FeederSource):
+        def _frames(self):
+            yield pcm(1, 4)
+            raise OSError("read failed")
+
+    received = []
+    with BrokenSource(16000, 4, speed=None) as source:
+        thread = threading.Thread(target=lambda: received.extend(bytes(c) for c in source.generator()),
+                                  daemon=True)
+        thread.start()
+        thread.join(2.0)
+    assert not thread.is_alive()
+    assert received == [pcm(1, 4)]
+
+
+def test_feeder_source_max_speed_yields_chunk_sized_frames():
+    with ToneSource(16000, 160, duration=1.0, speed=None) as source:
+        time.sleep(0.1)             # 링버퍼에 여러 청크가 쌓이게 둔다
+        sizes = {len(chunk) for chunk in source.generator()}
+    assert sizes == {320}
+
+
+def test_frame_requests_regroups_chunks_to_target_length():
+    chunks = [pcm(i, 30) for i in range(11)]      # 30 ms씩 (1 kHz) = 330 ms
+    frames = list(frame_requests(chunks, 1000, target_ms=100, pace=False))
+    assert [len(frame) for frame in frames] == [200, 200, 200, 60]
+    assert b"".join(frames) == b"".join(chunks)
+
+
+def test_frame_requests_passes_target_sized_chunk_without_copy():
+    chunk = memoryview(pcm(7, 100))
+    assert next(frame_requests([chunk], 1000, target_ms=100, pace=False)) is chunk
+
+
+def test_frame_requests_never_exceeds_byte_cap():
+    audio = pcm(3, 16000)
+    frames = list(frame_requests([audio], 16000, target_ms=1000, max_bytes=1001, pace=False))
+    # 홀수 한도는 샘플 경계(짝수 바이트)로 내린다
+    assert max(len(frame) for frame in frames) == 1000
+    assert all(len(frame) % 2 == 0 for frame in frames)
+    assert b"".join(frames) == audio
+
+
+def test_frame_requests_paces_backlog_at_catchup_speed():
+    backlog = pcm(5, 400)                         # 400 ms 분량이 한 번에 밀려 있음
+    start = time.monotonic()
+    frames = list(frame_requests([backlog], 1000, target_ms=20, pace=True, catchup=2.0))
+    elapsed = time.monotonic() - start
+    assert len(frames) == 20
+    # 첫 요청은 바로, 이후 19개는 20 ms / 2배속 = 10 ms 간격
+    assert elapsed >= 0.19 - 0.005
+    assert elapsed < 0.4
+
+
+class FailingEncoder:
+    """n번째 write에서 실패하는 가짜 SoundFile (그 전까지는 청크마다 b"enc"를 씀)"""
+
+    def __init__(self, sink, fail_at):
+        self._sink = sink
+        self._fail_at = fail_at
+        self.writes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def write(self, samples):
+        self.writes += 1
+        if self.writes == self._fail_at:
+            raise RuntimeError("encoder broke")
+        self._sink.write(b"enc")
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_uplink_encoder_unavailable_codec_passes_pcm_through(monkeypatch):
+    def refuse(self, sink):
+        raise RuntimeError("format not supported")
+
+    monkeypatch.setattr(UplinkEncoder, "_open", refuse)
+    encoder = UplinkEncoder(16000, "OGG_OPUS")
+    assert encoder.codec == "LINEAR16"
+    assert isinstance(encoder.error, RuntimeError)
+    chunks = [pcm(i, 160) for i in range(3)]
+    assert list(encoder.encode(chunks)) == chunks
+
+
+def test_uplink_encoder_worker_error_falls_back_to_raw_pcm(monkeypatch):
+    encoder = UplinkEncoder(16000, "FLAC")
+    encoder._soundfile = object()   # 비공개 API가 없는 soundfile처럼
+    monkeypatch.setattr(encoder, "_open", lambda sink: FailingEncoder(sink, fail_at=2))
+    chunks = [pcm(i, 160) for i in range(4)]
+    out = list(encoder.encode(chunks))
+    assert out == [b"enc"] + chunks[1:]
+    assert encoder.codec == "LINEAR16"
+    assert str(encoder.error) == "encoder broke"
+    assert encoder.input_bytes == sum(len(chunk) for chunk in chunks)
+
+
+def test_uplink_encoder_page_latency_skipped_without_private_api():
+    encoder = UplinkEncoder(16000, "OGG_OPUS")
+    encoder._soundfile = object()
+    assert encoder._set_page_latency(object()) is False
+
+
+def test_uplink_encoder_encodes_again_after_generator_closed():
+    pytest.importorskip("soundfile")
+    encoder = UplinkEncoder(16000, "FLAC")
+    if encoder.error is not None:
+        pytest.skip(f"libsndfile FLAC 없음: {encoder.error}")
+    chunks = [pcm(1000, 1600) for _ in range(5)]
+    first = encoder.encode(chunks)
+    next(first)
+    first.close()
+    again = b"".join(encoder.encode(chunks))
+    assert again.startswith(b"fLaC")
@@ -0,0 +1,290 @@
+"""
+🧪 tc_dsp 테스트: 음성 구간 게이트(VAD), 에코 게이트, 푸시투토크 게이트, 고역 통과 필터, 리샘플러, 지연-합 빔포머
+"""
+
+import numpy as np
+import pytest
+
+import tc_dsp
+from tc_dsp import (DelayAndSumBeamformer, EchoGate, HighPassFilter, MicArray, PolyphaseResampler, PushToTalkGate,
+                    VoiceActivityGate, to_samples)
+
+RATE = 1000
+
+
+def pcm(value, n_samples):
+    """int16 값 하나로 채운 청크"""
+    return value.to_bytes(2, "little", signed=True) * n_samples
+
+
+SPEECH = 5000   # -16 dBFS 직류: 영교차 없음 → 음성
+QUIET = 1       # -90 dBFS: 무음
+
+
+def vad(**options):
+    """100 ms 청크(100샘플) 기준 VAD (프레임 10 ms)"""
+    defaults = dict(frame_ms=10, pre_roll_ms=300, hangover_ms=0, keepalive_s=60.0)
+    defaults.update(options)
+    return VoiceActivityGate(RATE, **defaults)
+
+
+def values(chunk):
+    """청크를 이루는 샘플 값들 (청크별 표식 확인용)"""
+    return sorted(set(to_samples(chunk).tolist()))
+
+
+class Clock:
+    """청크 끝 캡처 시각을 돌려주는 시계 (청크를 하나 내보낼 때마다 chunk_s만큼 진행)"""
+
+    def __init__(self, start, chunk_s):
+        self.t = start
+        self.chunk_s = chunk_s
+
+    def __call__(self):
+        self.t = round(self.t + self.chunk_s, 6)
+        return self.t
+
+
+def test_vad_suppresses_silence():
+    gate = vad()
+    assert list(gate.filter([pcm(QUIET, 100)] * 5)) == []
+    assert gate.suppressed_seconds == pytest.approx(0.5)
+    assert not gate.active
+
+
+def test_vad_opens_with_pre_roll_of_preceding_chunks():
+    gate = vad(pre_roll_ms=300)
+    # 무음 청크마다 다른 값(1~6)을 넣어서 어느 청크가 프리롤로 붙었는지 확인
+    quiet = [pcm(i, 100) for i in range(1, 7)]
+    out = list(gate.filter(quiet + [pcm(SPEECH, 100)]))
+    assert len(out) == 1
+    opened = out[0]
+    assert len(opened) == 4 * 200
+    assert [values(opened[i:i + 200]) for i in range(0, 800, 200)] == [[4], [5], [6], [SPEECH]]
+    # 프리롤로 보낸 오디오는 억제 시간에서 빠진다
+    assert gate.suppressed_seconds == pytest.approx(0.3)
+    assert gate.forwarded_seconds == pytest.approx(0.4)
+
+
+def test_vad_hangover_keeps_sending_after_speech_ends():
+    gate = vad(pre_roll_ms=0, hangover_ms=250)
+    chunks = [pcm(SPEECH, 100)] + [pcm(QUIET, 100)] * 4
+    out = list(gate.filter(chunks))
+    # 행오버 25프레임 = 무음 청크 2개 반 → 청크 단위로 2개까지 보냄
+    assert out == chunks[:3]
+    assert not gate.active
+
+
+def test_vad_keepalive_sends_silence_while_suppressed():
+    gate = vad(keepalive_s=0.5)
+    out = list(gate.filter([pcm(QUIET, 100)] * 12))
+    assert out == [bytes(200), bytes(200)]
+    assert gate.forwarded_seconds == pytest.approx(0.2)
+
+
+def test_echo_gate_masks_only_samples_inside_playback_window():
+    gate = EchoGate(RATE, pre_ms=0, tail_ms=100)
+    gate.playback_started(at=10.25)
+    gate.playback_finished(at=10.5)
+    # 청크 0.5초 = 캡처 시각 10.0 ~ 11.0 (샘플 i의 시각은 10.0 + (i + 1) / RATE)
+    out = list(gate.filter([pcm(1000, 500), pcm(1000, 500)], Clock(10.0, 0.5)))
+    samples = np.concatenate([to_samples(chunk) for chunk in out])
+    assert len(samples) == 1000
+    times = 10.0 + (np.arange(1000) + 1) / RATE
+    masked = (times >= 10.25) & (times <= 10.6)
+    assert np.all(samples[masked] == 0)
+    assert np.all(samples[~masked] == 1000)
+    assert gate.gated_seconds == pytest.approx(masked.sum() / RATE)
+
+
+def test_echo_gate_passes_chunks_outside_window_unchanged():
+    gate = EchoGate(RATE, pre_ms=0, tail_ms=0)
+    gate.playback_started(at=5.0)
+    gate.playback_finished(at=5.1)
+    chunk = pcm(123, 100)
+    assert list(gate.filter([chunk], Clock(9.0, 0.1))) == [chunk]
+    assert gate.gated_seconds == 0.0
+
+
+def test_echo_gate_open_playback_masks_until_finished():
+    gate = EchoGate(RATE, pre_ms=0, tail_ms=0)
+    gate.playback_started(at=1.0)
+    assert gate.is_echo(100.0)
+    gate.playback_finished(at=2.0)
+    assert gate.is_echo(1.5)
+    assert not gate.is_echo(2.5)
+    assert not gate.is_echo(None)
+
+
+def test_echo_gate_audible_refines_start_of_open_playback():
+    gate = EchoGate(RATE, pre_ms=0, tail_ms=0)
+    gate.playback_started(at=1.0)
+    gate.playback_audible(at=1.3)
+    gate.playback_finished(at=2.0)
+    assert not gate.is_echo(1.2)
+    assert gate.is_echo(1.4)
+    assert gate.playbacks == 1
+
+
+def test_echo_gate_finished_without_start_is_ignored():
+    gate = EchoGate(RATE)
+    gate.playback_finished(at=1.0)
+    gate.playback_audible(at=1.0)
+    assert not gate.is_echo(1.0)
+    assert gate.playbacks == 0
+
+
+@pytest.fixture
+def now(monkeypatch):
+    """tc_dsp가 읽는 time.monotonic을 직접 정하는 가짜 시계 (now.t = ...)"""
+    class Now:
+        t = 100.0
+
+    monkeypatch.setattr(tc_dsp.time, "monotonic", lambda: Now.t)
+    return Now
+
+
+def test_ptt_filter_starts_pre_roll_before_press(now):
+    gate = PushToTalkGate(RATE, pre_roll_ms=300)
+    now.t = 10.0
+    gate.press()
+    ends = iter([9.6, 9.75, 9.85])          # 청크(100 ms) 끝 캡처 시각
+    chunks = [pcm(1, 100), pcm(2, 100), pcm(3, 100)]
+    out = list(gate.filter(chunks, lambda: next(ends)))
+    # 9.7 이전 오디오는 버리고, 걸친 청크는 뒤쪽 50 ms만
+    assert out == [pcm(2, 50), pcm(3, 100)]
+    assert gate.talk_seconds == pytest.approx(0.15)
+
+
+def test_ptt_filter_ends_after_release_once_debounce_passed(now):
+    gate = PushToTalkGate(RATE, pre_roll_ms=0, debounce_ms=80)
+    now.t = 10.0
+    gate.press()
+
+    def chunks():
+        yield pcm(1, 100)
+        now.t = 10.2
+        gate.release()
+        yield pcm(2, 100)           # 뗀 직후 (디바운스 안) → 계속 보냄
+        now.t = 10.3
+        yield pcm(3, 100)           # 디바운스 지남 → 이 청크까지 보내고 끝
+        yield pcm(4, 100)
+
+    out = list(gate.filter(chunks(), lambda: None))
+    assert out == [pcm(1, 100), pcm(2, 100), pcm(3, 100)]
+
+
+def test_ptt_debounce_treats_quick_repress_as_same_press(now):
+    gate = PushToTalkGate(RATE, debounce_ms=80)
+    now.t = 10.0
+    gate.press()
+    gate.press()                    # 키 자동 반복
+    now.t = 10.5
+    gate.release()
+    now.t = 10.55
+    gate.press()                    # 디바운스 안에 다시 누름 → 같은 누름
+    assert gate.presses == 1
+    assert gate._pressed_at == 10.0
+    gate.release()
+    now.t = 11.0
+    assert not gate.active
+    gate.press()
+    assert gate.presses == 2
+    assert gate._pressed_at == 11.0
+
+
+def tone(rate, hz, seconds, amplitude=8000.0, dc=0.0):
+    """float32 사인파 (+ 직류)"""
+    t = np.arange(int(rate * seconds)) / rate
+    return (dc + amplitude * np.sin(2 * np.pi * hz * t)).astype(np.float32)
+
+
+def test_highpass_removes_dc_and_keeps_voice_band():
+    rate = 16000
+    y = HighPassFilter(rate, cutoff_hz=100.0).process(tone(rate, 1000, 1.0, dc=3000.0))
+    settled = y[rate // 2:]
+    assert abs(float(settled.mean())) < 1.0
+    assert 0.9 * 8000 < float(np.abs(settled).max()) < 8000
+
+
+def test_highpass_matches_sample_recursion_across_chunks():
+    rate = 16000
+    hp = HighPassFilter(rate, cutoff_hz=100.0, order=1, block=64)
+    x = tone(rate, 50, 0.1, dc=2000.0)
+    # 청크 경계(블록 크기와 안 맞게)를 넘어가도 상태가 이어져야 한다
+    y = np.concatenate([hp.process(x[i:i + 333]) for i in range(0, len(x), 333)])
+    a = np.exp(-2.0 * np.pi * 100.0 / rate)
+    expected = np.empty(len(x))
+    prev_x = prev_y = 0.0
+    for n, value in enumerate(x.astype(np.float64)):
+        prev_y = a * (prev_y + value - prev_x)
+        prev_x = value
+        expected[n] = prev_y
+    assert np.allclose(y, expected, atol=0.05)
+
+
+@pytest.mark.parametrize("in_rate", [48000, 44100])
+def test_resampler_reproduces_delayed_sine(in_rate):
+    resampler = PolyphaseResampler(in_rate, 16000)
+    y = resampler.process(tone(in_rate, 1000, 1.0))
+    assert len(y) == 16000
+    t = np.arange(len(y)) / 16000 - resampler.delay_seconds
+    expected = 8000.0 * np.sin(2 * np.pi * 1000 * t)
+    # 필터가 채워지기 전(앞)과 입력 끝(뒤)은 제외
+    settled = slice(len(y) // 4, len(y) - 100)
+    assert np.abs(y[settled] - expected[settled]).max() < 1.0
+
+
+@pytest.mark.parametrize("in_rate", [48000, 44100])
+def test_resampler_output_does_not_depend_on_chunking(in_rate):
+    x = tone(in_rate, 440, 0.5)
+    whole = PolyphaseResampler(in_rate, 16000).process(x)
+    chunked = PolyphaseResampler(in_rate, 16000)
+    sizes = np.random.default_rng(0).integers(1, 2000, size=len(x))
+    bounds = np.cumsum(np.concatenate(([0], sizes)))
+    parts = [chunked.process(x[start:end]) for start, end in zip(bounds[:-1], bounds[1:]) if start < len(x)]
+    assert np.array_equal(np.concatenate(parts), whole)
+
+
+def line_array():
+    """x축 위 5 cm 간격 캡슐 4개, 화자는 +x 방향 (캡슐 사이 도착 차이 약 2.3샘플 @ 16 kHz)"""
+    return MicArray([(0.0, 0.0), (0.05, 0.0), (0.10, 0.0), (0.15, 0.0)], azimuth=0)
+
+
+def array_capture(array, source, rate, seconds):
+    """캡슐별 도착 시각만큼 (분수 샘플까지) 늦춘 다채널 int16 캡처"""
+    t = np.arange(int(rate * seconds)) / rate
+    return np.stack([source(t - a) for a in array.arrival_times()], axis=1).astype(np.int16), t
+
+
+def speech_like(t):
+    return 6000 * np.sin(2 * np.pi * 500 * t) + 3000 * np.sin(2 * np.pi * 1300 * t + 0.3)
+
+
+def test_beamformer_aligns_delayed_channels():
+    rate, array = 16000, line_array()
+    frames, t = array_capture(array, speech_like, rate, 1.0)
+    beam = DelayAndSumBeamformer(rate, array, budget=float("inf"))
+    y = np.concatenate([beam.process(frames[i:i + 160]) for i in range(0, len(frames), 160)])
+    # 가장 먼저 도착한 캡슐 기준 delay_seconds 늦은 원래 신호
+    expected = speech_like(t - array.arrival_times().min() - beam.delay_seconds)
+    settled = slice(1000, None)
+    assert np.abs(y[settled] - expected[settled]).max() < 2.0
+    # 정렬 없이 더하면 크게 어긋난다
+    unaligned = frames.astype(np.float64).mean(axis=1)
+    assert np.abs(unaligned[settled] - speech_like(t - array.arrival_times().min())[settled]).max() > 100.0
+    assert beam.mode == "fractional"
+
+
+def test_beamformer_attenuates_off_axis_sound():
+    rate, array = 16000, line_array()
+    frames, _ = array_capture(array, lambda t: 8000 * np.sin(2 * np.pi * 3000 * t), rate, 0.5)
+
+    def beam_rms(azimuth):
+        beam = DelayAndSumBeamformer(rate, array, budget=float("inf"))
+        beam.steer(azimuth=azimuth)
+        return float(np.sqrt(np.mean(beam.process(frames)[1000:] ** 2)))
+
+    on_axis = beam_rms(0)
+    assert on_axis == pytest.approx(8000 / np.sqrt(2), rel=0.02)
+    assert beam_rms(90) < 0.5 * on_axis
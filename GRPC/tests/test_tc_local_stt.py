@@ -0,0 +1,70 @@
+"""
+🧪 tc_local_stt 테스트: 디코더 출력 → 명령 표기, 명령 문법의 디코더 문구
+
+Vosk 모델 없이 돌리기 위해 모델을 읽는 부분만 가짜로 바꾼다.
+"""
+
+import pytest
+
+import tc_local_stt
+from tc_local_stt import LocalSpeechClient
+from tc_stt import CommandGrammar
+
+
+class FakeVosk:
+    """모델 파일을 읽지 않는 vosk 자리"""
+
+    @staticmethod
+    def SetLogLevel(level):
+        pass
+
+    class Model:
+        def __init__(self, path):
+            self.path = path
+
+
+@pytest.fixture
+def grammar():
+    input_map = {"1": "input1", "2": "input2", "p1": "ddr1", "m2": "V2"}
+    phonetic_map = {"one": "1", "two": "2", "p one": "p1", "m two": "m2"}
+    return CommandGrammar(input_map, phonetic_map)
+
+
+@pytest.fixture
+def client(monkeypatch, grammar):
+    monkeypatch.setattr(tc_local_stt, "vosk", FakeVosk)
+    return LocalSpeechClient("model", grammar.decoder_phrases())
+
+
+def test_decoder_phrases_are_words_only_and_map_to_commands(grammar):
+    phrases = grammar.decoder_phrases()
+    assert not any(c.isdigit() for phrase in phrases for c in phrase)
+    assert phrases["p one cut"] == "p1 cut"
+    assert phrases["two"] == "2"
+    assert phrases["m two"] == "m2"
+    assert phrases["mix"] == "mix"
+    assert phrases["test"] == "test"
+    # 디코더가 낸 표기는 그대로 실행할 명령이다
+    assert all(grammar.key(command) == command for command in phrases.values())
+
+
+def test_to_transcript_prefers_longest_phrase(client):
+    assert client.to_transcript("p one cut") == "p1 cut"
+    assert client.to_transcript("p one") == "p1"
+    assert client.to_transcript("two cut") == "2 cut"
+
+
+def test_to_transcript_drops_unknown_words(client):
+    assert client.to_transcript("[unk] m two [unk]") == "m2"
+    assert client.to_transcript("[unk]") == ""
+    assert client.to_transcript("") == ""
+
+
+def test_to_transcript_converts_each_phrase_in_sequence(client):
+    assert client.to_transcript("one mix p one cut") == "1 mix p1 cut"
+
+
+def test_client_without_vosk_raises_import_error(monkeypatch):
+    monkeypatch.setattr(tc_local_stt, "vosk", None)
+    with pytest.raises(ImportError):
+        LocalSpeechClient("model", {"cut": "cut"})
@@ -0,0 +1,82 @@
+"""
+🧪 tc_realtime 테스트: 우선순위 폴백, gc 일시 정지
+"""
+
+import gc
+import os
+import threading
+
+import pytest
+
+import tc_realtime
+
+
+def refuse(*args):
+    raise PermissionError("not permitted")
+
+
+def test_nice_fallback_reports_failure_when_only_default_is_allowed(monkeypatch):
+    applied = []
+    monkeypatch.setattr(os, "sched_setscheduler", refuse, raising=False)
+
+    def setpriority(which, tid, value):
+        if value < 0:
+            raise PermissionError("not permitted")
+        applied.append(value)
+
+    monkeypatch.setattr(os, "setpriority", setpriority)
+    results = {}
+    tc_realtime._linux_priority(1, "audio", results)
+    assert results["priority"] == "기본값 (권한 없음)"
+    assert applied == []
+
+
+def test_nice_fallback_applies_highest_allowed_negative_nice(monkeypatch):
+    monkeypatch.setattr(os, "sched_setscheduler", refuse, raising=False)
+
+    def setpriority(which, tid, value):
+        if value < -3:
+            raise PermissionError("not permitted")
+
+    monkeypatch.setattr(os, "setpriority", setpriority)
+    results = {}
+    tc_realtime._linux_priority(1, "audio", results)
+    assert results["priority"] == "nice -3"
+
+
+@pytest.fixture
+def gc_enabled():
+    gc.enable()
+    yield
+    gc.enable()
+
+
+def test_gc_pause_nests(gc_enabled):
+    with tc_realtime.gc_paused():
+        with tc_realtime.gc_paused():
+            assert not gc.isenabled()
+        assert not gc.isenabled()
+    assert gc.isenabled()
+
+
+def test_gc_pause_concurrent_threads_keep_gc_off_until_last_exit(gc_enabled):
+    violations = []
+
+    def worker():
+        for _ in range(2000):
+            with tc_realtime.gc_paused():
+                if gc.isenabled():
+                    violations.append(1)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert violations == []
+    assert gc.isenabled()
+
+
+def test_gc_pause_disabled_is_noop(gc_enabled):
+    with tc_realtime.gc_paused(enabled=False):
+        assert gc.isenabled()
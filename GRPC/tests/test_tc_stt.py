@@ -0,0 +1,456 @@
+"""
+🧪 tc_stt 테스트: 스트림 교대 (RotationArbiter / SessionRotator), 엔진 헤징 (HedgeArbiter / HedgedRecognizer),
+중간 결과 빠른 실행 (InterimFastPath), 명령 문법 (CommandGrammar), 명령 버스 (CommandBus)
+
+인식 스트림은 흉내 낸다: 발화를 처음부터 끝까지 받았으면 끝 + ENDPOINT_S 오디오가 지난 뒤 최종 결과를 낸다.
+시계는 분배기에 들어간 오디오 길이(초)라서 교대 시점은 쓰레드 타이밍과 상관없이 오디오 위치로 정해진다.
+"""
+
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from tc_audio import AudioFanout
+from tc_stt import CommandBus, CommandGrammar, HedgeArbiter, HedgedRecognizer, InterimFastPath, RotationArbiter, SessionRotator
+
+RATE = 1000
+CHUNK_S = 0.1
+ENDPOINT_S = 0.3
+
+
+class AudioClock:
+    """분배기에 넣은 오디오 누적 길이(초)"""
+
+    def __init__(self):
+        self.seconds = 0.0
+
+    def __call__(self):
+        return self.seconds
+
+
+def paced_chunks(clock, seconds, pace_s=0.004):
+    """CHUNK_S 길이의 무음 청크를 조금씩 쉬면서 내보낸다 (시계는 청크를 내보낼 때 오디오 끝 위치로)"""
+    for i in range(int(round(seconds / CHUNK_S))):
+        time.sleep(pace_s)
+        clock.seconds = round((i + 1) * CHUNK_S, 6)
+        yield bytes(int(RATE * CHUNK_S) * 2)
+
+
+def fake_recognizer(utterances, rotator, fail=None):
+    """흉내 낸 인식 스트림: utterances = [(시작, 끝), ...] → offer(sid, 끝, 발화 번호)
+
+    fail = {sid: 오디오 위치}면 그 스트림은 해당 위치에서 예외로 끊긴다.
+    """
+    def run(sid, reader):
+        first = None
+        last = None
+        pending = list(enumerate(utterances))
+        for _ in reader.generator():
+            last = reader.last_captured_at
+            if first is None:
+                first = last - CHUNK_S
+            if fail and sid in fail and last >= fail[sid]:
+                raise ConnectionError(f"stream {sid} dropped")
+            while pending and pending[0][1][1] + ENDPOINT_S <= last:
+                index, (start, end) = pending.pop(0)
+                if start >= first:
+                    rotator.offer(sid, end, index)
+        # 요청 스트림이 닫히면 받은 데까지 끝난 발화도 최종 결과로 낸다
+        for index, (start, end) in pending:
+            if last is not None and first <= start and end <= last:
+                rotator.offer(sid, end, index)
+    return run
+
+
+def rotate(utterances, seconds, limit_s=3.0, overlap_s=1.0, fail=None):
+    """오디오 seconds초를 교대하며 인식 → (발화별 실행 횟수, rotator)"""
+    clock = AudioClock()
+    fanout = AudioFanout(paced_chunks(clock, seconds), RATE, clock).start()
+    posted = Counter()
+    lock = threading.Lock()
+
+    def post(index):
+        with lock:
+            posted[index] += 1
+
+    holder = {}
+    rotator = SessionRotator(fanout, lambda sid, reader: holder["run"](sid, reader), post,
+                             limit_s=limit_s, overlap_s=overlap_s, pre_roll_s=1.0, tolerance=0.5,
+                             clock=clock, poll_s=0.001)
+    holder["run"] = fake_recognizer(utterances, rotator, fail)
+    rotator.run(lambda: False)
+    return posted, rotator
+
+
+def test_arbiter_handover_on_utterance_drops_successor_copy():
+    arbiter = RotationArbiter(tolerance=0.5)
+    arbiter.start(0)
+    arbiter.begin(1)
+    assert arbiter.offer(1, 10.02, "cut") == ([], False)       # 새 스트림이 먼저 받은 결과는 잡아둔다
+    assert arbiter.offer(0, 10.0, "cut") == (["cut"], True)     # 이전 스트림의 결과가 경계 → 한 번만 실행
+    assert arbiter.owner == 1 and arbiter.boundary == 10.0
+    assert arbiter.duplicates == 1
+
+
+def test_arbiter_releases_held_results_after_boundary():
+    arbiter = RotationArbiter(tolerance=0.5)
+    arbiter.start(0)
+    arbiter.begin(1)
+    arbiter.offer(1, 12.0, "p1 cut")
+    assert arbiter.offer(0, 10.0, "2 cut") == (["2 cut", "p1 cut"], True)
+    assert arbiter.duplicates == 0
+
+
+def test_arbiter_late_copy_from_previous_stream_is_dropped():
+    arbiter = RotationArbiter(tolerance=0.5)
+    arbiter.start(0)
+    arbiter.begin(1)
+    arbiter.offer(0, 10.0, "cut")
+    assert arbiter.offer(1, 10.1, "cut") == ([], False)        # 새 스트림의 같은 발화
+    assert arbiter.offer(0, 14.0, "mix") == ([], False)        # 넘긴 뒤 이전 스트림의 경계 뒤 결과
+    assert arbiter.offer(1, 14.0, "mix") == (["mix"], False)
+    assert arbiter.duplicates == 2
+
+
+def test_arbiter_forced_handover_dedups_across_seam():
+    arbiter = RotationArbiter(tolerance=0.5)
+    arbiter.start(0)
+    arbiter.begin(1)
+    arbiter.offer(1, 5.1, "cut")
+    assert arbiter.force(5.0) == ["cut"]
+    assert arbiter.offer(0, 4.9, "cut") == ([], False)         # 경계를 사이에 둔 같은 발화 → 버림
+    assert arbiter.offer(0, 3.0, "mix") == (["mix"], False)    # 이전 스트림만 들은 경계 앞 발화
+    assert arbiter.duplicates == 1
+
+
+def test_arbiter_forced_handover_keeps_distinct_utterance_near_seam():
+    arbiter = RotationArbiter(tolerance=0.5)
+    arbiter.start(0)
+    arbiter.begin(1)
+    assert arbiter.force(5.0) == []
+    assert arbiter.offer(0, 4.8, "cut") == (["cut"], False)
+    assert arbiter.offer(1, 6.0, "mix") == (["mix"], False)
+
+
+def test_arbiter_accepts_only_owner_results_for_fast_path():
+    arbiter = RotationArbiter(tolerance=0.5)
+    arbiter.start(0)
+    assert arbiter.accepts(0, 1.0)
+    arbiter.begin(1)
+    assert not arbiter.accepts(1, 2.0)
+    arbiter.offer(0, 2.0, None)                                 # 이미 실행된 결과도 경계로 센다
+    assert arbiter.accepts(1, 3.0)
+    assert not arbiter.accepts(1, 2.2)                          # 이전 스트림이 이미 쓴 발화 부근
+    assert not arbiter.accepts(0, 3.0)
+
+
+UTTERANCES = [(0.5, 1.0), (2.2, 2.6), (3.4, 3.8), (5.0, 5.5), (6.6, 7.0), (8.3, 8.6)]
+
+
+def test_rotation_hands_over_at_utterance_without_loss_or_double_fire():
+    posted, rotator = rotate(UTTERANCES, 10.0)
+    assert posted == Counter({index: 1 for index in range(len(UTTERANCES))})
+    assert len(rotator.rotations) >= 2
+    assert rotator.rotations[0]["reason"] == "utterance"
+    assert all(info["gap"] == 0.0 for info in rotator.rotations)
+    assert all(info["overlap"] > 0.0 for info in rotator.rotations)
+    assert rotator.arbiter.duplicates >= 1                      # 겹친 구간의 발화를 두 스트림이 모두 냈다
+
+
+def test_rotation_forced_at_limit_when_no_utterance_boundary():
+    utterances = [(0.5, 1.0), (2.95, 3.3), (5.5, 6.0)]
+    posted, rotator = rotate(utterances, 7.0)
+    assert posted == Counter({0: 1, 1: 1, 2: 1})
+    assert rotator.rotations[0]["reason"] == "limit"
+    assert rotator.rotations[0]["gap"] == 0.0
+
+
+def test_rotation_survives_current_stream_failure_during_overlap():
+    posted, rotator = rotate(UTTERANCES, 10.0, fail={0: 2.4})
+    assert posted == Counter({index: 1 for index in range(len(UTTERANCES))})
+    assert rotator.rotations[0]["reason"] == "error"
+
+
+def test_rotation_reraises_error_of_last_stream():
+    with pytest.raises(ConnectionError):
+        rotate(UTTERANCES[:1], 2.0, limit_s=30.0, fail={0: 1.5})
+
+
+class FakeClock:
+    """손으로 움직이는 시계 (결과 도착 시각)"""
+
+    def __init__(self, now=100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def hedge_arbiter(clock, thresholds=None):
+    commands = {"cut", "p1 cut", "2 cut"}
+    return HedgeArbiter(thresholds or {"google": 0.0, "local": 0.7}, lambda transcript: transcript in commands,
+                        window=0.7, clock=clock)
+
+
+def test_hedge_first_confident_result_wins_and_late_loser_is_suppressed():
+    clock = FakeClock()
+    arbiter = hedge_arbiter(clock)
+    clock.now = 10.2
+    assert arbiter.offer("local", "p1 cut", 0.9, 10.0)
+    clock.now = 10.9
+    assert not arbiter.offer("google", "p1 cut", 0.95, 10.1)
+    assert arbiter.stats["local"]["wins"] == 1
+    assert arbiter.stats["google"]["late"] == 1
+    assert arbiter.stats["google"]["behind"] == [pytest.approx(0.7)]
+    assert arbiter.latencies == [pytest.approx(0.2)]
+    assert arbiter.win_rates() == {"local": 1.0, "google": 0.0}
+
+
+def test_hedge_low_confidence_first_result_leaves_utterance_open():
+    clock = FakeClock()
+    arbiter = hedge_arbiter(clock)
+    clock.now = 10.2
+    assert not arbiter.offer("local", "cut", 0.5, 10.0)        # 로컬 기준(0.7) 미달
+    clock.now = 10.6
+    assert arbiter.offer("google", "cut", 0.6, 10.05)
+    assert arbiter.stats["local"]["rejected"] == 1
+    assert arbiter.stats["google"]["wins"] == 1
+
+
+def test_hedge_invalid_command_is_rejected_even_when_confident():
+    clock = FakeClock()
+    arbiter = hedge_arbiter(clock)
+    assert not arbiter.offer("google", "cart", 0.99, 10.0)
+    assert arbiter.offer("local", "cut", 0.8, 10.1)
+    assert arbiter.stats["google"]["rejected"] == 1
+
+
+def test_hedge_every_engine_below_threshold_fires_nothing():
+    clock = FakeClock()
+    arbiter = hedge_arbiter(clock, thresholds={"google": 0.9, "local": 0.9})
+    assert not arbiter.offer("google", "cut", 0.5, 10.0)
+    assert not arbiter.offer("local", "cut", 0.8, 10.1)
+    assert arbiter.latencies == []
+    assert arbiter.win_rates() == {"google": 0.0, "local": 0.0}
+
+
+def test_hedge_separate_utterances_each_get_a_winner():
+    clock = FakeClock()
+    arbiter = hedge_arbiter(clock)
+    assert arbiter.offer("google", "cut", 0.9, 10.0)
+    assert arbiter.offer("google", "2 cut", 0.9, 10.5)         # 같은 엔진의 다음 결과는 다른 발화
+    assert arbiter.offer("local", "p1 cut", 0.9, 12.0)         # window 밖
+    assert not arbiter.offer("local", "2 cut", 0.9, 10.45)
+    assert arbiter.stats["google"]["wins"] == 2
+    assert arbiter.stats["local"]["late"] == 1
+
+
+class BlockingAudio:
+    """멈출 때까지 끝나지 않는 오디오 (분배기가 finished가 되지 않게)"""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+    def chunks(self):
+        while not self.done.wait(0.005):
+            yield bytes(20)
+
+
+def run_hedge(run_engine, stop_when, engines=("google", "local"), timeout=5.0):
+    audio = BlockingAudio()
+    fanout = AudioFanout(audio.chunks(), RATE, time.monotonic).start()
+    errors = []
+    hedge = HedgedRecognizer(fanout, engines, run_engine, retry_s=0.0,
+                             on_error=lambda engine, e: errors.append(engine), poll_s=0.002)
+    deadline = time.monotonic() + timeout
+    try:
+        hedge.run(lambda: stop_when(hedge, errors) or time.monotonic() > deadline)
+    finally:
+        audio.done.set()
+    return hedge, errors
+
+
+def test_hedge_every_engine_failing_is_retried_until_stopped():
+    def run_engine(engine, reader):
+        raise ConnectionError(f"{engine} unavailable")
+
+    hedge, errors = run_hedge(run_engine, lambda hedge, errors: min(hedge.restarts.values()) >= 3)
+    assert min(hedge.restarts.values()) >= 3
+    assert errors.count("google") >= 3 and errors.count("local") >= 3
+
+
+def test_hedge_one_engine_failing_does_not_restart_the_other():
+    chunks = Counter()
+
+    def run_engine(engine, reader):
+        if engine == "google":
+            raise ConnectionError("WAN down")
+        for _ in reader.generator():
+            chunks[engine] += 1
+
+    hedge, errors = run_hedge(run_engine, lambda hedge, errors: hedge.restarts["google"] >= 3)
+    assert hedge.restarts == {"google": hedge.restarts["google"], "local": 0}
+    assert set(errors) == {"google"}
+    assert chunks["local"] > 0
+
+
+def test_hedge_hung_engines_are_released_on_stop():
+    finished = []
+    started = threading.Event()
+
+    def run_engine(engine, reader):
+        started.set()
+        for _ in reader.generator():    # 결과를 내지 않고 오디오만 받는다 (응답 없는 서버)
+            pass
+        finished.append(engine)
+
+    stop_at = []
+
+    def stop_when(hedge, errors):
+        if started.is_set() and not stop_at:
+            stop_at.append(time.monotonic() + 0.05)
+        return bool(stop_at) and time.monotonic() >= stop_at[0]
+
+    hedge, errors = run_hedge(run_engine, stop_when)
+    deadline = time.monotonic() + 2.0
+    while len(finished) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sorted(finished) == ["google", "local"]
+    assert errors == []
+    assert hedge.restarts == {"google": 0, "local": 0}
+
+
+def test_hedge_returns_when_audio_ends_and_every_engine_is_down():
+    clock = AudioClock()
+    fanout = AudioFanout(paced_chunks(clock, 0.5, pace_s=0.001), RATE, clock).start()
+
+    def run_engine(engine, reader):
+        for _ in reader.generator():
+            pass
+        raise ConnectionError(f"{engine} closed")
+
+    hedge = HedgedRecognizer(fanout, ["google", "local"], run_engine, retry_s=0.0, poll_s=0.002)
+    started = time.monotonic()
+    hedge.run(lambda: time.monotonic() - started > 5.0)
+    assert time.monotonic() - started < 5.0
+    assert fanout.finished
+
+
+def fast_path(stability=0.8):
+    """"cut"/"mix"/"p1 cut"만 바로 실행하는 빠른 경로"""
+    commands = {"cut", "mix", "p1 cut"}
+    return InterimFastPath(lambda text: text if text in commands else None, stability=stability)
+
+
+def test_fast_path_uses_only_stable_prefix():
+    path = fast_path()
+    assert path.stable_text([("p1", 0.9), (" cut", 0.85), (" mix", 0.2)]) == "p1 cut"
+    assert path.interim([("p1", 0.9), (" cut", 0.3)]) is None       # 안정된 앞부분 "p1"은 실행할 명령이 아님
+    assert path.interim([("p1", 0.9), (" cut", 0.9)]) == "p1 cut"
+
+
+def test_fast_path_fires_once_and_final_confirms():
+    path = fast_path()
+    assert path.interim([("cut", 0.9)]) == "cut"
+    assert path.interim([("cut", 0.95)]) is None                    # 같은 발화에서 다시 실행하지 않음
+    status, fired, final_command, lead = path.final("cut")
+    assert (status, fired, final_command) == ("confirmed", "cut", "cut")
+    assert lead >= 0.0
+    assert (path.fired, path.confirmed, path.diverged) == (1, 1, 0)
+    assert path.lead_seconds == [lead]
+
+
+def test_fast_path_final_that_disagrees_is_reported_as_diverged():
+    path = fast_path()
+    path.interim([("cut", 0.9)])
+    status, fired, final_command, _ = path.final("mix")
+    assert (status, fired, final_command) == ("diverged", "cut", "mix")
+    assert (path.confirmed, path.diverged) == (0, 1)
+    assert path.lead_seconds == []
+
+
+def test_fast_path_final_without_interim_is_executed_and_resets_utterance():
+    path = fast_path()
+    assert path.final("mix") == ("execute", None, None, None)
+    path.interim([("cut", 0.9)])
+    path.final("cut")
+    # 최종 결과 뒤 다음 발화는 다시 먼저 실행할 수 있다
+    assert path.interim([("mix", 0.9)]) == "mix"
+    assert path.fired == 2
+
+
+@pytest.fixture
+def grammar():
+    input_map = {"1": "input1", "2": "input2", "p1": "ddr1", "m2": "V2"}
+    phonetic_map = {"one": "1", "two": "2", "p one": "p1", "m two": "m2", "cup": "cut"}
+    return CommandGrammar(input_map, phonetic_map)
+
+
+def test_grammar_spoken_forms_expand_numbers(grammar):
+    assert grammar.spoken_forms("2") == ["2", "two"]
+    assert grammar.spoken_forms("p1") == ["p1", "p 1", "p one"]
+    assert grammar.spoken_forms("m2") == ["m2", "m 2", "m two"]
+
+
+def test_grammar_phrase_hints_cover_every_accepted_utterance(grammar):
+    hints = grammar.phrase_hints({"verb": 15.0, "quick_cut": 12.0, "input": 10.0, "ready": 5.0})
+    groups = {boost: phrases for phrases, boost in hints}
+    assert groups[15.0] == ["cut", "mix"]
+    assert groups[10.0] == ["1", "one", "2", "two", "p1", "p 1", "p one", "m2", "m 2", "m two"]
+    assert groups[12.0] == [f"{form} cut" for form in groups[10.0]]
+    assert groups[5.0] == ["test"]
+
+
+def test_grammar_phrase_hints_skip_unboosted_and_unknown_groups(grammar):
+    hints = grammar.phrase_hints({"verb": 15.0, "ready": 0.0, "slang": 20.0})
+    assert hints == [(["cut", "mix"], 15.0)]
+
+
+def test_grammar_key_reduces_to_executable_command(grammar):
+    assert grammar.key("P1 Cut") == "p1 cut"
+    assert grammar.key("two") == "2"
+    assert grammar.key("cup") == "cut"
+    assert grammar.key("testing one two") == "test"
+    assert grammar.key("1 2 mix") == "mix"
+
+
+def test_bus_drops_same_command_from_other_mic_inside_window():
+    bus = CommandBus(lambda transcript, captured_at: None, dedup_window=1.0)
+    assert not bus.is_duplicate(1, "cut", 10.0)
+    assert bus.is_duplicate(2, "cut", 10.4)
+    assert bus.is_duplicate(2, "cut", 9.5)                      # 캡처 시각 기준이라 늦게 도착해도 같은 발화
+    assert not bus.is_duplicate(2, "cut", 11.5)                 # 창 밖 → 새 명령
+
+
+def test_bus_keeps_repeated_command_from_same_mic():
+    bus = CommandBus(lambda transcript, captured_at: None, dedup_window=1.0)
+    assert not bus.is_duplicate(1, "cut", 10.0)
+    assert not bus.is_duplicate(1, "cut", 10.3)
+
+
+def test_bus_dedups_by_command_key():
+    bus = CommandBus(lambda transcript, captured_at: None, key=lambda transcript: transcript.replace(" ", ""),
+                     dedup_window=1.0)
+    assert not bus.is_duplicate(1, "p1 cut", 10.0)
+    assert bus.is_duplicate(2, "p1cut", 10.2)
+
+
+def test_bus_dispatches_in_order_and_survives_handler_error():
+    handled = []
+
+    def handler(transcript, captured_at):
+        handled.append(transcript)
+        if transcript == "mix":
+            raise RuntimeError("switcher unreachable")
+
+    bus = CommandBus(handler, dedup_window=1.0).start()
+    bus.post(1, "p1", 10.0)
+    bus.post(2, "p1", 10.1)
+    bus.post(1, "mix", 10.5)
+    bus.post(2, "cut", 10.6)
+    bus.stop()
+    bus._thread.join(timeout=5.0)
+    assert handled == ["p1", "mix", "cut"]
+    assert (bus.dispatched, bus.duplicates) == (3, 1)